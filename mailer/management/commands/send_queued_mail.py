@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connection
+from mailer.utils import process_queue
+
+
+class Command(BaseCommand):
+    help = "Send the queued outbound emails."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of workers sending concurrently.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Number of emails sent per SMTP connection.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new emails instead of exiting once sent.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls with --loop.",
+        )
+
+    def work(self, batch_size):
+        try:
+            return process_queue(batch_size)
+        finally:
+            # Each thread opens its own database connection
+            connection.close()
+
+    def handle(self, *args, **options):
+        workers, batch_size = options["workers"], options["batch_size"]
+        while True:
+            if workers == 1:
+                sent = process_queue(batch_size)
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(self.work, batch_size) for _ in range(workers)
+                    ]
+                    sent = sum(future.result() for future in futures)
+            if sent or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} email(s)."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
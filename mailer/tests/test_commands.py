@@ -0,0 +1,27 @@
+"""
+This module contains test cases for the following management commands:
+* send_queued_mail
+"""
+
+from io import StringIO
+from django.test import TestCase
+from django.core import mail
+from django.core.management import call_command
+from ..utils import enqueue_email
+
+
+class SendQueuedMailCommandTests(TestCase):
+    """
+    Test suite for the send_queued_mail command.
+    """
+
+    def test_sends_queued_emails(self):
+        """
+        Test that the command sends the queued emails & reports them.
+        """
+        enqueue_email("Subject", "<p>Body</p>", ["user@uoi.gr"])
+        out = StringIO()
+        call_command("send_queued_mail", stdout=out)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["user@uoi.gr"])
+        self.assertIn("Sent 1 email(s).", out.getvalue())
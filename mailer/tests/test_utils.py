@@ -0,0 +1,84 @@
+"""
+This module contains test cases for the email queue:
+* enqueue_email, claim_emails, send_emails, process_queue
+"""
+
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.core import mail
+from django.utils import timezone
+from ..models import OutgoingEmail
+from ..utils import enqueue_email, claim_emails, process_queue
+
+
+class EmailQueueTests(TestCase):
+    """
+    Test suite for queueing & sending emails.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by queueing two emails.
+        """
+        for i in range(2):
+            enqueue_email(f"Subject {i}", f"<p>Body {i}</p>", [f"user{i}@uoi.gr"])
+
+    def test_enqueue_doesnt_send(self):
+        """
+        Test that queueing an email doesn't send it.
+        """
+        self.assertEqual(OutgoingEmail.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_process_queue_sends_all(self):
+        """
+        Test that processing the queue sends every email as HTML & marks it sent.
+        """
+        self.assertEqual(process_queue(batch_size=1), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        self.assertEqual(
+            OutgoingEmail.objects.filter(status=OutgoingEmail.SENT).count(), 2
+        )
+        self.assertEqual(process_queue(), 0)  # Nothing left to send
+
+    def test_claimed_emails_are_skipped(self):
+        """
+        Test that emails claimed by a worker aren't claimed again.
+        """
+        self.assertEqual(len(claim_emails(batch_size=10)), 2)
+        self.assertEqual(claim_emails(batch_size=10), [])
+
+    def test_stale_claims_are_retried(self):
+        """
+        Test that emails left unsent by a crashed worker are claimed again.
+        """
+        claim_emails(batch_size=10)
+        OutgoingEmail.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(len(claim_emails(batch_size=10)), 2)
+
+    @override_settings(MAILER_MAX_ATTEMPTS=2, MAILER_RETRY_DELAY=60)
+    def test_failed_send_is_retried_with_backoff(self):
+        """
+        Test that a failed send is rescheduled, then given up after max attempts.
+        """
+        with mock.patch(
+            "django.core.mail.EmailMessage.send", side_effect=OSError("SMTP down")
+        ):
+            self.assertEqual(process_queue(), 0)
+
+        email = OutgoingEmail.objects.first()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn("SMTP down", email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        with mock.patch(
+            "django.core.mail.EmailMessage.send", side_effect=OSError("SMTP down")
+        ):
+            process_queue()
+        self.assertEqual(
+            OutgoingEmail.objects.filter(status=OutgoingEmail.FAILED).count(), 2
+        )
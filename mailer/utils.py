@@ -0,0 +1,105 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject, html_message, recipient_list, from_email=None):
+    """
+    Queue an HTML email, to be sent by the send_queued_mail command.
+    Called inside a transaction, the email is only queued if it commits.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        html_message=html_message,
+        from_email=from_email,
+        recipients=list(recipient_list),
+    )
+
+
+def claim_emails(batch_size):
+    """
+    Mark up to batch_size due emails as being sent by this worker.
+    Rows locked by other workers are skipped, stale claims are taken over.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.MAILER_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+                | Q(status=OutgoingEmail.SENDING, claimed_at__lt=stale)
+            )
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status=OutgoingEmail.SENDING, claimed_at=now, attempts=F("attempts") + 1
+        )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def send_emails(emails):
+    """
+    Send the claimed emails over a single SMTP connection,
+    scheduling failed ones for a retry with exponential backoff.
+    Return the number of emails sent.
+    """
+    sent = []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _retry_later(email, e)
+        return 0
+
+    with connection:
+        for email in emails:
+            message = EmailMultiAlternatives(
+                email.subject,
+                "",
+                email.from_email or settings.EMAIL_HOST_USER,
+                email.recipients,
+                connection=connection,
+            )
+            message.attach_alternative(email.html_message, "text/html")
+            try:
+                message.send()
+            except Exception as e:
+                _retry_later(email, e)
+            else:
+                sent.append(email.pk)
+
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT, sent_at=timezone.now(), last_error=""
+    )
+    return len(sent)
+
+
+def _retry_later(email, error):
+    if email.attempts >= settings.MAILER_MAX_ATTEMPTS:
+        status, next_attempt_at = OutgoingEmail.FAILED, timezone.now()
+    else:
+        delay = settings.MAILER_RETRY_DELAY * 2 ** (email.attempts - 1)
+        status = OutgoingEmail.PENDING
+        next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        status=status, next_attempt_at=next_attempt_at, last_error=repr(error)
+    )
+
+
+def process_queue(batch_size=50):
+    """
+    Send queued emails batch by batch until none are due.
+    Return the number of emails sent.
+    """
+    total = 0
+    while emails := claim_emails(batch_size):
+        total += send_emails(emails)
+    return total
@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Note event streams are served outside Django's request handling,
+# which holds a thread per open stream (imported once the apps are loaded)
+from notes.events import events_application  # noqa: E402
+
+application = events_application(django_application)
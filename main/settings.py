@@ -42,6 +42,8 @@ INSTALLED_APPS = [
     # My apps
     "notes",
     "users",
+    "mailer",
+    "metrics",
     # Third-Party apps
     "django_bootstrap5",
     "crispy_forms",
@@ -55,9 +57,12 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 MIDDLEWARE = [
+    # First, to measure the whole request
+    "metrics.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -75,7 +80,8 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # Django templates, timed per request (see metrics.backends)
+        "BACKEND": "metrics.backends.DjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -110,6 +116,28 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+if os.getenv("CACHE_DIR"):
+    # File-based cache, shared by the workers of a host
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds anonymous archive pages & note bodies stay cached (see notes.cache)
+NOTES_CACHE_TIMEOUT = 5 * 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -150,6 +178,70 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media/")
 
+NOTES_COMMENTS_PER_PAGE = 20  # Comments loaded at once on the note page
+
+# Trending archive ordering (see notes.ranking)
+NOTES_TRENDING_HALF_LIFE = 2 * 24 * 60 * 60  # Seconds for a note's points to halve
+NOTES_TRENDING_COMMENT_WEIGHT = 2  # Points of a comment, a like is worth 1
+
+# Live note updates (see notes.events)
+# Fans events out within each process, replace with a shared pub/sub broker
+# to run several ASGI workers
+NOTES_EVENTS_BROKER = "notes.events.LocalBroker"
+NOTES_EVENTS_QUEUE_SIZE = 100  # Events queued per reader, slower ones are dropped
+NOTES_EVENTS_KEEPALIVE = 15  # Seconds between keep-alive comments on idle streams
+
+# Note attachment downloads (see notes.downloads)
+NOTES_DOWNLOAD_CHUNK_SIZE = 64 * 1024  # Bytes streamed per chunk
+# Let the front-end server stream files: "x-accel-redirect" (nginx),
+# "x-sendfile" (Apache/lighttpd) or unset to stream from Django
+NOTES_DOWNLOAD_SERVER = os.getenv("DOWNLOAD_SERVER")
+# Internal nginx location mapped to MEDIA_ROOT, for X-Accel-Redirect
+NOTES_DOWNLOAD_ACCEL_PREFIX = "/protected-media/"
+
+# Images pasted in note content (see notes.images)
+NOTES_IMAGE_MAX_SIZE = 1600  # Pixels, larger images are shrunk to fit
+NOTES_IMAGE_THUMBNAIL_WIDTH = 480  # Pixels, loaded by small screens
+NOTES_IMAGE_QUALITY = 85  # JPEG quality
+
+# Seconds an unused attachment is kept after it was last uploaded, as the note
+# of that upload may not be saved yet (see notes.storage & sweep_files)
+NOTES_FILE_GRACE_PERIOD = 60 * 60
+
+# Text extraction from note attachments (see notes.parsers)
+NOTES_EXTRACTION_TIMEOUT = 30  # Seconds per file
+NOTES_EXTRACTION_MEMORY_LIMIT = 512 * 1024 * 1024  # Bytes per worker process
+# Characters indexed per file, PostgreSQL search vectors are limited to 1 MB
+NOTES_EXTRACTION_MAX_CHARS = 200_000
+NOTES_EXTRACTION_MAX_ATTEMPTS = 3  # Give up on a file after that many attempts
+NOTES_EXTRACTION_RETRY_DELAY = 60  # Seconds before the 1st retry, doubled each time
+NOTES_EXTRACTION_CLAIM_TIMEOUT = 600  # Seconds before an unfinished file is retried
+
+# Request metrics (see metrics.middleware)
+# Send the timings of each request to the browser, only while developing
+METRICS_SERVER_TIMING = DEBUG
+# Bearer token of the Prometheus scraper, the metrics endpoint is only
+# served without one while developing
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Most queries each view may run, enforced by the test runner & logged otherwise
+METRICS_QUERY_BUDGETS = {
+    "notes:display_notes": 5,
+    "notes:note": 10,
+    "notes:note_comments": 2,
+    "notes:note_events": 2,
+    "notes:like_note": 10,
+    "notes:download_file": 5,
+    "notes:new_note": 14,
+    "notes:edit_note": 14,
+    "notes:delete_note": 10,
+    "users:register": 5,
+    "users:account": 20,
+    "users:delete_account": 15,
+}
+METRICS_ENFORCE_QUERY_BUDGETS = False
+
+TEST_RUNNER = "metrics.runner.TestRunner"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -166,6 +258,20 @@ EMAIL_PORT = 587
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
+# Email queue settings (see mailer.utils)
+MAILER_MAX_ATTEMPTS = 5  # Give up on an email after that many attempts
+MAILER_RETRY_DELAY = 60  # Seconds before the 1st retry, doubled on each attempt
+MAILER_CLAIM_TIMEOUT = 300  # Seconds before an unfinished send is retried
+
+# Base of the links in emails, which can't be relative
+SITE_URL = os.getenv("SITE_URL", "http://localhost:8000")
+
+# Seconds between comment digests, per notification frequency
+NOTIFICATION_DIGEST_WINDOWS = {
+    "hourly": 60 * 60,
+    "daily": 24 * 60 * 60,
+}
+
 # Summernote editor settings
 SUMMERNOTE_CONFIG = {
     "iframe": False,
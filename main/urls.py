@@ -25,6 +25,7 @@ urlpatterns = [
     path("", include("notes.urls")),
     path("user/", include("users.urls")),
     path("summernote/", include("django_summernote.urls")),
+    path("metrics/", include("metrics.urls")),
 ]
 
 if settings.DEBUG:
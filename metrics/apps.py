@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class MetricsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'metrics'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .recorder import install_recorder
+
+        # Every connection, of every thread, records the queries of requests
+        connection_created.connect(install_recorder)
@@ -0,0 +1,34 @@
+"""
+The Django template backend, timing the templates rendered by requests.
+"""
+
+import time
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+from .recorder import current
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        metrics = current.get()
+        # Templates rendered from templates are part of the outer one
+        if metrics is None or metrics.rendering:
+            return super().render(context, request)
+        metrics.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+            metrics.rendering = False
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
@@ -0,0 +1,83 @@
+"""
+Performance instrumentation of the requests to each view.
+
+The wall time, database time, query & duplicate query counts and template
+rendering time of each request to a resolved view are sent back in a
+Server-Timing header (shown by the browsers' developer tools), and added to
+the per-view totals of the Prometheus metrics endpoint.
+
+Views running more queries than their budget in METRICS_QUERY_BUDGETS fail
+the test suite (see metrics.runner), and are logged otherwise.
+"""
+
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from . import registry
+from .recorder import RequestMetrics, current
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def server_timing(metrics, wall_time):
+    return (
+        f"total;dur={wall_time * 1000:.1f}, "
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries '
+        f'({metrics.duplicates} duplicates)", '
+        f"template;dur={metrics.template_time * 1000:.1f}"
+    )
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        match = request.resolver_match
+        if match is None:
+            return response
+        wall_time = metrics.wall_time
+        budget = settings.METRICS_QUERY_BUDGETS.get(match.view_name)
+        over_budget = budget is not None and metrics.queries > budget
+        registry.observe(match.view_name, metrics, wall_time, over_budget)
+
+        if over_budget:
+            message = (
+                f"{match.view_name} ran {metrics.queries} queries "
+                f"({metrics.duplicates} duplicates), over its budget of {budget}"
+            )
+            if settings.METRICS_ENFORCE_QUERY_BUDGETS:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        if settings.METRICS_SERVER_TIMING:
+            response.headers["Server-Timing"] = server_timing(metrics, wall_time)
+        return response
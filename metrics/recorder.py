@@ -0,0 +1,53 @@
+"""
+Recording of the work done by each request: database queries & time,
+and template rendering time.
+
+The metrics of the current request live in a context variable, so they're
+found by the queries of async views too, which run in other threads.
+"""
+
+import time
+from contextvars import ContextVar
+
+current = ContextVar("metrics_request", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.duplicates = 0
+        self.template_time = 0.0
+        self.rendering = False
+        self.statements = set()
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        # The same statement run again, typically once per row (N+1 queries)
+        if sql in self.statements:
+            self.duplicates += 1
+        else:
+            self.statements.add(sql)
+
+    @property
+    def wall_time(self):
+        return time.perf_counter() - self.start
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - start)
+
+
+def install_recorder(sender, connection, **kwargs):
+    # Sent again when a closed connection reconnects
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,105 @@
+"""
+Per-view totals of the request metrics, exposed in the Prometheus text format.
+
+Totals are kept in memory per process: with several worker processes,
+each one is scraped as its own target.
+"""
+
+import threading
+from collections import defaultdict
+
+# Upper bounds of the request duration histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Totals of each view, exposed as counters
+COUNTERS = [
+    ("db_time", "django_view_db_seconds_total", "Database time of the requests."),
+    ("queries", "django_view_queries_total", "Database queries of the requests."),
+    (
+        "duplicates",
+        "django_view_duplicate_queries_total",
+        "Queries repeating a statement already run by the same request.",
+    ),
+    (
+        "template_time",
+        "django_view_template_seconds_total",
+        "Template rendering time of the requests.",
+    ),
+    (
+        "over_budget",
+        "django_view_query_budget_exceeded_total",
+        "Requests running more queries than the view's budget.",
+    ),
+]
+
+
+class ViewTotals:
+    def __init__(self):
+        self.requests = 0
+        self.buckets = [0] * len(BUCKETS)
+        self.wall_time = 0.0
+        self.db_time = 0.0
+        self.queries = 0
+        self.duplicates = 0
+        self.template_time = 0.0
+        self.over_budget = 0
+
+
+_lock = threading.Lock()
+_views = defaultdict(ViewTotals)
+
+
+def observe(view_name, metrics, wall_time, over_budget):
+    """
+    Add the metrics of a request to the totals of its view.
+    """
+    with _lock:
+        totals = _views[view_name]
+        totals.requests += 1
+        for i, bound in enumerate(BUCKETS):
+            if wall_time <= bound:
+                totals.buckets[i] += 1
+        totals.wall_time += wall_time
+        totals.db_time += metrics.db_time
+        totals.queries += metrics.queries
+        totals.duplicates += metrics.duplicates
+        totals.template_time += metrics.template_time
+        totals.over_budget += over_budget
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+def _label(view_name):
+    return view_name.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def exposition():
+    """
+    Return the totals in the Prometheus text exposition format.
+    """
+    with _lock:
+        views = [
+            (_label(name), vars(totals).copy())
+            for name, totals in sorted(_views.items())
+        ]
+
+    metric = "django_view_duration_seconds"
+    lines = [
+        f"# HELP {metric} Wall time of the requests.",
+        f"# TYPE {metric} histogram",
+    ]
+    for view, totals in views:
+        for bound, count in zip(BUCKETS, totals["buckets"]):
+            lines.append(f'{metric}_bucket{{view="{view}",le="{bound}"}} {count}')
+        lines.append(f'{metric}_bucket{{view="{view}",le="+Inf"}} {totals["requests"]}')
+        lines.append(f'{metric}_sum{{view="{view}"}} {totals["wall_time"]}')
+        lines.append(f'{metric}_count{{view="{view}"}} {totals["requests"]}')
+
+    for attribute, metric, description in COUNTERS:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+        for view, totals in views:
+            lines.append(f'{metric}{{view="{view}"}} {totals[attribute]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Fail the tests whose requests run more queries than their view's budget.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._enforced = settings.METRICS_ENFORCE_QUERY_BUDGETS
+        settings.METRICS_ENFORCE_QUERY_BUDGETS = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.METRICS_ENFORCE_QUERY_BUDGETS = self._enforced
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,114 @@
+"""
+This module contains test cases for the performance instrumentation of requests.
+"""
+
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from notes.models import Note
+from ..middleware import QueryBudgetExceeded
+from ..recorder import RequestMetrics
+
+
+class RequestMetricsTests(SimpleTestCase):
+    """
+    Test suite for recording the queries of a request.
+    """
+
+    def test_duplicate_queries(self):
+        """
+        Test that statements run again are counted as duplicates.
+        """
+        metrics = RequestMetrics()
+        metrics.add_query("SELECT 1", 0.25)
+        metrics.add_query("SELECT 2", 0.25)
+        metrics.add_query("SELECT 1", 0.5)
+        self.assertEqual(metrics.queries, 3)
+        self.assertEqual(metrics.duplicates, 1)
+        self.assertEqual(metrics.db_time, 1.0)
+
+
+@override_settings(METRICS_SERVER_TIMING=True)
+class PerformanceMiddlewareTests(TestCase):
+    """
+    Test suite for the Server-Timing headers & query budgets of views.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+
+    def test_server_timing(self):
+        """
+        Test that responses report their wall, database & template times.
+        """
+        self.client.login(username="testuser", password="password123")
+        response = self.client.get(reverse("notes:display_notes"))
+        timings = dict(
+            timing.split(";", 1) for timing in response["Server-Timing"].split(", ")
+        )
+        self.assertEqual(set(timings), {"total", "db", "template"})
+        # The session, the user, the archive version of the ETag,
+        # the page of notes & the department counts
+        self.assertIn('desc="5 queries (0 duplicates)"', timings["db"])
+        self.assertNotEqual(timings["template"], "dur=0.0")
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_off(self):
+        """
+        Test that the timings aren't sent to browsers when turned off.
+        """
+        response = self.client.get(reverse("notes:display_notes"))
+        self.assertNotIn("Server-Timing", response)
+
+    async def test_async_view_queries(self):
+        """
+        Test that the queries of async views, run in other threads,
+        are recorded.
+        """
+        response = await self.async_client.get(
+            reverse("notes:note", args=[self.note.id])
+        )
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries')
+
+    def test_unresolved_requests(self):
+        """
+        Test that requests not resolved to a view aren't measured.
+        """
+        response = self.client.get("/missing/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(
+        METRICS_QUERY_BUDGETS={"notes:display_notes": 0},
+        METRICS_ENFORCE_QUERY_BUDGETS=True,
+    )
+    def test_budget_enforced(self):
+        """
+        Test that requests over their view's query budget fail the tests.
+        """
+        with self.assertRaisesMessage(QueryBudgetExceeded, "over its budget of 0"):
+            self.client.get(reverse("notes:display_notes"))
+
+    @override_settings(
+        METRICS_QUERY_BUDGETS={"notes:display_notes": 0},
+        METRICS_ENFORCE_QUERY_BUDGETS=False,
+    )
+    def test_budget_logged(self):
+        """
+        Test that requests over their view's query budget are logged
+        outside the tests.
+        """
+        with self.assertLogs("metrics.middleware", "WARNING"):
+            response = self.client.get(reverse("notes:display_notes"))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,61 @@
+"""
+This module contains test cases for the following views:
+* metrics
+"""
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from .. import registry
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsViewTests(TestCase):
+    """
+    Test suite for the Prometheus metrics endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by clearing the collected metrics.
+        """
+        registry.reset()
+
+    def test_exposition(self):
+        """
+        Test that the per-view totals are exposed in the Prometheus format.
+        """
+        for _ in range(2):
+            self.client.get(reverse("notes:display_notes"))
+        response = self.client.get(
+            reverse("metrics:metrics"), headers={"authorization": "Bearer secret"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        view = 'view="notes:display_notes"'
+        self.assertContains(response, f"django_view_duration_seconds_count{{{view}}} 2")
+        self.assertContains(
+            response, f'django_view_duration_seconds_bucket{{{view},le="+Inf"}} 2'
+        )
+        self.assertContains(response, "# TYPE django_view_queries_total counter")
+        self.assertContains(response, f"django_view_queries_total{{{view}}} ")
+
+    def test_token_required(self):
+        """
+        Test that clients without the token can't read the metrics,
+        even from the local reverse proxy's address.
+        """
+        url = reverse("metrics:metrics")
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="127.0.0.1").status_code, 404)
+        response = self.client.get(url, headers={"authorization": "Bearer wrong"})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_no_token_in_production(self):
+        """
+        Test that the metrics are only served without a token while developing.
+        """
+        url = reverse("metrics:metrics")
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(url).status_code, 200)
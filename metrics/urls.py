@@ -0,0 +1,10 @@
+"""Defines URL patterns for metrics"""
+
+from django.urls import path
+from . import views
+
+app_name = "metrics"
+urlpatterns = [
+    # Prometheus metrics
+    path("", views.metrics, name="metrics"),
+]
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from .registry import exposition
+
+
+def metrics(request):
+    """
+    Return the per-view request metrics of this process, for Prometheus.
+    """
+    # Client addresses can't be trusted behind a reverse proxy
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get("Authorization", "")
+        if not constant_time_compare(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+            raise Http404
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(
+        exposition(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,5 +1,15 @@
 from django.contrib import admin
-from .models import Note, Comment
+from .models import Note, Comment, AttachmentText
+from .cache import cache_stats
 
-admin.site.register(Note)
+
+class NoteAdmin(admin.ModelAdmin):
+    def changelist_view(self, request, extra_context=None):
+        # Show the page cache hit/miss counters above the notes
+        extra_context = {**(extra_context or {}), "cache_stats": cache_stats()}
+        return super().changelist_view(request, extra_context)
+
+
+admin.site.register(Note, NoteAdmin)
 admin.site.register(Comment)
+admin.site.register(AttachmentText)
@@ -0,0 +1,218 @@
+"""
+Load generation & scenarios for benchmarks, see the benchmark_servers
+& run_benchmarks commands.
+
+Requests are sent by a fixed number of client threads, each over its own
+keep-alive connection, so runs are compared at the same concurrency.
+Scenarios build each request from the data seeded by the seed_archive
+command, and are sent either through the test client (in-process, without
+any server overhead) or over HTTP to a local server.
+"""
+
+import http.client
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+from django.urls import reverse
+from .models import DEPARTMENTS
+
+
+def percentile(latencies, percent):
+    """
+    Return the nearest-rank percentile of the sorted latencies.
+    """
+    if not latencies:
+        return 0.0
+    return latencies[max(0, math.ceil(len(latencies) * percent / 100) - 1)]
+
+
+def summarize(latencies, errors, elapsed):
+    """
+    Return the requests per second, the mean, p50, p90 & p99 latencies
+    in milliseconds, and the number of failed requests.
+    """
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50": percentile(latencies, 50) * 1000,
+        "p90": percentile(latencies, 90) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_requests(host, port, concurrency, requests, make_request):
+    """
+    Send `requests` requests, `concurrency` requests at a time, the i-th one
+    being the (method, path, body, headers) returned by make_request(i).
+    """
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+
+    def client():
+        latencies, errors = [], 0
+        connection = http.client.HTTPConnection(host, port)
+        while True:
+            with lock:
+                i = next(remaining, None)
+            if i is None:
+                break
+            method, path, body, headers = make_request(i)
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                errors += response.status >= 400
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+            latencies.append(time.perf_counter() - start)
+        connection.close()
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = [pool.submit(client) for _ in range(concurrency)]
+        results = [result.result() for result in results]
+    elapsed = time.perf_counter() - start
+
+    return summarize(
+        [latency for latencies, _ in results for latency in latencies],
+        sum(errors for _, errors in results),
+        elapsed,
+    )
+
+
+def run_load(url, concurrency, requests, headers=None):
+    """
+    GET the URL `requests` times, `concurrency` requests at a time.
+    """
+    parts = urlsplit(url)
+    path = f"{parts.path or '/'}{'?' + parts.query if parts.query else ''}"
+    request = ("GET", path, None, headers or {})
+    return run_requests(
+        parts.hostname, parts.port, concurrency, requests, lambda i: request
+    )
+
+
+def display_notes(data, i):
+    # Every other request filters the archive by a department
+    query = {"department": DEPARTMENTS[i % len(DEPARTMENTS)][0]} if i % 2 else {}
+    path = reverse("notes:display_notes")
+    return "GET", f"{path}?{urlencode(query)}" if query else path, None
+
+
+def note(data, i):
+    note_id = data["note_ids"][i % len(data["note_ids"])]
+    return "GET", reverse("notes:note", args=[note_id]), None
+
+
+def like_note(data, i):
+    # Like then unlike each note, so runs leave the counts as they were
+    note_id = data["note_ids"][i // 2 % len(data["note_ids"])]
+    liked = "false" if i % 2 else "true"
+    return "POST", reverse("notes:like_note", args=[note_id]), {"liked": liked}
+
+
+def new_note(data, i):
+    return (
+        "POST",
+        reverse("notes:new_note"),
+        {
+            "title": f"Benchmark note {i}",
+            "department": DEPARTMENTS[i % len(DEPARTMENTS)][0],
+            "subject": "Benchmarks",
+            "content": "<p>Written by the run_benchmarks command.</p>",
+        },
+    )
+
+
+def register(data, i):
+    username = f"bench-{data['run']}-{i}"
+    return (
+        "POST",
+        reverse("users:register"),
+        {
+            "username": username,
+            "email": f"{username}@uoi.gr",
+            "password1": "Benchmark-password-2024",
+            "password2": "Benchmark-password-2024",
+        },
+    )
+
+
+# Every scenario but register runs as the logged in user,
+# the one most costly to serve as the pages aren't cached for them
+SCENARIOS = {
+    "display_notes": display_notes,
+    "note": note,
+    "like_note": like_note,
+    "new_note": new_note,
+    "register": register,
+}
+
+
+def run_client(client, scenario, data, requests):
+    """
+    Send the scenario's requests one at a time through the test client.
+    """
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(requests):
+        method, path, body = SCENARIOS[scenario](data, i)
+        request_start = time.perf_counter()
+        if method == "POST":
+            response = client.post(path, body, HTTP_ACCEPT="application/json")
+        else:
+            response = client.get(path)
+        latencies.append(time.perf_counter() - request_start)
+        errors += response.status_code >= 400
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def run_http(host, port, scenario, data, concurrency, requests, cookies, csrf_token):
+    """
+    Send the scenario's requests over HTTP to a running server,
+    authenticated by the session & CSRF cookies.
+    """
+    cookie = "; ".join(f"{name}={value}" for name, value in cookies.items())
+
+    def make_request(i):
+        method, path, body = SCENARIOS[scenario](data, i)
+        headers = {"Cookie": cookie, "Accept": "application/json"}
+        if method == "POST":
+            body = urlencode(body)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            headers["X-CSRFToken"] = csrf_token
+        return method, path, body, headers
+
+    return run_requests(host, port, concurrency, requests, make_request)
+
+
+def compare(results, baseline, threshold):
+    """
+    Return the (scenario, transport, metric, before, after) regressions of
+    the results against the baseline report's, beyond the relative threshold.
+    """
+    before = {(r["scenario"], r["transport"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = before.get((result["scenario"], result["transport"]))
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(
+                (result["scenario"], result["transport"], "rps")
+                + (base["rps"], result["rps"])
+            )
+        if result["p99"] > base["p99"] * (1 + threshold):
+            regressions.append(
+                (result["scenario"], result["transport"], "p99")
+                + (base["p99"], result["p99"])
+            )
+    return regressions
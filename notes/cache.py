@@ -0,0 +1,219 @@
+"""
+Caching of rendered archive pages & note bodies, and the ETag/Last-Modified
+validators of conditional GET requests.
+
+Archive cache keys & ETags embed a version number, bumped by notes.signals
+whenever a note, comment or like changes, so stale entries are never read again
+and simply expire. The version is stored in the database, not the cache, which
+may be a per-process LocMemCache: a bump by one server worker must reach them
+all, or the others keep answering 304 for stale pages. Note bodies & ETags are
+keyed by the note's own timestamps instead. Hits & misses are counted in the
+cache itself, see the Note admin. The views reading the cache are async, so
+they use its async API.
+"""
+
+import time
+from functools import wraps
+from hashlib import md5
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, urlencode
+from .content import sanitize
+from .models import CacheVersion, Note
+
+ARCHIVE = "archive"
+NOTE_BODY = "note_body"
+
+
+async def _version(name):
+    version = (
+        await CacheVersion.objects.filter(name=name)
+        .values_list("version", flat=True)
+        .afirst()
+    )
+    return version or 1
+
+
+async def _archive_version(request):
+    # Read once per request, for both the ETag & the cache key
+    if not hasattr(request, "_archive_version"):
+        request._archive_version = await _version(ARCHIVE)
+    return request._archive_version
+
+
+def _bump_version(name):
+    # The time of the change: unlike a counter, never reused after a rollback
+    version = time.time_ns()
+    if not CacheVersion.objects.filter(name=name).update(version=version):
+        CacheVersion.objects.bulk_create(
+            [CacheVersion(name=name, version=version)], ignore_conflicts=True
+        )
+
+
+def invalidate_archive():
+    _bump_version(ARCHIVE)
+
+
+async def _count(name, hit):
+    key = f"notes:stats:{name}:{'hits' if hit else 'misses'}"
+    await cache.aadd(key, 0, timeout=None)
+    await cache.aincr(key)
+
+
+def cache_stats():
+    """
+    Return (name, hits, misses) of each cached view.
+    """
+    return [
+        (
+            name,
+            cache.get(f"notes:stats:{name}:hits", 0),
+            cache.get(f"notes:stats:{name}:misses", 0),
+        )
+        for name in (ARCHIVE, NOTE_BODY)
+    ]
+
+
+def cache_anonymous_page(view):
+    """
+    Serve anonymous GET requests of the (async) archive view from the cache,
+    keyed by the query parameters (department, search, page).
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # Pages with flash messages or user menus are rendered per request
+        user = await request.auser()
+        if (
+            request.method != "GET"
+            or user.is_authenticated
+            or messages.get_messages(request)
+        ):
+            return await view(request, *args, **kwargs)
+
+        params = urlencode(sorted(request.GET.lists()), doseq=True)
+        digest = md5(params.encode(), usedforsecurity=False).hexdigest()
+        key = f"notes:archive:{await _archive_version(request)}:{digest}"
+
+        content = await cache.aget(key)
+        await _count(ARCHIVE, content is not None)
+        if content is not None:
+            return HttpResponse(content)
+
+        response = await view(request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset(key, response.content, settings.NOTES_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
+
+
+async def render_note_body(note):
+    """
+    Return the rendered content of the note, cached per note version.
+    """
+    # Edits & render_notes both move updated_at
+    key = f"notes:note-body:{note.pk}:{note.updated_at.timestamp()}"
+    body = await cache.aget(key)
+    await _count(NOTE_BODY, body is not None)
+    if body is None:
+        # The note page doesn't load the content, only needed on a miss
+        rendered_content, content = await Note.objects.values_list(
+            "rendered_content", "content"
+        ).aget(pk=note.pk)
+        # Notes saved before content was pre-rendered, see render_notes
+        content = rendered_content or sanitize(content)
+        body = render_to_string("notes/note_body.html", {"content": content})
+        await cache.aset(key, body, settings.NOTES_CACHE_TIMEOUT)
+    return body
+
+
+def async_condition(etag_func=None, last_modified_func=None):
+    """
+    Like django.views.decorators.http.condition, for async views,
+    whose ETag & Last-Modified functions are async too.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = last_modified = None
+            if last_modified_func:
+                if dt := await last_modified_func(request, *args, **kwargs):
+                    last_modified = int(dt.timestamp())
+            if etag_func:
+                if etag := await etag_func(request, *args, **kwargs):
+                    etag = quote_etag(etag)
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = await view(request, *args, **kwargs)
+
+            if request.method in ("GET", "HEAD"):
+                if last_modified and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _digest(*parts):
+    return md5(":".join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+
+
+async def archive_etag(request):
+    """
+    Return the ETag of an archive page, None to always render it.
+    """
+    if messages.get_messages(request):
+        return None
+    user = await request.auser()
+    version = await _archive_version(request)
+    return _digest(version, user.pk, request.GET.urlencode())
+
+
+async def _note_changes(request, note_id):
+    # Loaded once per request, for both the ETag & the Last-Modified header.
+    # build_related_notes inserts new rows, so the highest id tells a rebuild
+    if not hasattr(request, "_note_changes"):
+        request._note_changes = (
+            await Note.objects.filter(pk=note_id)
+            .annotate(related=Max("related_notes__id"))
+            .values_list("updated_at", "activity_at", "related")
+            .afirst()
+        )
+    return request._note_changes
+
+
+async def note_etag(request, note_id):
+    """
+    Return the ETag of a note page, which varies per user
+    as the like & edit buttons do.
+    """
+    changes = await _note_changes(request, note_id)
+    if changes is None or messages.get_messages(request):
+        return None
+    user = await request.auser()
+    return _digest(note_id, *changes, user.pk)
+
+
+async def note_last_modified(request, note_id):
+    """
+    Return when the note, its comments or likes last changed.
+    """
+    changes = await _note_changes(request, note_id)
+    if changes is None or messages.get_messages(request):
+        return None
+    updated_at, activity_at, _ = changes
+    return max(updated_at, activity_at)
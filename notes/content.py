@@ -0,0 +1,178 @@
+"""
+Sanitizing & pre-rendering of the Summernote HTML content of notes.
+
+Content is cleaned once when a note is saved, so pages only output the stored
+result: tags & attributes are allowlisted, images are lazy-loaded, external
+links are opened safely and pasted (base64) images are moved to media files,
+resized & with a thumbnail (see notes.images).
+"""
+
+import base64
+import binascii
+import re
+import bleach
+from bleach.html5lib_shim import Filter
+from django.core.files.base import ContentFile
+from .images import InvalidImage, process_image
+from .storage import note_storage
+
+ALLOWED_TAGS = {
+    "a",
+    "b",
+    "blockquote",
+    "br",
+    "code",
+    "div",
+    "em",
+    "font",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "i",
+    "img",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "s",
+    "span",
+    "strike",
+    "strong",
+    "sub",
+    "sup",
+    "table",
+    "tbody",
+    "td",
+    "th",
+    "thead",
+    "tr",
+    "u",
+    "ul",
+}
+ALLOWED_ATTRIBUTES = {
+    "*": ["style"],
+    "a": ["href", "title", "target"],
+    "font": ["color", "face"],
+    "img": ["src", "srcset", "sizes", "alt", "title", "width", "height"],
+    "table": ["class"],
+    "td": ["colspan", "rowspan"],
+    "th": ["colspan", "rowspan"],
+}
+ALLOWED_STYLES = {
+    "background-color",
+    "color",
+    "float",
+    "font-family",
+    "font-size",
+    "font-style",
+    "font-weight",
+    "height",
+    "line-height",
+    "margin-left",
+    "text-align",
+    "text-decoration",
+    "width",
+}
+STYLE_VALUE_RE = re.compile(r"^[\w\s#%.,'\"()-]*$")
+
+DATA_IMAGE_RE = re.compile(
+    r"""src=(["'])data:image/(png|jpeg|gif|webp);base64,([A-Za-z0-9+/=\s]+)\1"""
+)
+IMAGE_DIRECTORY = "note_images/"
+THUMBNAIL_DIRECTORY = "note_images/thumbnails/"
+# Stripped tags keep their text, except for these
+SCRIPT_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.I | re.S)
+
+
+class StyleSanitizer:
+    """
+    Keep the allowlisted CSS declarations of style attributes,
+    without URLs or expressions.
+    """
+
+    def sanitize_css(self, style):
+        declarations = []
+        for declaration in style.split(";"):
+            name, _, value = declaration.partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if (
+                name in ALLOWED_STYLES
+                and value
+                and STYLE_VALUE_RE.match(value)
+                and not re.search(r"url|expression", value, re.I)
+            ):
+                declarations.append(f"{name}: {value}")
+        return "; ".join(declarations)
+
+
+class NormalizeFilter(Filter):
+    """
+    Lazy-load images & keep opened links from controlling the note's tab.
+    """
+
+    def __iter__(self):
+        for token in super().__iter__():
+            if token["type"] in ("StartTag", "EmptyTag"):
+                attributes = token["data"]
+                if token["name"] == "img":
+                    attributes[(None, "loading")] = "lazy"
+                    attributes[(None, "decoding")] = "async"
+                elif token["name"] == "a" and (None, "target") in attributes:
+                    attributes[(None, "rel")] = "noopener noreferrer"
+            yield token
+
+
+cleaner = bleach.Cleaner(
+    tags=ALLOWED_TAGS,
+    attributes=ALLOWED_ATTRIBUTES,
+    protocols={"http", "https", "mailto"},
+    strip=True,
+    css_sanitizer=StyleSanitizer(),
+    filters=[NormalizeFilter],
+)
+
+
+def _store(directory, data, extension):
+    name = note_storage.save(f"{directory}image.{extension}", ContentFile(data))
+    return note_storage.url(name)
+
+
+def _save_image(match):
+    quote = match.group(1)
+    try:
+        data = base64.b64decode(re.sub(r"\s", "", match.group(3)), validate=True)
+        image, thumbnail = process_image(data)
+    except (binascii.Error, InvalidImage):
+        # Drop broken images rather than keeping their data in the content
+        return f"src={quote}{quote}"
+
+    data, extension, width = image
+    url = _store(IMAGE_DIRECTORY, data, extension)
+    if thumbnail is None:
+        return f"src={quote}{url}{quote}"
+    # Small screens load the thumbnail instead
+    data, extension, thumbnail_width = thumbnail
+    thumbnail_url = _store(THUMBNAIL_DIRECTORY, data, extension)
+    return (
+        f"src={quote}{url}{quote} "
+        f"srcset={quote}{thumbnail_url} {thumbnail_width}w, {url} {width}w{quote} "
+        f"sizes={quote}(max-width: {thumbnail_width}px) 100vw, {width}px{quote}"
+    )
+
+
+def extract_inline_images(html):
+    """
+    Return the HTML with its base64 images saved to media files.
+    """
+    return DATA_IMAGE_RE.sub(_save_image, html)
+
+
+def sanitize(html):
+    """
+    Return the allowlisted & normalized HTML, ready to be output as is.
+    """
+    return cleaner.clean(SCRIPT_RE.sub("", html))
@@ -0,0 +1,130 @@
+"""
+Background deletion of notes & accounts.
+
+Deleting in the request would collect every comment & like of a note, or
+every note of an account, in Python, taking seconds for prolific users.
+Instead deleted notes are only marked (which hides them) & deleted accounts
+deactivated, and the purge_deleted command deletes their rows in bounded
+batches, each in its own transaction, so a crashed worker resumes where
+it stopped.
+
+Comments & likes are deleted with plain DELETE statements, without loading
+them or sending signals, and the counters of the notes they were on are
+recomputed instead. Notes & accounts are deleted last, once little references
+them, sending the signals releasing their files, and invalidating the cache
+once per batch.
+"""
+
+from functools import partial
+from django.contrib.auth.models import User
+from django.db import transaction
+from users.models import AccountDeletion
+from .cache import invalidate_archive
+from .models import Comment, CommentNotification, Note
+from .signals import actual_counts, deleting_notes, hide_notes
+
+Like = Note.likes.through
+
+
+def schedule_note_deletion(notes):
+    """
+    Hide the notes at once, until the purge_deleted command deletes them.
+    """
+    hide_notes(notes)
+
+
+def _raw_delete(queryset):
+    # A single DELETE, without collecting related rows or sending signals
+    return queryset._raw_delete(queryset.db)
+
+
+def _recount(note_ids):
+    # Notes pending deletion aren't shown, so aren't recounted
+    counts = actual_counts()
+    Note.objects.filter(pk__in=note_ids).update(
+        like_count=counts["actual_likes"], comment_count=counts["actual_comments"]
+    )
+    invalidate_archive()
+
+
+def _delete_comments(comments, batch_size):
+    rows = list(comments.order_by("pk").values_list("pk", "note_id")[:batch_size])
+    if not rows:
+        return 0
+    ids = [pk for pk, _ in rows]
+    _raw_delete(CommentNotification.objects.filter(comment_id__in=ids))
+    deleted = _raw_delete(Comment.objects.filter(pk__in=ids))
+    _recount({note_id for _, note_id in rows})
+    return deleted
+
+
+def _delete_likes(likes, batch_size):
+    rows = list(likes.order_by("pk").values_list("pk", "note_id")[:batch_size])
+    if not rows:
+        return 0
+    deleted = _raw_delete(Like.objects.filter(pk__in=[pk for pk, _ in rows]))
+    _recount({note_id for _, note_id in rows})
+    return deleted
+
+
+def _delete_notes(batch_size):
+    notes = Note.all_objects.filter(deleted_at__isnull=False).order_by("pk")
+    ids = list(notes.values_list("pk", flat=True)[:batch_size])
+    # Releases their files, see notes.signals, & invalidates the cache once
+    with deleting_notes():
+        Note.all_objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def _delete_accounts(batch_size):
+    accounts = AccountDeletion.objects.order_by("pk")
+    ids = list(accounts.values_list("pk", flat=True)[:batch_size])
+    # Along with their last rows, e.g. their notification settings
+    User.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def pending_deletions():
+    """
+    Return the number of notes & accounts waiting to be purged.
+    """
+    return (
+        Note.all_objects.filter(deleted_at__isnull=False).count(),
+        AccountDeletion.objects.count(),
+    )
+
+
+def purge_batch(batch_size=1000):
+    """
+    Delete the next batch of rows of deleted notes & accounts.
+    Return the (number, description) of the deleted rows, None once done.
+    """
+    deleted_users = AccountDeletion.objects.values("pk")
+    stages = (
+        (
+            "comment(s) on deleted notes",
+            partial(
+                _delete_comments, Comment.objects.filter(note__deleted_at__isnull=False)
+            ),
+        ),
+        (
+            "like(s) of deleted notes",
+            partial(_delete_likes, Like.objects.filter(note__deleted_at__isnull=False)),
+        ),
+        (
+            "comment(s) of deleted accounts",
+            partial(_delete_comments, Comment.objects.filter(user__in=deleted_users)),
+        ),
+        (
+            "like(s) of deleted accounts",
+            partial(_delete_likes, Like.objects.filter(user__in=deleted_users)),
+        ),
+        ("deleted note(s)", _delete_notes),
+        ("deleted account(s)", _delete_accounts),
+    )
+    for description, delete in stages:
+        with transaction.atomic():
+            deleted = delete(batch_size)
+        if deleted:
+            return deleted, description
+    return None
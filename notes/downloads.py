@@ -0,0 +1,120 @@
+"""
+Streaming of note attachments, with byte-range requests for resumable
+downloads and an optional hand-off to the front-end server
+(nginx X-Accel-Redirect or Apache/lighttpd X-Sendfile).
+"""
+
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import (
+    content_disposition_header,
+    http_date,
+    parse_http_date_safe,
+    quote_etag,
+)
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """
+    Return the (start, end) inclusive offsets of a single byte range,
+    None if the header is missing or unsupported (e.g. multiple ranges),
+    or False if the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range, the last N bytes
+        length = int(end)
+        # An empty file has no last bytes to send
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', "W/")):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def _read_range(file, start, end, chunk_size):
+    with file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, fieldfile, etag, last_modified, filename=None):
+    """
+    Return a response streaming the file (or the requested range of it),
+    as an attachment named filename (the stored file's name by default).
+    """
+    filename = filename or os.path.basename(fieldfile.name)
+    disposition = content_disposition_header(True, filename)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    etag = quote_etag(etag)
+    last_modified = last_modified.timestamp()
+
+    server = settings.NOTES_DOWNLOAD_SERVER
+    if server:
+        # The front-end server streams the file & handles ranges itself
+        response = HttpResponse(content_type=content_type)
+        if server == "x-accel-redirect":
+            location = settings.NOTES_DOWNLOAD_ACCEL_PREFIX + fieldfile.name
+            response["X-Accel-Redirect"] = location
+        else:
+            response["X-Sendfile"] = fieldfile.path
+        response["Content-Disposition"] = disposition
+        return response
+
+    size = fieldfile.size
+    byte_range = None
+    if _if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(request.headers.get("Range"), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    chunk_size = settings.NOTES_DOWNLOAD_CHUNK_SIZE
+    if byte_range is None:
+        response = FileResponse(
+            fieldfile.open("rb"), as_attachment=True, filename=filename
+        )
+        response.block_size = chunk_size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(fieldfile.open("rb"), start, end, chunk_size),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Disposition"] = disposition
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
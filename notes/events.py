@@ -0,0 +1,235 @@
+"""
+Live updates of note pages, pushed to their readers as server-sent events.
+
+New comments & like counts are published to the note's channel once committed,
+and the broker fans them out to the readers connected to it. Each reader has
+a bounded queue: readers too slow to keep up are disconnected instead of
+buffering without bound, and their browser reconnects.
+
+The default LocalBroker only reaches readers connected to the same process.
+Set NOTES_EVENTS_BROKER to a broker backed by a shared pub/sub (e.g. Redis,
+PostgreSQL LISTEN/NOTIFY) to run several workers, with the same methods.
+
+Under ASGI, streams are served by events_application, around Django's handler
+rather than through it: the handler runs the sync request signals & database
+queries of a request in a thread of its own, kept until the response ends,
+i.e. a thread per open stream. Outside of it, a stream only holds a coroutine
+in the event loop, cancelled once the client disconnects, which unsubscribes
+its reader. The note_events view serves the same streams to the test client.
+Changes of notes nobody reads are neither rendered nor published.
+"""
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.template.loader import render_to_string
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+from .models import Note
+
+
+class Subscription:
+    """
+    The events of a channel, queued for a single reader.
+    """
+
+    def __init__(self, maxsize):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = False
+
+    def put(self, event):
+        # Runs in the reader's event loop
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow a reader, drop its backlog & disconnect it
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        """
+        Return the next (event, data) pair, None once the reader was dropped.
+        """
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """
+    Fan events out to the readers connected to this process.
+    """
+
+    def __init__(self):
+        self.channels = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """
+        Return a new subscription to the channel, from an event loop.
+        """
+        subscription = Subscription(settings.NOTES_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self.lock:
+            self.channels[channel].discard(subscription)
+            if not self.channels[channel]:
+                del self.channels[channel]
+
+    def has_readers(self, channel=None):
+        """
+        Return whether the channel, or any channel by default, has readers.
+        """
+        with self.lock:
+            return bool(self.channels.get(channel) if channel else self.channels)
+
+    def publish(self, channel, event, data):
+        """
+        Send the event to the channel's readers, from any thread.
+        """
+        with self.lock:
+            subscriptions = list(self.channels.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, (event, data))
+            except RuntimeError:
+                # The reader's event loop was closed
+                self.unsubscribe(channel, subscription)
+
+
+@cache
+def get_broker():
+    return import_string(settings.NOTES_EVENTS_BROKER)()
+
+
+def note_channel(note_id):
+    return f"note:{note_id}"
+
+
+def publish_comment(comment):
+    broker = get_broker()
+    channel = note_channel(comment.note_id)
+    if not broker.has_readers(channel):
+        return
+    html = render_to_string("notes/comment.html", {"comment": comment})
+    broker.publish(channel, "comment", {"id": comment.pk, "html": html})
+
+
+def publish_like_counts(note_ids):
+    broker = get_broker()
+    if not broker.has_readers():
+        return
+    notes = Note.objects.filter(pk__in=note_ids)
+    for note_id, like_count in notes.values_list("pk", "like_count"):
+        broker.publish(note_channel(note_id), "likes", {"like_count": like_count})
+
+
+async def event_stream(note_id):
+    """
+    Yield the events of the note as server-sent event chunks,
+    with keep-alive comments while there are none.
+    """
+    broker = get_broker()
+    channel = note_channel(note_id)
+    subscription = broker.subscribe(channel)
+    try:
+        # Wait a little before reconnecting after a drop
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                item = await asyncio.wait_for(
+                    subscription.get(), settings.NOTES_EVENTS_KEEPALIVE
+                )
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            event, data = item
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+    finally:
+        broker.unsubscribe(channel, subscription)
+
+
+EVENT_STREAM_HEADERS = {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    # Don't let nginx buffer the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def _note_exists(note_id):
+    # No request_finished signal closes the connection of streams
+    try:
+        return Note.objects.filter(pk=note_id).exists()
+    finally:
+        connection.close()
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def serve_events(note_id, receive, send):
+    """
+    Stream the events of the note over the ASGI connection.
+    """
+    if not await sync_to_async(_note_exists)(note_id):
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    headers = [
+        (name.encode(), value.encode()) for name, value in EVENT_STREAM_HEADERS.items()
+    ]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+
+    async def stream():
+        async for chunk in event_stream(note_id):
+            # Waits while the client's socket buffer is full, so slow
+            # readers fill their queue & get dropped
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    tasks = {
+        asyncio.create_task(stream()),
+        asyncio.create_task(_wait_for_disconnect(receive)),
+    }
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Stops the stream once the client is gone, which unsubscribes it
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def events_application(application):
+    """
+    Wrap the Django ASGI application, serving the note_events URLs directly.
+    """
+
+    async def app(scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            try:
+                match = resolve(scope["path"])
+            except Resolver404:
+                match = None
+            if match and match.view_name == "notes:note_events":
+                return await serve_events(match.kwargs["note_id"], receive, send)
+        return await application(scope, receive, send)
+
+    return app
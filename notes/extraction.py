@@ -0,0 +1,169 @@
+"""
+Background text extraction of note attachments, for search.
+
+Notes queue their file when it's uploaded or replaced (see notes.signals).
+The extract_attachments command claims pending files batch by batch & parses
+them in a pool of worker processes, each limited in time & memory
+(see notes.parsers). Files shared by several notes are only parsed once.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from multiprocessing import get_context
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .cache import invalidate_archive
+from .models import AttachmentText, Note
+from .parsers import UnsupportedFile, extract_text_with_timeout, limit_resources
+from .search import update_search_vector
+from .storage import note_storage
+
+
+def claim_attachments(batch_size):
+    """
+    Mark up to batch_size files due for extraction as claimed by this worker.
+    Rows locked by other workers are skipped, stale claims are taken over.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.NOTES_EXTRACTION_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        attachments = list(
+            AttachmentText.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=AttachmentText.PENDING, next_attempt_at__lte=now)
+                | Q(status=AttachmentText.PROCESSING, claimed_at__lt=stale)
+            )
+            .order_by("next_attempt_at", "note_id")[:batch_size]
+        )
+        AttachmentText.objects.filter(
+            pk__in=[attachment.pk for attachment in attachments]
+        ).update(
+            status=AttachmentText.PROCESSING,
+            claimed_at=now,
+            attempts=F("attempts") + 1,
+        )
+    for attachment in attachments:
+        attachment.attempts += 1
+    return attachments
+
+
+def _finish(attachment, status, text="", error=""):
+    # Skip files replaced while they were being extracted
+    updated = AttachmentText.objects.filter(
+        pk=attachment.pk, file=attachment.file
+    ).update(
+        status=status,
+        text=text,
+        last_error=error,
+        claimed_at=None,
+        extracted_at=timezone.now(),
+    )
+    if updated and status == AttachmentText.DONE:
+        note = Note.objects.filter(pk=attachment.pk).first()
+        if note:
+            update_search_vector(note)
+    return bool(updated)
+
+
+def _retry_later(attachment, error):
+    if attachment.attempts >= settings.NOTES_EXTRACTION_MAX_ATTEMPTS:
+        _finish(attachment, AttachmentText.FAILED, error=repr(error))
+    else:
+        delay = settings.NOTES_EXTRACTION_RETRY_DELAY * 2 ** (attachment.attempts - 1)
+        AttachmentText.objects.filter(pk=attachment.pk, file=attachment.file).update(
+            status=AttachmentText.PENDING,
+            next_attempt_at=timezone.now() + timedelta(seconds=delay),
+            claimed_at=None,
+            last_error=repr(error),
+        )
+
+
+def _parse_files(files, workers):
+    # Return {file: (status, text)}, or (None, error) for files to retry
+    results = {}
+    timeout = settings.NOTES_EXTRACTION_TIMEOUT
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        # Fresh processes, limits apply to a single file & nothing leaks
+        mp_context=get_context("spawn"),
+        max_tasks_per_child=1,
+        initializer=limit_resources,
+        initargs=(settings.NOTES_EXTRACTION_MEMORY_LIMIT, timeout),
+    ) as executor:
+        futures = {
+            file: executor.submit(
+                extract_text_with_timeout,
+                note_storage.path(file),
+                settings.NOTES_EXTRACTION_MAX_CHARS,
+                timeout,
+            )
+            for file in files
+        }
+        for file, future in futures.items():
+            try:
+                results[file] = (AttachmentText.DONE, future.result())
+            except UnsupportedFile:
+                results[file] = (AttachmentText.UNSUPPORTED, "")
+            except Exception as e:
+                # Timeouts, memory errors, missing files & crashed workers
+                results[file] = (None, e)
+    return results
+
+
+def extract_attachments(attachments, workers=1):
+    """
+    Extract the text of the claimed files in a pool of worker processes.
+    Return the number of notes whose text was extracted.
+    """
+    by_file = defaultdict(list)
+    for attachment in attachments:
+        by_file[attachment.file].append(attachment)
+
+    # Files already extracted for another note
+    results = {
+        file: (AttachmentText.DONE, text)
+        for file, text in AttachmentText.objects.filter(
+            file__in=by_file, status=AttachmentText.DONE
+        ).values_list("file", "text")
+    }
+
+    pending = [file for file in by_file if file not in results]
+    if pending:
+        results.update(_parse_files(pending, workers))
+        # A crashed worker breaks the pool, failing all the files left with
+        # it. Parse those one per pool, so only the crashing file is retried
+        broken = [
+            file
+            for file, (status, result) in results.items()
+            if isinstance(result, BrokenProcessPool)
+        ]
+        if len(broken) > 1:
+            for file in broken:
+                results.update(_parse_files([file], 1))
+
+    extracted = 0
+    for file, (status, result) in results.items():
+        for attachment in by_file[file]:
+            if status is None:
+                _retry_later(attachment, result)
+            elif _finish(attachment, status, text=result):
+                extracted += status == AttachmentText.DONE
+    return extracted
+
+
+def process_queue(batch_size=20, workers=1):
+    """
+    Extract pending files batch by batch until none are due.
+    Return the number of notes whose text was extracted.
+    """
+    total = 0
+    while attachments := claim_attachments(batch_size):
+        total += extract_attachments(attachments, workers)
+    if total:
+        # Archive search results include the new text
+        invalidate_archive()
+    return total
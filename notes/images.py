@@ -0,0 +1,64 @@
+"""
+Resizing & recompression of images pasted in note content, see notes.content.
+"""
+
+from io import BytesIO
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def _encode(image):
+    """
+    Return the image compressed as JPEG, or PNG if it has transparency,
+    with its file extension.
+    """
+    output = BytesIO()
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image.save(output, "PNG", optimize=True)
+        return output.getvalue(), "png"
+    image.convert("RGB").save(
+        output,
+        "JPEG",
+        quality=settings.NOTES_IMAGE_QUALITY,
+        optimize=True,
+        progressive=True,
+    )
+    return output.getvalue(), "jpeg"
+
+
+def process_image(data):
+    """
+    Return the image & its thumbnail (None if the image is small enough)
+    as (bytes, extension, width) tuples. The image is shrunk to fit
+    NOTES_IMAGE_MAX_SIZE & recompressed, unless that would make it larger.
+    Raise InvalidImage if the data can't be decoded.
+    """
+    try:
+        image = Image.open(BytesIO(data))
+        image_format = image.format.lower()
+        if getattr(image, "is_animated", False):
+            # Keep animations as they are
+            return (data, image_format, image.width), None
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImage from e
+    image = ImageOps.exif_transpose(image)
+
+    max_size = settings.NOTES_IMAGE_MAX_SIZE
+    resized = image.width > max_size or image.height > max_size
+    if resized:
+        image.thumbnail((max_size, max_size))
+    encoded, extension = _encode(image)
+    if not resized and len(encoded) >= len(data):
+        encoded, extension = data, image_format
+    full = (encoded, extension, image.width)
+
+    thumbnail_width = settings.NOTES_IMAGE_THUMBNAIL_WIDTH
+    if image.width <= thumbnail_width:
+        return full, None
+    image.thumbnail((thumbnail_width, image.height))
+    return full, (*_encode(image), image.width)
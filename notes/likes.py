@@ -0,0 +1,43 @@
+"""
+Liking & unliking notes in a single statement each.
+
+Likes are inserted with INSERT ... ON CONFLICT DO NOTHING & removed with a
+plain DELETE, so concurrent (e.g. double-clicked) requests can't insert
+a like twice, and the counter only moves for the request that changed a row.
+"""
+
+from django.db import connection, transaction
+from .cache import invalidate_archive
+from .models import Note
+from .signals import move_like_counter
+
+Like = Note.likes.through
+
+
+def _insert_like(note_id, user_id):
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(Like._meta.db_table)} "
+            f"({quote('note_id')}, {quote('user_id')}) VALUES (%s, %s) "
+            f"ON CONFLICT DO NOTHING RETURNING {quote('id')}",
+            [note_id, user_id],
+        )
+        return cursor.fetchone() is not None
+
+
+def set_like(note_id, user_id, liked):
+    """
+    Make the user like (or unlike) the note, whatever its current state.
+    Return the note's like count.
+    """
+    with transaction.atomic():
+        if liked:
+            changed = _insert_like(note_id, user_id)
+        else:
+            changed, _ = Like.objects.filter(note_id=note_id, user_id=user_id).delete()
+        if changed:
+            move_like_counter(Note.objects.filter(pk=note_id), 1 if liked else -1)
+            # The archive shows like counts
+            invalidate_archive()
+        return Note.objects.values_list("like_count", flat=True).get(pk=note_id)
@@ -0,0 +1,124 @@
+import socket
+import subprocess
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from notes.benchmarks import run_load
+
+
+def server_command(server, host, port, workers, threads):
+    """
+    Return the command running the project under the WSGI or ASGI server.
+    """
+    if server == "wsgi":
+        # Threaded workers, as a sync worker would serve 1 request at a time
+        return [sys.executable, "-m", "gunicorn", "main.wsgi:application"] + [
+            f"--bind={host}:{port}",
+            f"--workers={workers}",
+            "--worker-class=gthread",
+            f"--threads={threads}",
+        ]
+    return [sys.executable, "-m", "uvicorn", "main.asgi:application"] + [
+        f"--host={host}",
+        f"--port={port}",
+        f"--workers={workers}",
+        "--no-access-log",
+    ]
+
+
+def wait_for_port(host, port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"The server exited with code {process.returncode}.")
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"The server didn't listen on port {port} in {timeout}s.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the requests per second & p99 latency of the notes views "
+        "served by gunicorn (WSGI) & uvicorn (ASGI), at a fixed concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path requested, can be repeated (default: the archive).",
+        )
+        parser.add_argument(
+            "--server",
+            action="append",
+            dest="servers",
+            choices=["wsgi", "asgi"],
+            help="Server benchmarked, can be repeated (default: both).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of requests in flight at once.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Number of requests sent per path.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=100,
+            help="Number of requests sent per path before measuring.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Number of server worker processes.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Number of threads per WSGI worker process.",
+        )
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **options):
+        host, port = options["host"], options["port"]
+        paths = options["paths"] or ["/"]
+
+        self.stdout.write(
+            f"{'server':<6} {'path':<30} {'req/s':>9} {'p50 ms':>9} "
+            f"{'p99 ms':>9} {'errors':>7}"
+        )
+        for server in options["servers"] or ["wsgi", "asgi"]:
+            process = subprocess.Popen(
+                server_command(
+                    server, host, port, options["workers"], options["threads"]
+                ),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(host, port, process)
+                for path in paths:
+                    url = f"http://{host}:{port}{path}"
+                    run_load(url, options["concurrency"], options["warmup"])
+                    result = run_load(url, options["concurrency"], options["requests"])
+                    self.stdout.write(
+                        f"{server:<6} {path:<30} {result['rps']:>9.1f} "
+                        f"{result['p50']:>9.1f} {result['p99']:>9.1f} "
+                        f"{result['errors']:>7}"
+                    )
+            finally:
+                process.terminate()
+                process.wait()
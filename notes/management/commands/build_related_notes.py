@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from notes.related import build_related_notes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the related notes shown on each note page, from the "
+        "similarity of the notes of each department & subject."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=5,
+            help="Number of related notes per note.",
+        )
+        parser.add_argument(
+            "--max-terms",
+            type=int,
+            default=100,
+            help="Number of heaviest terms kept per note vector.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows to insert per INSERT statement.",
+        )
+
+    def handle(self, *args, **options):
+        total = build_related_notes(
+            options["count"], options["max_terms"], options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Stored {total} related note(s)."))
@@ -0,0 +1,57 @@
+import os
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from notes.models import AttachmentText, Note
+from notes.storage import is_blob, note_storage
+
+
+class Command(BaseCommand):
+    help = "Move note files uploaded before deduplication into the content-addressed layout."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report files to move, don't move them.",
+        )
+
+    def handle(self, *args, **options):
+        # Hidden notes pending purge too, or they'd keep the deleted file
+        names = (
+            Note.all_objects.exclude(file="")
+            .exclude(file=None)
+            .order_by("file")
+            .values_list("file", flat=True)
+            .distinct()
+        )
+        moved = missing = 0
+        for name in list(names):
+            if is_blob(name):
+                continue
+            if not note_storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Missing file: {name}")
+                continue
+            moved += 1
+            if options["dry_run"]:
+                continue
+
+            with note_storage.open(name) as file:
+                blob = note_storage.save(name, file)
+            with transaction.atomic():
+                # Keep the name it was uploaded with for downloads
+                Note.all_objects.filter(file=name, file_name="").update(
+                    file_name=os.path.basename(name)
+                )
+                Note.all_objects.filter(file=name).update(file=blob)
+                # Same content, its extracted text still applies
+                AttachmentText.objects.filter(file=name).update(file=blob)
+            note_storage.delete(name)
+
+        if options["dry_run"]:
+            message = f"Found {moved} file(s) to deduplicate."
+        else:
+            message = f"Deduplicated {moved} file(s)."
+        self.stdout.write(self.style.SUCCESS(message))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} file(s) are missing."))
@@ -0,0 +1,55 @@
+from datetime import date, datetime, time, timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from notes.models import DEPARTMENTS, Note
+from notes.transfer import export_archive
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        "Export notes, along with their comments, likes & files, to a zip archive "
+        "read by the import_notes command."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the zip archive written.")
+        parser.add_argument(
+            "--department",
+            action="append",
+            dest="departments",
+            choices=[department for department, _ in DEPARTMENTS],
+            help="Only export notes of the department, can be repeated.",
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Only export notes posted on or after the date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Only export notes posted on or before the date (YYYY-MM-DD).",
+        )
+
+    def handle(self, *args, **options):
+        notes = Note.objects.all()
+        if options["departments"]:
+            notes = notes.filter(department__in=options["departments"])
+        if options["since"]:
+            notes = notes.filter(timestamp__gte=start_of_day(options["since"]))
+        if options["until"]:
+            next_day = options["until"] + timedelta(days=1)
+            notes = notes.filter(timestamp__lt=start_of_day(next_day))
+
+        counts = export_archive(options["output"], notes)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {counts['notes']} note(s), {counts['comments']} comment(s), "
+                f"{counts['likes']} like(s), {counts['files']} file(s) & "
+                f"{counts['users']} user(s) to {options['output']}."
+            )
+        )
@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand
+from notes.extraction import process_queue
+
+
+class Command(BaseCommand):
+    help = "Extract the text of uploaded note files, so it can be searched."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Number of worker processes parsing files concurrently.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Number of files claimed at once.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new files instead of exiting once done.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="Seconds to wait between polls with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            extracted = process_queue(options["batch_size"], options["workers"])
+            if extracted or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Extracted text from {extracted} file(s).")
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
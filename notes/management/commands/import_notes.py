@@ -0,0 +1,32 @@
+from zipfile import BadZipFile
+from django.core.management.base import BaseCommand, CommandError
+from notes.transfer import ArchiveError, import_archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the notes, comments, likes, files & users of a zip archive "
+        "written by the export_notes command."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archive", help="Path of the zip archive read.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows to insert per INSERT statement.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            counts = import_archive(options["archive"], options["batch_size"])
+        except (ArchiveError, BadZipFile, FileNotFoundError) as e:
+            raise CommandError(e)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {counts['notes']} note(s), {counts['comments']} comment(s), "
+                f"{counts['likes']} like(s), {counts['files']} file(s) & "
+                f"{counts['users']} new user(s)."
+            )
+        )
@@ -0,0 +1,46 @@
+import time
+from django.core.management.base import BaseCommand
+from notes.deletion import pending_deletions, purge_batch
+
+
+class Command(BaseCommand):
+    help = "Delete the notes & accounts deleted by their users, batch by batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows to delete per DELETE statement.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new deletions instead of exiting once done.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="Seconds to wait between polls with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            notes, accounts = pending_deletions()
+            if notes or accounts or not options["loop"]:
+                self.stdout.write(f"Purging {notes} note(s) & {accounts} account(s).")
+            # Every batch is committed on its own, an interrupted purge
+            # resumes from the rows left
+            while deleted := purge_batch(options["batch_size"]):
+                count, description = deleted
+                self.stdout.write(f"Deleted {count} {description}.")
+            if notes or accounts or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Purged {notes} note(s) & {accounts} account(s)."
+                    )
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
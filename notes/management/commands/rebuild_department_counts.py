@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from notes.cache import invalidate_archive
+from notes.models import DEPARTMENTS, DepartmentCount, Note
+
+
+class Command(BaseCommand):
+    help = "Recount the notes of each department, shown by the archive's dropdown."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Writers moving the counts wait for the recount
+            list(DepartmentCount.objects.select_for_update())
+            counts = dict(
+                Note.objects.order_by().values_list("department").annotate(Count("pk"))
+            )
+            DepartmentCount.objects.all().delete()
+            DepartmentCount.objects.bulk_create(
+                DepartmentCount(department=department, count=counts.get(department, 0))
+                for department, _ in DEPARTMENTS
+            )
+        invalidate_archive()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Counted {sum(counts.values())} note(s) in {len(counts)} department(s)."
+            )
+        )
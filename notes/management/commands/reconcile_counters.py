@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from notes.models import Note
+from notes.signals import actual_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute like & comment counters on notes that have drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of notes to fix per UPDATE statement.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted notes, don't fix them.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        drifted = list(
+            Note.objects.annotate(**actual_counts())
+            .filter(
+                ~Q(like_count=F("actual_likes"))
+                | ~Q(comment_count=F("actual_comments"))
+            )
+            .values_list("pk", flat=True)
+        )
+
+        if not options["dry_run"]:
+            for i in range(0, len(drifted), batch_size):
+                counts = actual_counts()
+                Note.objects.filter(pk__in=drifted[i : i + batch_size]).update(
+                    like_count=counts["actual_likes"],
+                    comment_count=counts["actual_comments"],
+                )
+
+        verb = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drifted)} drifted note(s)."))
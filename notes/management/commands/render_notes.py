@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from notes.cache import invalidate_archive
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = "Sanitize & pre-render the content of notes saved before it was stored."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of notes rendered per UPDATE statement.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render every note again, e.g. after changing the allowed tags.",
+        )
+        parser.add_argument(
+            "--inline-images",
+            action="store_true",
+            help="Render the notes with pasted (base64) images, to move them to files.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        notes = Note.objects.only("content").order_by("pk")
+        if options["inline_images"]:
+            notes = notes.filter(content__contains="data:image/")
+        elif not options["all"]:
+            notes = notes.filter(rendered_content="")
+
+        rendered, last_pk = 0, 0
+        while batch := list(notes.filter(pk__gt=last_pk)[:batch_size]):
+            now = timezone.now()
+            for note in batch:
+                note.render_content()
+                # Changes the page's ETag & cached body, so the old ones aren't reused
+                note.updated_at = now
+            Note.objects.bulk_update(
+                batch, ["content", "rendered_content", "updated_at"]
+            )
+            rendered += len(batch)
+            last_pk = batch[-1].pk
+
+        if rendered:
+            invalidate_archive()
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} note(s)."))
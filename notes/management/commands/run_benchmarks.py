@@ -0,0 +1,200 @@
+import json
+import subprocess
+import threading
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    get_internal_wsgi_application,
+)
+from django.db import connection
+from django.test import Client
+from django.test.testcases import QuietWSGIRequestHandler
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from notes.benchmarks import SCENARIOS, compare, run_client, run_http
+from notes.models import Comment, Note
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the benchmark scenarios against the seeded database (see the "
+        "seed_archive command) through the test client & a local HTTP server, "
+        "and report their throughput & latency percentiles as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            choices=list(SCENARIOS),
+            help="Scenario run, can be repeated (default: all).",
+        )
+        parser.add_argument(
+            "--transport",
+            action="append",
+            dest="transports",
+            choices=["client", "http"],
+            help="How requests are sent, can be repeated (default: both).",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Number of requests sent per scenario.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=20,
+            help="Number of requests sent per scenario before measuring.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Number of HTTP requests in flight at once.",
+        )
+        parser.add_argument("--output", help="File the JSON report is written to.")
+        parser.add_argument(
+            "--compare",
+            help="Report of a previous run, e.g. of the base commit, to compare with.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative drop in req/s or rise in p99 latency failing the comparison.",
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_superuser=False).order_by("pk").first()
+        note_ids = list(Note.objects.order_by("pk").values_list("pk", flat=True)[:1000])
+        if user is None or not note_ids:
+            raise CommandError("Seed the database first, see the seed_archive command.")
+        data = {"note_ids": note_ids}
+
+        # Runs as the same user over both transports
+        client = Client(HTTP_HOST="localhost")
+        client.force_login(user)
+
+        results = []
+        self.stdout.write(
+            f"{'scenario':<15} {'transport':<9} {'req/s':>9} {'mean ms':>9} "
+            f"{'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'errors':>7}"
+        )
+        for transport in options["transports"] or ["client", "http"]:
+            if transport == "client":
+                run = self.client_runner(client, data)
+            else:
+                run = self.http_runner(client, data, options["concurrency"])
+            try:
+                for scenario in options["scenarios"] or list(SCENARIOS):
+                    run(scenario, options["warmup"])
+                    result = run(scenario, options["requests"])
+                    results.append(
+                        {"scenario": scenario, "transport": transport}
+                        | {key: round(value, 3) for key, value in result.items()}
+                    )
+                    self.write_result(results[-1])
+            finally:
+                if hasattr(run, "close"):
+                    run.close()
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "commit": current_commit(),
+            "database": connection.vendor,
+            "counts": {
+                "users": User.objects.count(),
+                "notes": Note.objects.count(),
+                "comments": Comment.objects.count(),
+                "likes": Note.likes.through.objects.count(),
+            },
+            "options": {
+                key: options[key] for key in ("requests", "warmup", "concurrency")
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+            regressions = compare(results, baseline, options["threshold"])
+            for scenario, transport, metric, before, after in regressions:
+                self.stderr.write(
+                    f"{scenario} ({transport}): {metric} {before:.1f} -> {after:.1f}"
+                )
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} regression(s) against {options['compare']}."
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f"No regressions against {options['compare']}.")
+            )
+
+    def write_result(self, result):
+        self.stdout.write(
+            f"{result['scenario']:<15} {result['transport']:<9} "
+            f"{result['rps']:>9.1f} {result['mean']:>9.1f} {result['p50']:>9.1f} "
+            f"{result['p90']:>9.1f} {result['p99']:>9.1f} {result['errors']:>7}"
+        )
+
+    def client_runner(self, client, data):
+        def run(scenario, requests):
+            # Each run registers its own usernames
+            run_data = data | {"run": get_random_string(8).lower()}
+            return run_client(client, scenario, run_data, requests)
+
+        return run
+
+    def http_runner(self, client, data, concurrency):
+        server = ThreadedWSGIServer(("127.0.0.1", 0), QuietWSGIRequestHandler)
+        server.set_app(get_internal_wsgi_application())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        csrf_token = get_random_string(32)
+        cookies = {
+            settings.SESSION_COOKIE_NAME: client.cookies[
+                settings.SESSION_COOKIE_NAME
+            ].value,
+            settings.CSRF_COOKIE_NAME: csrf_token,
+        }
+
+        def run(scenario, requests):
+            run_data = data | {"run": get_random_string(8).lower()}
+            return run_http(
+                "127.0.0.1",
+                server.server_port,
+                scenario,
+                run_data,
+                concurrency,
+                requests,
+                cookies,
+                csrf_token,
+            )
+
+        def close():
+            server.shutdown()
+            server.server_close()
+
+        run.close = close
+        return run
@@ -0,0 +1,199 @@
+import random
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from notes.cache import invalidate_archive
+from notes.models import DEPARTMENTS, AttachmentText, Comment, Note
+from notes.search import update_search_vectors
+from notes.signals import count_created_notes
+from notes.storage import note_storage
+
+# Notes are written in both Greek & English
+WORDS = (
+    "lecture notes exam summary chapter theorem proof example exercise solution "
+    "analysis algebra calculus probability statistics physics chemistry biology "
+    "history philosophy ethics logic economics networks algorithms databases "
+    "compilers semantics pedagogy anatomy pharmacology music harmony painting "
+    "σημειώσεις εξετάσεις περίληψη κεφάλαιο θεώρημα απόδειξη παράδειγμα άσκηση "
+    "λύση ανάλυση άλγεβρα πιθανότητες φυσική χημεία βιολογία ιστορία φιλοσοφία "
+    "λογική οικονομία δίκτυα αλγόριθμοι βάσεις δεδομένων διάλεξη εργαστήριο"
+).split()
+
+PASSWORD = "seed-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with reproducible users, notes, comments, likes "
+        "& attachments to benchmark, see the run_benchmarks command."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--notes", type=int, default=1000)
+        parser.add_argument("--comments", type=int, default=5000)
+        parser.add_argument("--likes", type=int, default=10000)
+        parser.add_argument(
+            "--attachments",
+            type=int,
+            default=100,
+            help="Number of notes with an attached text file.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Notes are spread over this many past days.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the random data, the same seed generates the same data.",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix of the generated usernames.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows to insert per INSERT statement.",
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        prefix = options["prefix"]
+        if options["users"] < 1 and (options["notes"] or options["comments"]):
+            raise CommandError("Notes & comments need at least 1 user.")
+        if User.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(
+                f"Users prefixed {prefix!r} already exist, use another --prefix."
+            )
+
+        user_ids = self.create_users(prefix, options["users"])
+        note_ids = self.create_notes(
+            user_ids, options["notes"], options["attachments"], options["days"]
+        )
+        comments = self.create_comments(user_ids, note_ids, options["comments"])
+        likes = self.create_likes(user_ids, note_ids, options["likes"])
+        attachments = min(options["attachments"], len(note_ids))
+
+        # Comments & likes were inserted without moving the counters & scores
+        call_command("reconcile_counters", stdout=StringIO())
+        call_command("update_trending_scores", stdout=StringIO())
+        invalidate_archive()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(user_ids)} users, {len(note_ids)} notes, "
+                f"{comments} comments, {likes} likes & {attachments} attachments."
+            )
+        )
+
+    def words(self, count):
+        return " ".join(self.random.choices(WORDS, k=count))
+
+    def batches(self, count):
+        for start in range(0, count, self.batch_size):
+            yield range(start, min(start + self.batch_size, count))
+
+    def create_users(self, prefix, count):
+        # Hashing is slow on purpose, so every user gets the same password
+        password = make_password(PASSWORD)
+        user_ids = []
+        for batch in self.batches(count):
+            users = User.objects.bulk_create(
+                User(
+                    username=f"{prefix}-{i}",
+                    email=f"{prefix}-{i}@uoi.gr",
+                    password=password,
+                )
+                for i in batch
+            )
+            user_ids += [user.pk for user in users]
+        return user_ids
+
+    def create_notes(self, user_ids, count, attachments, days):
+        now = timezone.now()
+        note_ids = []
+        for batch in self.batches(count):
+            notes = []
+            for i in batch:
+                # Generated content is plain paragraphs, already sanitized
+                content = "".join(
+                    f"<p>{self.words(self.random.randint(20, 80))}</p>"
+                    for _ in range(self.random.randint(1, 5))
+                )
+                note = Note(
+                    title=self.words(self.random.randint(2, 6))[:100],
+                    department=self.random.choice(DEPARTMENTS)[0],
+                    subject=self.words(self.random.randint(1, 3))[:100],
+                    content=content,
+                    rendered_content=content,
+                    user_id=self.random.choice(user_ids),
+                )
+                if i < attachments:
+                    note.file = note_storage.save(
+                        f"uploads/seed-{i}.txt",
+                        ContentFile(f"{i} {self.words(200)}".encode()),
+                    )
+                    note.file_name = f"seed-{i}.txt"
+                notes.append(note)
+
+            with transaction.atomic():
+                notes = Note.objects.bulk_create(notes)
+                # timestamp is set to now on insert, spread the notes over time
+                for note in notes:
+                    note.timestamp = note.activity_at = now - timedelta(
+                        seconds=self.random.randint(0, days * 86400)
+                    )
+                Note.objects.bulk_update(notes, ["timestamp", "activity_at"])
+                count_created_notes(notes)
+                AttachmentText.objects.bulk_create(
+                    AttachmentText(note=note, file=note.file.name)
+                    for note in notes
+                    if note.file
+                )
+                update_search_vectors(
+                    Note.objects.filter(pk__in=[note.pk for note in notes])
+                )
+            note_ids += [note.pk for note in notes]
+        return note_ids
+
+    def create_comments(self, user_ids, note_ids, count):
+        if not note_ids:
+            return 0
+        for batch in self.batches(count):
+            Comment.objects.bulk_create(
+                Comment(
+                    note_id=self.random.choice(note_ids),
+                    user_id=self.random.choice(user_ids),
+                    content=self.words(self.random.randint(5, 40)),
+                )
+                for _ in batch
+            )
+        return count
+
+    def create_likes(self, user_ids, note_ids, count):
+        # Each user likes a note at most once
+        count = min(count, len(user_ids) * len(note_ids))
+        likes = set()
+        while len(likes) < count:
+            likes.add((self.random.choice(note_ids), self.random.choice(user_ids)))
+        likes = sorted(likes)
+
+        Like = Note.likes.through
+        for batch in self.batches(count):
+            Like.objects.bulk_create(
+                Like(note_id=likes[i][0], user_id=likes[i][1]) for i in batch
+            )
+        return count
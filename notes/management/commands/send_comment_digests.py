@@ -0,0 +1,123 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from notes.models import CommentNotification
+from notes.utils import (
+    absolute_note_url,
+    send_comment_digest,
+    send_comment_notification,
+)
+from users.models import NotificationSettings
+
+
+def due_receivers(now):
+    """
+    Return the ids of users with pending comment notifications,
+    whose digest window has elapsed.
+    """
+    due = (
+        Q(notification_settings__isnull=True)
+        | Q(notification_settings__comment_frequency=NotificationSettings.IMMEDIATE)
+        | Q(notification_settings__last_digest_at__isnull=True)
+    )
+    for frequency, seconds in settings.NOTIFICATION_DIGEST_WINDOWS.items():
+        due |= Q(
+            notification_settings__comment_frequency=frequency,
+            notification_settings__last_digest_at__lte=now - timedelta(seconds=seconds),
+        )
+    return (
+        User.objects.filter(due, comment_notifications__isnull=False)
+        .distinct()
+        .values_list("pk", flat=True)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Email the pending comment notifications, one email per comment "
+        "or one digest per user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of users whose notifications are built per batch.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new comments instead of exiting once done.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="Seconds to wait between polls with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = self.send_notifications(options["batch_size"])
+            if sent or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Queued comment emails for {sent} user(s).")
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def send_notifications(self, batch_size):
+        now = timezone.now()
+        receiver_ids = list(due_receivers(now))
+
+        for i in range(0, len(receiver_ids), batch_size):
+            batch = receiver_ids[i : i + batch_size]
+            frequencies = dict(
+                NotificationSettings.objects.filter(user_id__in=batch).values_list(
+                    "user_id", "comment_frequency"
+                )
+            )
+            with transaction.atomic():
+                # Rows claimed by an overlapping run are left to it,
+                # so no comment is emailed twice
+                pending = (
+                    CommentNotification.objects.select_for_update(
+                        skip_locked=True, of=("self",)
+                    )
+                    .filter(receiver_id__in=batch)
+                    .select_related("receiver", "comment__note", "comment__user")
+                    .order_by("receiver_id", "comment__note_id", "comment__timestamp")
+                )
+                digests = {}
+                for notification in pending:
+                    digests.setdefault(notification.receiver, []).append(notification)
+
+                for receiver, notifications in digests.items():
+                    comments = [n.comment for n in notifications]
+                    frequency = frequencies.get(
+                        receiver.pk, NotificationSettings.IMMEDIATE
+                    )
+                    if frequency != NotificationSettings.IMMEDIATE:
+                        send_comment_digest(receiver, comments)
+                        continue
+                    for comment in comments:
+                        send_comment_notification(
+                            sender=comment.user,
+                            receiver=receiver,
+                            note_url=absolute_note_url(comment.note_id),
+                            comment=comment,
+                        )
+                CommentNotification.objects.filter(
+                    pk__in=[n.pk for ns in digests.values() for n in ns]
+                ).delete()
+                NotificationSettings.objects.filter(user_id__in=batch).update(
+                    last_digest_at=now
+                )
+        return len(receiver_ids)
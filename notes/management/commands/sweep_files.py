@@ -0,0 +1,20 @@
+import os
+from django.core.management.base import BaseCommand
+from notes.models import Note
+from notes.storage import delete_orphan, is_blob, note_storage
+
+
+class Command(BaseCommand):
+    help = "Delete the note files no note uses anymore, after their grace period."
+
+    def handle(self, *args, **options):
+        directory = Note._meta.get_field("file").upload_to
+        root = note_storage.path(directory)
+        deleted = 0
+        for path, _, filenames in os.walk(root):
+            for filename in filenames:
+                name = os.path.join(directory, os.path.relpath(path, root), filename)
+                name = os.path.normpath(name).replace("\\", "/")
+                if is_blob(name) and delete_orphan(name):
+                    deleted += 1
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unused file(s)."))
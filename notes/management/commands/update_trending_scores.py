@@ -0,0 +1,53 @@
+import time
+from django.core.management.base import BaseCommand
+from notes.cache import invalidate_archive
+from notes.models import Note
+from notes.ranking import update_trending_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the trending scores of the notes from their likes & comments, "
+        "for the archive's trending ordering."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of notes to score per UPDATE statement.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep recomputing the scores instead of exiting once done.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=300,
+            help="Seconds to wait between runs with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            updated = self.update(options["batch_size"])
+            if updated:
+                invalidate_archive()
+            if updated or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Updated {updated} trending score(s).")
+                )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def update(self, batch_size):
+        # Batches of consecutive ids, each committed on its own
+        updated, last = 0, 0
+        notes = Note.objects.order_by("pk").values_list("pk", flat=True)
+        while ids := list(notes.filter(pk__gt=last)[:batch_size]):
+            updated += update_trending_scores(Note.objects.filter(pk__in=ids))
+            last = ids[-1]
+        return updated
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.7 on 2026-10-18 15:53
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    Comment = apps.get_model('notes', 'Comment')
+    Like = Note.likes.through
+
+    likes = Like.objects.filter(note_id=OuterRef('pk')).order_by().values('note_id')
+    comments = Comment.objects.filter(note_id=OuterRef('pk')).order_by().values('note_id')
+    Note.objects.update(
+        like_count=Coalesce(Subquery(likes.annotate(n=Count('pk')).values('n')), 0),
+        comment_count=Coalesce(Subquery(comments.annotate(n=Count('pk')).values('n')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
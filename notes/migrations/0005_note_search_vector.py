@@ -0,0 +1,72 @@
+# Generated by Django 6.0.7 on 2026-10-18 15:58
+
+from html import unescape
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Value
+from django.utils.html import strip_tags
+
+SEARCH_INDEXES = [
+    django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='note_search_vector_idx'),
+    django.contrib.postgres.indexes.GinIndex(fields=['title'], name='note_title_trgm_idx', opclasses=['gin_trgm_ops']),
+]
+
+
+def add_search_indexes(apps, schema_editor):
+    # GIN indexes only exist on PostgreSQL, SQLite falls back to LIKE queries
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Note = apps.get_model('notes', 'Note')
+    for index in SEARCH_INDEXES:
+        schema_editor.add_index(Note, index)
+
+
+def remove_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Note = apps.get_model('notes', 'Note')
+    for index in SEARCH_INDEXES:
+        schema_editor.remove_index(Note, index)
+
+
+def populate_search_vectors(apps, schema_editor):
+    # Frozen copy of the search vector at the time, see notes.search
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Note = apps.get_model('notes', 'Note')
+    for note in Note.objects.only('title', 'subject', 'content').iterator():
+        content = unescape(strip_tags(note.content))
+        Note.objects.filter(pk=note.pk).update(
+            search_vector=SearchVector(Value(note.title), weight='A', config='simple')
+            + SearchVector(Value(note.subject), weight='B', config='simple')
+            + SearchVector(Value(content), weight='C', config='simple')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_counters'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='note',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='note', index=index) for index in SEARCH_INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(add_search_indexes, remove_search_indexes),
+            ],
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
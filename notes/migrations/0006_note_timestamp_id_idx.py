@@ -0,0 +1,17 @@
+# Generated by Django 6.0.7 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['-timestamp', '-id'], name='note_timestamp_id_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.7 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_timestamp_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['department', '-timestamp', '-id'], name='note_department_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(condition=models.Q(('file__gt', '')), fields=['-timestamp'], name='note_with_file_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['note', 'timestamp'], name='comment_note_timestamp_idx'),
+        ),
+    ]
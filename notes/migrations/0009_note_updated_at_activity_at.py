@@ -0,0 +1,31 @@
+# Generated by Django 6.0.7 on 2026-10-18 17:30
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_timestamps(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    Note.objects.update(updated_at=F('timestamp'), activity_at=F('timestamp'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0008_commentnotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_timestamps, migrations.RunPython.noop),
+    ]
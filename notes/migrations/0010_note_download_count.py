@@ -0,0 +1,18 @@
+# Generated by Django 6.0.7 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0009_note_updated_at_activity_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.7 on 2026-10-18 18:21
+
+import notes.storage
+import os
+from django.db import migrations, models
+
+
+def populate_file_names(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    for note in Note.objects.exclude(file='').exclude(file=None).only('file').iterator():
+        Note.objects.filter(pk=note.pk).update(file_name=os.path.basename(note.file.name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0010_note_download_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='file_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=notes.storage.get_note_storage, upload_to='uploads/'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['file'], name='note_file_idx'),
+        ),
+        migrations.RunPython(populate_file_names, migrations.RunPython.noop),
+    ]
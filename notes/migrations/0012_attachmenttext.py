@@ -0,0 +1,65 @@
+# Generated by Django 6.0.7 on 2026-10-18 18:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def queue_existing_files(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    AttachmentText = apps.get_model('notes', 'AttachmentText')
+    AttachmentText.objects.bulk_create(
+        AttachmentText(note_id=pk, file=file)
+        for pk, file in Note.objects.exclude(file='').exclude(file=None).values_list('pk', 'file')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0011_note_file_name_note_file_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttachmentText",
+            fields=[
+                (
+                    "note",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="attachment",
+                        serialize=False,
+                        to="notes.note",
+                    ),
+                ),
+                ("file", models.CharField(max_length=100)),
+                ("text", models.TextField(blank=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processing", "Processing"),
+                            ("done", "Done"),
+                            ("unsupported", "Unsupported"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=11,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("extracted_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["status"], name="attachment_status_idx"),
+                    models.Index(fields=["file"], name="attachment_file_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(queue_existing_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.7 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0012_attachmenttext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='rendered_content',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.7 on 2026-10-18 20:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_departments(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    DepartmentCount = apps.get_model('notes', 'DepartmentCount')
+    counts = dict(
+        Note.objects.filter(deleted_at=None)
+        .order_by()
+        .values_list('department')
+        .annotate(count=Count('pk'))
+    )
+    departments = DepartmentCount._meta.get_field('department').choices
+    DepartmentCount.objects.bulk_create(
+        DepartmentCount(department=department, count=counts.get(department, 0))
+        for department, _ in departments
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0014_note_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentCount',
+            fields=[
+                ('department', models.CharField(choices=[('Philosophy', 'Philosophy'), ('Sciences', 'Sciences'), ('Health Sciences', 'Health Sciences'), ('Education', 'Education'), ('Fine Arts', 'Fine Arts'), ('Engineering', 'Engineering'), ('Social Sciences', 'Social Sciences'), ('Economics and Administrative Sciences', 'Economics and Administrative Sciences'), ('Music Studies', 'Music Studies'), ('Informatics and Telecommunications', 'Informatics and Telecommunications'), ('Agricultural Technology', 'Agricultural Technology')], max_length=100, primary_key=True, serialize=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_departments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.7 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+# Frozen copy of the trending score at the time, see notes.ranking: a comment
+# weighs 2 likes, and the points halve every 2 days (172800 seconds)
+SCORE_SQL = {
+    'postgresql': (
+        'UPDATE notes_note SET trending_score = '
+        'LN(1 + like_count + 2 * comment_count) / LN(2) '
+        '+ CAST(EXTRACT(EPOCH FROM timestamp) AS double precision) / 172800.0'
+    ),
+    'sqlite': (
+        'UPDATE notes_note SET trending_score = '
+        'LN(1 + like_count + 2 * comment_count) / LN(2) '
+        '+ (julianday(timestamp) - 2440587.5) * 86400.0 / 172800.0'
+    ),
+}
+
+
+def score_notes(apps, schema_editor):
+    schema_editor.execute(SCORE_SQL[schema_editor.connection.vendor])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0015_departmentcount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        # Before indexing, so the index is built once
+        migrations.RunPython(score_notes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['-trending_score', '-id'], name='note_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['department', '-trending_score', '-id'], name='note_department_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['-like_count', '-id'], name='note_likes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['department', '-like_count', '-id'], name='note_department_likes_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.7 on 2026-10-19 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0018_cacheversion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_note_timestamp_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['note', 'timestamp', 'id'], name='comment_note_timestamp_id_idx'),
+        ),
+    ]
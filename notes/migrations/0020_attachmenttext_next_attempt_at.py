@@ -0,0 +1,27 @@
+# Generated by Django 6.0.7 on 2026-10-19 11:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0019_comment_note_timestamp_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachmenttext',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RemoveIndex(
+            model_name='attachmenttext',
+            name='attachment_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attachmenttext',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='attachment_due_idx'),
+        ),
+    ]
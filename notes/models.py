@@ -1,5 +1,12 @@
+import os
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from .content import extract_inline_images, sanitize
+from .ranking import initial_trending_score
+from .storage import get_note_storage
 
 DEPARTMENTS = (
     ("Philosophy", "Philosophy"),
@@ -16,28 +23,270 @@ DEPARTMENTS = (
 )
 
 
+class VisibleNoteManager(models.Manager):
+    def get_queryset(self):
+        # Notes pending deletion are hidden until purged, see notes.deletion
+        return super().get_queryset().filter(deleted_at=None)
+
+
 class Note(models.Model):
     title = models.CharField(max_length=100)
     department = models.CharField(max_length=100, choices=DEPARTMENTS, default=None)
     subject = models.CharField(max_length=100)
     content = models.TextField()
-    file = models.FileField(upload_to="uploads/", null=True, blank=True)
+    # Sanitized content, output as is by the note page (see notes.content)
+    rendered_content = models.TextField(blank=True, editable=False)
+    # Stored once per content, see notes.storage
+    file = models.FileField(
+        upload_to="uploads/", storage=get_note_storage, null=True, blank=True
+    )
+    # Name of the file as uploaded, the stored one is its digest
+    file_name = models.CharField(max_length=255, blank=True, editable=False)
     likes = models.ManyToManyField(User, related_name="liked_notes")
     timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Last new/deleted comment or like, kept in sync by notes.signals
+    activity_at = models.DateTimeField(default=timezone.now)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Denormalized counters, kept in sync by notes.signals
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    download_count = models.PositiveIntegerField(default=0)
+    # Time-decayed likes & comments, see notes.ranking
+    trending_score = models.FloatField(default=0, editable=False)
+    # Set when the note or its author's account is deleted, see notes.deletion
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Weighted title/subject/content vector, see notes.search (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = VisibleNoteManager()
+    # Including notes pending deletion
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the archive, see notes.pagination
+            models.Index(fields=["-timestamp", "-id"], name="note_timestamp_id_idx"),
+            # Archive filtered by the department dropdown
+            models.Index(
+                fields=["department", "-timestamp", "-id"],
+                name="note_department_timestamp_idx",
+            ),
+            # Archive sorted by trending score or likes, see notes.ranking
+            models.Index(fields=["-trending_score", "-id"], name="note_trending_idx"),
+            models.Index(
+                fields=["department", "-trending_score", "-id"],
+                name="note_department_trending_idx",
+            ),
+            models.Index(fields=["-like_count", "-id"], name="note_likes_idx"),
+            models.Index(
+                fields=["department", "-like_count", "-id"],
+                name="note_department_likes_idx",
+            ),
+            # Notes with an attachment, queried as file__gt=""
+            models.Index(
+                fields=["-timestamp"],
+                condition=models.Q(file__gt=""),
+                name="note_with_file_idx",
+            ),
+            # Notes sharing a stored file, see notes.storage.release_file
+            models.Index(fields=["file"], name="note_file_idx"),
+            # Notes waiting to be purged
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="note_deleted_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="note_search_vector_idx"),
+            GinIndex(
+                fields=["title"], name="note_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if "content" not in self.get_deferred_fields() and (
+            update_fields is None or "content" in update_fields
+        ):
+            self.render_content()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "rendered_content"}
+        if self.file and not self.file._committed:
+            self.file_name = os.path.basename(self.file.name)
+        elif not self.file:
+            self.file_name = ""
+        if self._state.adding:
+            # Until the next update_trending_scores, see notes.ranking
+            self.trending_score = initial_trending_score()
+        super().save(*args, **kwargs)
+        self._remember_loaded_values(update_fields)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        note = super().from_db(db, field_names, values)
+        note._remember_loaded_values(field_names)
+        return note
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        self._remember_loaded_values(fields)
+
+    def _remember_loaded_values(self, fields=None):
+        # The file & department as stored, compared by notes.signals on save
+        # instead of reading the row again
+        deferred = self.get_deferred_fields()
+        loaded = self.__dict__.setdefault("_loaded_values", {})
+        for name in ("file", "department"):
+            if (fields is None or name in fields) and name not in deferred:
+                loaded[name] = self.file.name if name == "file" else self.department
+
+    def render_content(self):
+        self.content = extract_inline_images(self.content)
+        self.rendered_content = sanitize(self.content)
 
     def number_of_likes(self):
-        return self.likes.count()
+        return self.like_count
 
     def __str__(self):
         return self.title
 
 
+class DepartmentCount(models.Model):
+    """
+    Number of notes shown per department, for the archive's department
+    dropdown. Kept in sync by notes.signals, see the rebuild_department_counts
+    command.
+    """
+
+    department = models.CharField(max_length=100, choices=DEPARTMENTS, primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.department}: {self.count}"
+
+
+class CacheVersion(models.Model):
+    """
+    Version embedded in the keys & ETags of cached pages, see notes.cache.
+    Stored in the database rather than the cache, so all server processes see
+    the same version, whatever their cache backend.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    # Nanoseconds since the epoch of the last change
+    version = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
+class RelatedNote(models.Model):
+    """
+    A note recommended on the page of a similar note of the same department
+    & subject, computed offline by the build_related_notes command.
+    """
+
+    # Indexed by the unique constraint
+    note = models.ForeignKey(
+        Note, on_delete=models.CASCADE, related_name="related_notes", db_index=False
+    )
+    related = models.ForeignKey(Note, on_delete=models.CASCADE, related_name="+")
+    # Cosine similarity of their TF-IDF vectors, see notes.related
+    score = models.FloatField()
+    # 1 for the most similar note
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # Also the index of the note page's single query
+            models.UniqueConstraint(
+                fields=["note", "rank"], name="related_note_rank_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.note_id} → {self.related_id}"
+
+
+class AttachmentText(models.Model):
+    """
+    Text extracted from a note's file by the extract_attachments command,
+    indexed along with the note for search.
+    """
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    UNSUPPORTED = "unsupported"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (DONE, "Done"),
+        (UNSUPPORTED, "Unsupported"),
+        (FAILED, "Failed"),
+    )
+
+    note = models.OneToOneField(
+        Note, on_delete=models.CASCADE, primary_key=True, related_name="attachment"
+    )
+    # Stored name of the extracted file, files are renamed when their content changes
+    file = models.CharField(max_length=100)
+    text = models.TextField(blank=True)
+    status = models.CharField(max_length=11, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Failed files are retried with exponential backoff
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set when a worker claims the file, stale claims are retried
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    extracted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for files due for extraction
+            models.Index(
+                fields=["status", "next_attempt_at"], name="attachment_due_idx"
+            ),
+            # Files shared by several notes are only extracted once
+            models.Index(fields=["file"], name="attachment_file_idx"),
+        ]
+
+    def __str__(self):
+        return self.file
+
+
 class Comment(models.Model):
     note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name="comments")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Comments of a note in posting order, with the id tie-breaker
+            # of their cursor pagination
+            models.Index(
+                fields=["note", "timestamp", "id"],
+                name="comment_note_timestamp_id_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.content[:10]
+
+
+class CommentNotification(models.Model):
+    """
+    A new comment waiting to be emailed to the note's author,
+    on its own or in a digest, see the send_comment_digests command.
+    """
+
+    receiver = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="comment_notifications"
+    )
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.receiver}: {self.comment}"
@@ -0,0 +1,136 @@
+"""
+Keyset (cursor) pagination.
+
+Unlike django.core.paginator.Paginator, pages are fetched by seeking past the
+last row of the previous page on the queryset's ordering, so no COUNT(*) is run
+and deep pages cost the same as the first one.
+Cursors are signed, so clients can't forge or tamper with them, nor reuse them
+on another ordering.
+"""
+
+from datetime import datetime
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "notes.pagination.cursor"
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    def __init__(self, object_list, has_next, has_previous, next_cursor, prev_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __bool__(self):
+        return bool(self.object_list) or self.has_previous
+
+
+class CursorPaginator:
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        # Order by the queryset's own ordering, with the id as a tie-breaker
+        ordering = [str(field) for field in queryset.query.order_by]
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            ordering.append("-id" if ordering and ordering[0][0] == "-" else "id")
+        self.keys = [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+        self.salt = f"{CURSOR_SALT}:{','.join(ordering)}"
+
+    def _seek(self, values, backwards):
+        """
+        Return a filter matching the rows after (or before) the given key values.
+        """
+        condition = Q(pk__in=[])
+        for i, (field, descending) in enumerate(self.keys):
+            lookup = "lt" if descending != backwards else "gt"
+            step = Q(**{f"{field}__{lookup}": values[i]})
+            for j, (prev_field, _) in enumerate(self.keys[:i]):
+                step &= Q(**{prev_field: values[j]})
+            condition |= step
+        return condition
+
+    def _cursor(self, obj, backwards):
+        values = []
+        for field, _ in self.keys:
+            value = getattr(obj, field)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return signing.dumps({"v": values, "b": backwards}, salt=self.salt)
+
+    def decode(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=self.salt)
+            values, backwards = data["v"], data["b"]
+        except (signing.BadSignature, KeyError, TypeError) as e:
+            raise InvalidCursor(cursor) from e
+        if len(values) != len(self.keys):
+            raise InvalidCursor(cursor)
+        return values, backwards
+
+    def _query(self, cursor):
+        """
+        Return the queryset of the page after (or before) the cursor, with the
+        decoded cursor values (None for the first page) & direction.
+        """
+        values, backwards = None, False
+        if cursor:
+            try:
+                values, backwards = self.decode(cursor)
+            except InvalidCursor:
+                pass
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backwards))
+        ordering = [
+            f"-{field}" if descending != backwards else field
+            for field, descending in self.keys
+        ]
+        return queryset.order_by(*ordering)[: self.per_page + 1], values, backwards
+
+    def _page(self, rows, values, backwards):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        return CursorPage(
+            rows,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self._cursor(rows[-1], False) if has_next and rows else None,
+            prev_cursor=self._cursor(rows[0], True) if has_previous and rows else None,
+        )
+
+    def get_page(self, cursor=None):
+        """
+        Return the page after (or before) the cursor, the first page if it's
+        missing or invalid.
+        """
+        queryset, values, backwards = self._query(cursor)
+        return self._page(list(queryset), values, backwards)
+
+    async def aget_page(self, cursor=None):
+        """
+        Async version of get_page().
+        """
+        queryset, values, backwards = self._query(cursor)
+        return self._page([row async for row in queryset], values, backwards)
@@ -0,0 +1,256 @@
+"""
+Plain text extraction from note attachments, using only the standard library.
+
+Supported are plain text, PDF (text drawn with simple fonts), Office Open XML
+(Word, Excel, PowerPoint) & OpenDocument files. Extraction runs in the worker
+processes of the extract_attachments command, so nothing here imports Django.
+"""
+
+import codecs
+import os
+import re
+import resource
+import signal
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+
+class UnsupportedFile(Exception):
+    pass
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+class _Text:
+    """
+    Collect text fragments up to max_chars.
+    """
+
+    def __init__(self, max_chars):
+        self.parts = []
+        self.remaining = max_chars
+
+    @property
+    def full(self):
+        return self.remaining <= 0
+
+    def add(self, text):
+        if text and not self.full:
+            text = text[: self.remaining]
+            self.parts.append(text)
+            self.remaining -= len(text)
+
+    def __str__(self):
+        return "".join(self.parts).strip()
+
+
+def _extract_plain(path, text):
+    size = text.remaining * 4
+    with open(path, "rb") as file:
+        data = file.read(size)
+    # A read stopping within a multi-byte character leaves it out,
+    # only a whole file ending with one isn't UTF-8
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        text.add(decoder.decode(data, final=len(data) < size))
+    except UnicodeDecodeError:
+        # Older Greek documents are usually Windows-1253 encoded
+        text.add(data.decode("cp1253", errors="replace"))
+
+
+def _xml_text(archive, member, text):
+    with archive.open(member) as file:
+        for event, element in ElementTree.iterparse(file, events=("end",)):
+            tag = element.tag.rsplit("}", 1)[-1]
+            if tag == "t" and element.text:
+                text.add(element.text)
+            elif tag == "tab":
+                text.add(" ")
+            elif tag == "c":
+                # Spreadsheet cell, shared & inline strings were added as <t>
+                if element.get("t") not in ("s", "inlineStr"):
+                    text.add("".join(element.itertext()) + " ")
+                element.clear()
+            elif tag in ("p", "si", "row"):
+                text.add("\n")
+                element.clear()
+            if text.full:
+                return
+
+
+def _zip_members(archive, pattern):
+    # Natural order, so slide10.xml comes after slide9.xml
+    names = [name for name in archive.namelist() if re.fullmatch(pattern, name)]
+    return sorted(
+        names,
+        key=lambda n: [int(s) if s.isdigit() else s for s in re.split(r"(\d+)", n)],
+    )
+
+
+def _extract_office(path, text):
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        if "word/document.xml" in names:
+            members = ["word/document.xml"]
+        elif "xl/sharedStrings.xml" in names or "xl/workbook.xml" in names:
+            members = (
+                ["xl/sharedStrings.xml"] if "xl/sharedStrings.xml" in names else []
+            )
+            members += _zip_members(archive, r"xl/worksheets/sheet\d+\.xml")
+        elif "ppt/presentation.xml" in names:
+            members = _zip_members(archive, r"ppt/slides/slide\d+\.xml")
+        else:
+            raise UnsupportedFile(path)
+        for member in members:
+            _xml_text(archive, member, text)
+            text.add("\n")
+
+
+def _extract_opendocument(path, text):
+    with zipfile.ZipFile(path) as archive:
+        with archive.open("content.xml") as file:
+            for event, element in ElementTree.iterparse(file, events=("end",)):
+                tag = element.tag.rsplit("}", 1)[-1]
+                if tag in ("p", "h"):
+                    text.add("".join(element.itertext()) + "\n")
+                    element.clear()
+                if text.full:
+                    return
+
+
+PDF_STREAM_RE = re.compile(rb">>\s*stream\r?\n")
+PDF_TEXT_RE = re.compile(
+    rb"\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>|\[|\]|T\*|Tj|TJ|'|\"|Td|TD|ET"
+)
+PDF_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _pdf_string(token):
+    if token[:1] == b"<":
+        data = bytes.fromhex(re.sub(rb"\s", b"", token[1:-1]).decode())
+        if data[:2] == b"\xfe\xff":
+            return data[2:].decode("utf-16-be", errors="ignore")
+        return data.decode("latin-1")
+
+    data, i, body = bytearray(), 0, token[1:-1]
+    while i < len(body):
+        char = body[i : i + 1]
+        if char != b"\\":
+            data += char
+            i += 1
+            continue
+        escaped = body[i + 1 : i + 2]
+        octal = re.match(rb"[0-7]{1,3}", body[i + 1 : i + 4])
+        if octal:
+            data.append(int(octal.group(), 8) & 0xFF)
+            i += 1 + len(octal.group())
+        else:
+            data += PDF_ESCAPES.get(escaped, escaped)
+            i += 2
+    return data.decode("latin-1")
+
+
+def _pdf_content_text(content, text):
+    strings = []
+    for match in PDF_TEXT_RE.finditer(content):
+        token = match.group()
+        if token[:1] in (b"(", b"<"):
+            strings.append(_pdf_string(token))
+        elif token in (b"Tj", b"TJ", b"'", b'"'):
+            text.add("".join(strings))
+            strings = []
+        elif token in (b"T*", b"Td", b"TD", b"ET"):
+            text.add("\n" if token in (b"T*", b"ET") else " ")
+            strings = []
+        if text.full:
+            return
+
+
+def _extract_pdf(path, text):
+    with open(path, "rb") as file:
+        data = file.read()
+    if not data.startswith(b"%PDF"):
+        raise UnsupportedFile(path)
+    for match in PDF_STREAM_RE.finditer(data):
+        start = match.end()
+        end = data.find(b"endstream", start)
+        if end < 0:
+            break
+        dictionary = data[data.rfind(b" obj", 0, match.start()) : match.start()]
+        stream = data[start:end]
+        if re.search(rb"/(Subtype|Type|Length1|Length2|Length3)\b", dictionary):
+            # Images, fonts, metadata & object streams, not page contents
+            continue
+        if b"/Filter" in dictionary:
+            if b"/FlateDecode" not in dictionary:
+                continue
+            try:
+                stream = zlib.decompressobj().decompress(stream, text.remaining * 16)
+            except zlib.error:
+                continue
+        _pdf_content_text(stream, text)
+        if text.full:
+            return
+
+
+EXTRACTORS = {
+    ".txt": _extract_plain,
+    ".md": _extract_plain,
+    ".csv": _extract_plain,
+    ".pdf": _extract_pdf,
+    ".docx": _extract_office,
+    ".xlsx": _extract_office,
+    ".pptx": _extract_office,
+    ".odt": _extract_opendocument,
+    ".ods": _extract_opendocument,
+    ".odp": _extract_opendocument,
+}
+
+
+def extract_text(path, max_chars):
+    """
+    Return up to max_chars of the file's text.
+    Raise UnsupportedFile for file types without a parser.
+    """
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    if extractor is None:
+        raise UnsupportedFile(path)
+    text = _Text(max_chars)
+    try:
+        extractor(path, text)
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        raise UnsupportedFile(path) from e
+    # NUL characters can't be stored in PostgreSQL text columns
+    return re.sub(r"[ \t]+", " ", str(text).replace("\x00", ""))
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout
+
+
+def limit_resources(memory_limit, timeout):
+    """
+    Initialize a worker process: cap its address space at memory_limit bytes,
+    & its CPU time so runaway parsers are killed even if they ignore SIGALRM.
+    """
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    if timeout:
+        resource.setrlimit(resource.RLIMIT_CPU, (timeout + 1, timeout + 5))
+        signal.signal(signal.SIGXCPU, _raise_timeout)
+
+
+def extract_text_with_timeout(path, max_chars, timeout):
+    """
+    Run extract_text in a worker process, giving up after timeout seconds.
+    """
+    handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.alarm(timeout)
+    try:
+        return extract_text(path, max_chars)
+    finally:
+        signal.alarm(0)
+        signal.signal(signal.SIGALRM, handler)
@@ -0,0 +1,72 @@
+"""
+Trending scores of notes, for the archive's ?sort=trending ordering.
+
+A note's score is log2(1 + points) + posted / half-life, where its points are
+its likes plus its weighted comments, and posted is its posting time in seconds
+since the epoch. Doubling its points ranks a note as high as posting it one
+half-life later, so ordering by the score is ordering by the points decayed by
+half every half-life since posting. Unlike the decayed points, the score doesn't
+shrink as time passes: it only changes along with the counters, and doesn't
+underflow for old notes.
+
+Scores are stored on the notes, behind an index, and recomputed in bulk UPDATEs
+by the update_trending_scores command rather than on every like & comment.
+"""
+
+import math
+from django.conf import settings
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.functions import Cast, Ln
+from django.utils import timezone
+
+
+class Epoch(Func):
+    """
+    Seconds since the Unix epoch of a datetime expression.
+    """
+
+    template = "CAST(EXTRACT(EPOCH FROM %(expressions)s) AS double precision)"
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Datetimes are stored as UTC text, converted through Julian days
+        return self.as_sql(
+            compiler,
+            connection,
+            template="((julianday(%(expressions)s) - 2440587.5) * 86400.0)",
+            **extra_context,
+        )
+
+
+def trending_score(likes, comments, posted):
+    """
+    Return the trending score of a note with the given counters & posting time.
+    """
+    points = likes + settings.NOTES_TRENDING_COMMENT_WEIGHT * comments
+    return (
+        math.log2(1 + points) + posted.timestamp() / settings.NOTES_TRENDING_HALF_LIFE
+    )
+
+
+def initial_trending_score():
+    # Of a note posted now, without likes or comments yet
+    return trending_score(0, 0, timezone.now())
+
+
+def trending_score_expression():
+    """
+    Return the expression computing the trending score of a note in SQL.
+    """
+    weight = settings.NOTES_TRENDING_COMMENT_WEIGHT
+    points = Cast(1 + F("like_count") + weight * F("comment_count"), FloatField())
+    half_life = Value(float(settings.NOTES_TRENDING_HALF_LIFE))
+    return Ln(points) / Value(math.log(2)) + Epoch("timestamp") / half_life
+
+
+def update_trending_scores(notes):
+    """
+    Store the trending scores of the notes queryset in a single UPDATE,
+    skipping the notes whose score didn't change. Return the number updated.
+    """
+    score = trending_score_expression()
+    return notes.exclude(trending_score=score).update(trending_score=score)
@@ -0,0 +1,166 @@
+"""
+"Related notes" recommendations, shown on the note page.
+
+The build_related_notes command compares the notes of each department &
+subject by the TF-IDF vectors of their title, subject & text, and stores each
+note's most similar ones in RelatedNote, so the note page reads them with a
+single indexed query.
+
+Vectors are sparse dicts of term weights, normalized so the cosine similarity
+of two notes is the dot product of their vectors. A group's products are
+accumulated term by term over an inverted index, i.e. a sparse matrix product
+only visiting the pairs of notes sharing a term. Departments are processed one
+at a time, so memory holds a single department's vectors.
+
+The rebuild is sized for archives of hundreds of thousands of notes, with tens
+of thousands in a subject. Common terms would make the products quadratic in
+the size of a subject, so they are pruned: each term's postings keep only the
+MAX_POSTINGS notes it weighs the most, and a note's candidates are looked up
+by its QUERY_TERMS heaviest terms. The work is then linear in the number of
+notes, at most QUERY_TERMS * MAX_POSTINGS products per note, at the cost of
+similarities summed over those terms only.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from operator import itemgetter
+from django.db import transaction
+from .models import Note, RelatedNote
+from .search import html_to_text
+
+# Words of at least 2 letters, in any alphabet
+TOKEN = re.compile(r"[^\W\d_]{2,}")
+
+# Title & subject words count as this many words of the text
+TITLE_WEIGHT = 3
+SUBJECT_WEIGHT = 2
+
+# Bounds of the products per note, see the module docstring
+QUERY_TERMS = 20
+MAX_POSTINGS = 200
+
+
+def tokenize(text):
+    return TOKEN.findall(text.casefold())
+
+
+def term_counts(title, subject, content):
+    """
+    Return the weighted term counts of a note's fields.
+    """
+    counts = Counter(tokenize(html_to_text(content)))
+    for term in tokenize(title):
+        counts[term] += TITLE_WEIGHT
+    for term in tokenize(subject):
+        counts[term] += SUBJECT_WEIGHT
+    return counts
+
+
+def tfidf_vectors(documents, max_terms=100):
+    """
+    Return the normalized TF-IDF vectors of the documents' term counts,
+    keeping the max_terms heaviest terms of each.
+    """
+    frequencies = Counter(term for counts in documents for term in counts)
+    total = len(documents)
+    vectors = []
+    for counts in documents:
+        # Sublinear term frequency & smoothed inverse document frequency
+        weights = {
+            term: (1 + math.log(count))
+            * (1 + math.log((1 + total) / (1 + frequencies[term])))
+            for term, count in counts.items()
+        }
+        if len(weights) > max_terms:
+            weights = dict(
+                heapq.nlargest(max_terms, weights.items(), key=itemgetter(1))
+            )
+        # Notes without any word have an empty vector
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1
+        vectors.append({term: weight / norm for term, weight in weights.items()})
+    return vectors
+
+
+def nearest_neighbours(
+    vectors, count, query_terms=QUERY_TERMS, max_postings=MAX_POSTINGS
+):
+    """
+    Return the (index, similarity) of the most similar vectors of each vector,
+    most similar first, leaving out vectors sharing no term.
+
+    Similarities are summed over each vector's query_terms heaviest terms,
+    with the max_postings vectors weighing each term the most.
+    """
+    postings = defaultdict(list)
+    for i, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            # Min-heaps of (weight, index), evicting the lightest when full
+            posting = postings[term]
+            if len(posting) < max_postings:
+                heapq.heappush(posting, (weight, i))
+            else:
+                heapq.heappushpop(posting, (weight, i))
+
+    neighbours = []
+    for i, vector in enumerate(vectors):
+        similarities = defaultdict(float)
+        terms = heapq.nlargest(query_terms, vector.items(), key=itemgetter(1))
+        for term, weight in terms:
+            for other, j in postings[term]:
+                similarities[j] += weight * other
+        similarities.pop(i, None)
+        neighbours.append(
+            heapq.nlargest(count, similarities.items(), key=itemgetter(1))
+        )
+    return neighbours
+
+
+def _department_related_notes(department, count, max_terms):
+    ids, documents = [], []
+    # Notes sharing a subject, whatever its case
+    subjects = defaultdict(list)
+    notes = (
+        Note.objects.filter(department=department)
+        .order_by("pk")
+        .values_list("pk", "subject", "title", "content")
+    )
+    for i, (pk, subject, title, content) in enumerate(notes.iterator(chunk_size=2000)):
+        ids.append(pk)
+        subjects[subject.strip().casefold()].append(i)
+        documents.append(term_counts(title, subject, content))
+    # Terms are weighed across the department
+    vectors = tfidf_vectors(documents, max_terms)
+    del documents
+
+    for members in subjects.values():
+        neighbours = nearest_neighbours([vectors[i] for i in members], count)
+        for i, similar in zip(members, neighbours):
+            for rank, (j, score) in enumerate(similar, 1):
+                yield RelatedNote(
+                    note_id=ids[i], related_id=ids[members[j]], score=score, rank=rank
+                )
+
+
+def build_related_notes(count=5, max_terms=100, batch_size=1000):
+    """
+    Replace the related notes of every note with its count most similar notes.
+    Return the number of stored related notes.
+    """
+    departments = list(
+        Note.objects.order_by("department")
+        .values_list("department", flat=True)
+        .distinct()
+    )
+    total = 0
+    for department in departments:
+        related = list(_department_related_notes(department, count, max_terms))
+        # The department's recommendations are swapped at once
+        with transaction.atomic():
+            RelatedNote.objects.filter(note__department=department).delete()
+            RelatedNote.objects.bulk_create(related, batch_size=batch_size)
+        total += len(related)
+    # Of departments whose notes were all deleted since
+    RelatedNote.objects.exclude(note__department__in=departments).delete()
+    return total
@@ -0,0 +1,169 @@
+"""
+Full-text search over notes.
+
+On PostgreSQL notes are matched against a stored search vector, weighted
+title > subject > content > attached file text, and ranked by relevance. Queries without any
+full-text match fall back to trigram similarity on the title, to forgive typos.
+Other databases (SQLite in DEBUG mode) use plain case-insensitive matching.
+"""
+
+from html import unescape
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import (
+    Case,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils.html import strip_tags
+from .models import AttachmentText, Note
+
+# Notes are written in both Greek & English, so don't stem for either language
+SEARCH_CONFIG = "simple"
+
+
+def html_to_text(html):
+    """
+    Return the plain text of the Summernote HTML content.
+    """
+    return unescape(strip_tags(html))
+
+
+def build_search_vector(title, subject, content, attachment=Value("")):
+    """
+    Return the weighted search vector expression for the given note fields
+    & the text extracted from its file.
+    """
+    return (
+        SearchVector(Value(title), weight="A", config=SEARCH_CONFIG)
+        + SearchVector(Value(subject), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(Value(html_to_text(content)), weight="C", config=SEARCH_CONFIG)
+        + SearchVector(attachment, weight="D", config=SEARCH_CONFIG)
+    )
+
+
+def search_vector_expression(notes):
+    """
+    Return the expression computing the search vectors of the saved notes,
+    & the text extracted from their current files, in a single UPDATE.
+    """
+    # Only text extracted from the current file, read in the UPDATE
+    attachment = Coalesce(
+        Subquery(
+            AttachmentText.objects.filter(
+                note=OuterRef("pk"), file=OuterRef("file"), status=AttachmentText.DONE
+            ).values("text")
+        ),
+        Value(""),
+        output_field=TextField(),
+    )
+    return Case(
+        *(
+            When(
+                pk=note.pk,
+                then=build_search_vector(
+                    note.title, note.subject, note.content, attachment
+                ),
+            )
+            for note in notes
+        ),
+        output_field=SearchVectorField(),
+    )
+
+
+def update_search_vector(note):
+    """
+    Store the search vector of a saved note.
+    """
+    if connection.vendor != "postgresql":
+        return
+    type(note).objects.filter(pk=note.pk).update(
+        search_vector=search_vector_expression([note])
+    )
+
+
+def update_search_vectors(notes):
+    """
+    Store the search vectors of the notes queryset in a single UPDATE,
+    e.g. of bulk-created notes, as saving each of them would.
+    """
+    if connection.vendor != "postgresql":
+        return
+    notes = list(notes.only("title", "subject", "content"))
+    if notes:
+        Note.all_objects.filter(pk__in=[note.pk for note in notes]).update(
+            search_vector=search_vector_expression(notes)
+        )
+
+
+def _contains(notes, query):
+    return notes.filter(
+        Q(title__icontains=query)
+        | Q(subject__icontains=query)
+        | Q(content__icontains=query)
+        | Q(attachment__text__icontains=query)
+    )
+
+
+def _ranked(matches, search_query):
+    # Ranks are cast from real to double precision, so they round-trip
+    # exactly through pagination cursors
+    return matches.annotate(
+        rank=Cast(SearchRank(F("search_vector"), search_query), FloatField())
+    ).order_by("-rank", "-timestamp")
+
+
+def _similar(notes, query):
+    # No full-text match, the query is probably misspelled
+    return (
+        notes.filter(title__trigram_similar=query)
+        .annotate(similarity=Cast(TrigramSimilarity("title", query), FloatField()))
+        .order_by("-similarity", "-timestamp")
+    )
+
+
+def search_notes(notes, query, department=None):
+    """
+    Filter the notes queryset by the search query & department,
+    best matches first.
+    """
+    if department:
+        # Before looking for full-text matches, which may only be elsewhere
+        notes = notes.filter(department=department)
+    if connection.vendor != "postgresql":
+        return _contains(notes, query)
+
+    search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+    matches = notes.filter(search_vector=search_query)
+    if matches.exists():
+        return _ranked(matches, search_query)
+    return _similar(notes, query)
+
+
+async def asearch_notes(notes, query, department=None):
+    """
+    Async version of search_notes().
+    """
+    if department:
+        notes = notes.filter(department=department)
+    if connection.vendor != "postgresql":
+        return _contains(notes, query)
+
+    search_query = SearchQuery(query, search_type="websearch", config=SEARCH_CONFIG)
+    matches = notes.filter(search_vector=search_query)
+    if await matches.aexists():
+        return _ranked(matches, search_query)
+    return _similar(notes, query)
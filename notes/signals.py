@@ -0,0 +1,287 @@
+"""
+Keep the denormalized like & comment counters, the department counts,
+the search vector, the cached pages and the stored files of Note in sync,
+and push new comments & like counts to the note's readers.
+
+Counters are only ever moved with F() expressions,
+so concurrent writers never overwrite each other's increments.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from users.models import AccountDeletion
+from .models import Note, Comment, AttachmentText, DepartmentCount
+from .search import update_search_vector
+from .cache import invalidate_archive
+from .events import get_broker, publish_comment, publish_like_counts
+from .storage import release_file
+
+
+def actual_counts():
+    """
+    Return subquery expressions counting the real likes & comments of a note.
+    """
+    likes = Note.likes.through.objects.filter(note_id=OuterRef("pk"))
+    comments = Comment.objects.filter(note_id=OuterRef("pk"))
+    return {
+        "actual_likes": Coalesce(
+            Subquery(
+                likes.order_by().values("note_id").annotate(n=Count("pk")).values("n")
+            ),
+            0,
+        ),
+        "actual_comments": Coalesce(
+            Subquery(
+                comments.order_by()
+                .values("note_id")
+                .annotate(n=Count("pk"))
+                .values("n")
+            ),
+            0,
+        ),
+    }
+
+
+def move_like_counter(notes, delta):
+    if get_broker().has_readers():
+        # Pushed to the readers of the notes, see notes.events. Resolved now,
+        # as the likes the notes are filtered by may be deleted by the commit
+        note_ids = list(notes.values_list("pk", flat=True))
+        transaction.on_commit(partial(publish_like_counts, note_ids))
+    if delta < 0:
+        notes = notes.filter(like_count__gte=-delta)
+    notes.update(like_count=F("like_count") + delta, activity_at=Now())
+
+
+@receiver(m2m_changed, sender=Note.likes.through)
+def count_likes(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # user.liked_notes.clear(), remember which notes lose a like
+        instance._cleared_note_ids = list(
+            instance.liked_notes.values_list("pk", flat=True)
+        )
+    elif action == "post_clear":
+        if reverse:
+            notes = Note.objects.filter(pk__in=instance._cleared_note_ids)
+            move_like_counter(notes, -1)
+        else:
+            Note.objects.filter(pk=instance.pk).update(like_count=0, activity_at=Now())
+            instance.like_count = 0
+    elif action == "pre_remove" and pk_set:
+        # pk_set holds the requested pks, remember the likes that exist
+        likes = sender.objects.filter(
+            **{"user_id" if reverse else "note_id": instance.pk},
+            **{"note_id__in" if reverse else "user_id__in": pk_set},
+        )
+        instance._removed_like_pks = set(
+            likes.values_list("note_id" if reverse else "user_id", flat=True)
+        )
+    elif action in ("post_add", "post_remove") and pk_set:
+        # pk_set only holds rows that were actually inserted on post_add
+        sign = 1 if action == "post_add" else -1
+        if action == "post_remove":
+            pk_set = instance.__dict__.pop("_removed_like_pks", set())
+            if not pk_set:
+                return
+        if reverse:
+            move_like_counter(Note.objects.filter(pk__in=pk_set), sign)
+        else:
+            delta = sign * len(pk_set)
+            move_like_counter(Note.objects.filter(pk=instance.pk), delta)
+            instance.like_count = max(instance.like_count + delta, 0)
+
+
+def move_department_count(department, delta):
+    counts = DepartmentCount.objects.filter(department=department)
+    if delta < 0:
+        counts = counts.filter(count__gte=-delta)
+    if not counts.update(count=F("count") + delta) and delta > 0:
+        # Rows are created along with the table, unless a department was added
+        DepartmentCount.objects.bulk_create(
+            [DepartmentCount(department=department)], ignore_conflicts=True
+        )
+        counts.update(count=F("count") + delta)
+
+
+def count_created_notes(notes):
+    """
+    Count notes inserted with bulk_create(), which sends no signals.
+    """
+    for department, count in Counter(note.department for note in notes).items():
+        move_department_count(department, count)
+
+
+def hide_notes(notes):
+    """
+    Mark the notes queryset as deleted, which hides them, see notes.deletion.
+    """
+    departments = notes.order_by().values_list("department", flat=True).distinct()
+    for department in list(departments):
+        # Only notes this update hid are uncounted
+        hidden = notes.filter(department=department).update(deleted_at=Now())
+        move_department_count(department, -hidden)
+    invalidate_archive()
+
+
+@receiver(pre_delete, sender=User)
+def uncount_user_likes(sender, instance, **kwargs):
+    # Like rows are cascaded without signals when a user is deleted
+    move_like_counter(Note.objects.filter(likes=instance), -1)
+    invalidate_archive()
+
+
+@receiver(post_save, sender=AccountDeletion)
+def hide_deleted_account_notes(sender, instance, created, **kwargs):
+    # Purged along with the account, see notes.deletion
+    if created:
+        hide_notes(Note.objects.filter(user_id=instance.user_id))
+
+
+@receiver(post_save, sender=Note)
+def index_note(sender, instance, **kwargs):
+    update_search_vector(instance)
+
+
+@receiver(pre_save, sender=Note)
+def remember_previous_values(sender, instance, **kwargs):
+    # As last loaded or saved, see Note.from_db
+    loaded = getattr(instance, "_loaded_values", {})
+    if "file" in loaded and "department" in loaded:
+        instance._previous_file = loaded["file"]
+        instance._previous_department = loaded["department"]
+    elif instance.pk:
+        # Deferred, or never loaded
+        instance._previous_file, instance._previous_department = (
+            Note.all_objects.filter(pk=instance.pk)
+            .values_list("file", "department")
+            .first()
+        ) or (None, None)
+
+
+@receiver(post_save, sender=Note)
+def count_departments(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_department", None)
+    if instance.deleted_at is not None:
+        return
+    if created:
+        move_department_count(instance.department, 1)
+    elif previous and previous != instance.department:
+        move_department_count(previous, -1)
+        move_department_count(instance.department, 1)
+
+
+@receiver(post_delete, sender=Note)
+def uncount_deleted_note(sender, instance, **kwargs):
+    # Hidden notes were uncounted along with hiding them
+    if instance.deleted_at is None:
+        move_department_count(instance.department, -1)
+
+
+@receiver(post_save, sender=Note)
+def release_replaced_file(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_file", None)
+    if previous and previous != instance.file.name:
+        release_file(previous)
+
+
+@receiver(post_save, sender=Note)
+def queue_text_extraction(sender, instance, **kwargs):
+    name = instance.file.name or ""
+    if name == (getattr(instance, "_previous_file", None) or ""):
+        return
+    if name:
+        # (Re)extracted by the extract_attachments command
+        AttachmentText.objects.update_or_create(
+            note=instance,
+            defaults={
+                "file": name,
+                "text": "",
+                "status": AttachmentText.PENDING,
+                "attempts": 0,
+                "last_error": "",
+                "next_attempt_at": timezone.now(),
+                "claimed_at": None,
+                "extracted_at": None,
+            },
+        )
+    else:
+        AttachmentText.objects.filter(note=instance).delete()
+
+
+@receiver(post_delete, sender=Note)
+def release_deleted_file(sender, instance, **kwargs):
+    # Also sent for notes cascaded with their user's account
+    release_file(instance.file.name)
+
+
+@receiver(post_save, sender=Comment)
+def count_added_comment(sender, instance, created, **kwargs):
+    if created:
+        Note.objects.filter(pk=instance.note_id).update(
+            comment_count=F("comment_count") + 1, activity_at=Now()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def push_added_comment(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(publish_comment, instance))
+
+
+@receiver(post_delete, sender=Comment)
+def count_removed_comment(sender, instance, **kwargs):
+    Note.objects.filter(pk=instance.note_id, comment_count__gt=0).update(
+        comment_count=F("comment_count") - 1, activity_at=Now()
+    )
+
+
+# Set while notes are deleted in bulk, see deleting_notes
+_deleting_notes = ContextVar("notes_deleting_notes", default=False)
+
+
+@contextmanager
+def deleting_notes():
+    """
+    Invalidate the archive once for the notes deleted within, not per note.
+    """
+    token = _deleting_notes.set(True)
+    try:
+        yield
+    finally:
+        _deleting_notes.reset(token)
+    invalidate_archive()
+
+
+@receiver([post_save, post_delete], sender=Note)
+def invalidate_note_cache(sender, **kwargs):
+    # Note pages are keyed by the note's updated_at instead
+    if not _deleting_notes.get():
+        invalidate_archive()
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_cache(sender, **kwargs):
+    # The archive shows comment counts
+    invalidate_archive()
+
+
+@receiver(m2m_changed, sender=Note.likes.through)
+def invalidate_like_cache(sender, action, **kwargs):
+    # The archive shows like counts
+    if action.startswith("post_"):
+        invalidate_archive()
@@ -0,0 +1,114 @@
+"""
+Content-addressed storage of note attachments.
+
+Uploads are hashed while they are written to disk and stored once per
+content under their SHA-256 digest, e.g. uploads/3f/a1/3fa1...e9.pdf.
+Notes uploading the same file share the blob, which is deleted along with
+the last note referencing it (see notes.signals).
+
+An upload of the same content may reuse a blob while its last note is being
+deleted, before the new note is saved. Reusing a blob touches it, and unused
+blobs touched within NOTES_FILE_GRACE_PERIOD are kept, then deleted by the
+sweep_files command.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from functools import partial
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+BLOB_RE = re.compile(r"(^|/)([0-9a-f]{2})/([0-9a-f]{2})/\2\3[0-9a-f]{60}(\.\w+)?$")
+
+
+def is_blob(name):
+    """
+    Return whether the stored file name is already content-addressed.
+    """
+    return bool(name and BLOB_RE.search(name))
+
+
+class DeduplicatingStorage(FileSystemStorage):
+    def blob_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest[2:4], digest + extension)
+
+    def get_available_name(self, name, max_length=None):
+        # Blobs are named after their content, an existing name is the same file
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(os.path.dirname(name))
+        os.makedirs(directory, exist_ok=True)
+
+        # Hash the upload while streaming it to a temporary file
+        sha256 = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".upload")
+        try:
+            with os.fdopen(fd, "wb") as temp:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    sha256.update(chunk)
+                    temp.write(chunk)
+
+            name = self.blob_name(name, sha256.hexdigest())
+            full_path = self.path(name)
+            try:
+                # Already stored for another note, touched to be kept
+                os.utime(full_path)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(temp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+            else:
+                os.remove(temp_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name.replace("\\", "/")
+
+
+note_storage = DeduplicatingStorage()
+
+
+def get_note_storage():
+    return note_storage
+
+
+def delete_orphan(name):
+    """
+    Delete the stored file if no note references it, unless it was reused
+    within the grace period, by an upload whose note may not be saved yet.
+    Return whether it was deleted.
+    """
+    from .models import Note
+
+    try:
+        modified = os.path.getmtime(note_storage.path(name))
+    except FileNotFoundError:
+        return False
+    if time.time() - modified < settings.NOTES_FILE_GRACE_PERIOD:
+        return False
+    if Note.all_objects.filter(file=name).exists():
+        return False
+    note_storage.delete(name)
+    return True
+
+
+def release_file(name):
+    """
+    Delete the stored file once the current transaction commits,
+    if no note references it anymore, see delete_orphan.
+    """
+    if name:
+        transaction.on_commit(partial(delete_orphan, name))
@@ -0,0 +1,119 @@
+"""
+This module contains test cases for the load generation & reports of benchmarks.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.test import SimpleTestCase
+from ..benchmarks import compare, percentile, run_load, summarize
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Minimal HTTP server handler, the target of the load tests.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """
+        Answer 404 for /missing, 200 for any other path.
+        """
+        status = 404 if self.path == "/missing" else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        """
+        Don't log every request of the load runs to stderr.
+        """
+        pass
+
+
+class RunLoadTests(SimpleTestCase):
+    """
+    Test suite for run_load, against a local HTTP server.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by starting an HTTP server in a thread.
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        """
+        Stop the local HTTP server.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_sends_every_request(self):
+        """
+        Test that exactly the requested number of requests is sent & timed.
+        """
+        result = run_load(f"{self.url}/", concurrency=4, requests=25)
+        self.assertEqual(result["requests"], 25)
+        self.assertEqual(result["errors"], 0)
+        self.assertGreater(result["rps"], 0)
+        self.assertLessEqual(result["p50"], result["p99"])
+
+    def test_counts_errors(self):
+        """
+        Test that error responses are counted.
+        """
+        result = run_load(f"{self.url}/missing", concurrency=2, requests=5)
+        self.assertEqual(result["errors"], 5)
+
+    def test_percentile(self):
+        """
+        Test that percentiles use the nearest rank.
+        """
+        latencies = list(range(1, 101))
+        self.assertEqual(percentile(latencies, 50), 50)
+        self.assertEqual(percentile(latencies, 99), 99)
+        self.assertEqual(percentile([], 99), 0.0)
+
+
+class ReportTests(SimpleTestCase):
+    """
+    Test suite for summarizing & comparing benchmark results.
+    """
+
+    def test_summarize(self):
+        """
+        Test that latencies are summarized in milliseconds.
+        """
+        result = summarize([0.004, 0.001, 0.002, 0.003], errors=1, elapsed=2)
+        self.assertEqual(result["requests"], 4)
+        self.assertEqual(result["rps"], 2)
+        self.assertAlmostEqual(result["mean"], 2.5)
+        self.assertAlmostEqual(result["p50"], 2)
+        self.assertAlmostEqual(result["p99"], 4)
+
+    def test_compare(self):
+        """
+        Test that only changes beyond the threshold are regressions.
+        """
+        baseline = {
+            "results": [
+                {"scenario": "note", "transport": "http", "rps": 100, "p99": 10},
+                {"scenario": "register", "transport": "http", "rps": 10, "p99": 50},
+            ]
+        }
+        results = [
+            {"scenario": "note", "transport": "http", "rps": 85, "p99": 11},
+            {"scenario": "register", "transport": "http", "rps": 5, "p99": 80},
+            {"scenario": "like_note", "transport": "http", "rps": 1, "p99": 999},
+        ]
+        self.assertEqual(
+            compare(results, baseline, threshold=0.2),
+            [
+                ("register", "http", "rps", 10, 5),
+                ("register", "http", "p99", 50, 80),
+            ],
+        )
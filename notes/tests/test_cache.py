@@ -0,0 +1,262 @@
+"""
+This module contains test cases for the caching of archive pages & note bodies.
+"""
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ..models import Note, Comment, RelatedNote
+from ..cache import cache_stats
+
+
+class ArchiveCacheTests(TestCase):
+    """
+    Test suite for the anonymous archive page cache.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note,
+        starting from an empty cache.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        self.url = reverse("notes:display_notes")
+
+    def test_anonymous_page_served_from_cache(self):
+        """
+        Test that a repeated anonymous request only reads the archive version.
+        """
+        self.client.get(self.url, {"department": "Philosophy"})
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"department": "Philosophy"})
+        self.assertContains(response, "Test Note")
+        self.assertEqual(
+            dict((n, (h, m)) for n, h, m in cache_stats())["archive"], (1, 1)
+        )
+
+    def test_pages_cached_per_query(self):
+        """
+        Test that different filters are cached separately.
+        """
+        self.client.get(self.url, {"department": "Philosophy"})
+        response = self.client.get(self.url, {"department": "Fine Arts"})
+        self.assertNotContains(response, "Test Note")
+
+    def test_new_comment_invalidates_page(self):
+        """
+        Test that a new comment refreshes the cached comment count.
+        """
+        self.client.get(self.url)
+        Comment.objects.create(note=self.note, user=self.user, content="Comment")
+        response = self.client.get(self.url)
+        self.assertContains(response, "Comments: 1")
+
+    def test_like_invalidates_page(self):
+        """
+        Test that a new like refreshes the cached like count.
+        """
+        self.client.get(self.url)
+        self.note.likes.add(self.user)
+        response = self.client.get(self.url)
+        self.assertContains(response, "Likes: 1")
+
+    def test_logged_in_users_not_cached(self):
+        """
+        Test that pages of logged in users are rendered on every request.
+        """
+        self.client.login(username="testuser", password="password123")
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, "notes/notes.html")
+
+
+class NoteBodyCacheTests(TestCase):
+    """
+    Test suite for the note body fragment cache.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note,
+        starting from an empty cache.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="<b>Original content</b>",
+            user=self.user,
+        )
+        self.url = reverse("notes:note", args=[self.note.id])
+
+    def test_body_cached(self):
+        """
+        Test that a cached body saves the query loading the content.
+        """
+        self.client.get(self.url)
+        stats = dict((n, (h, m)) for n, h, m in cache_stats())
+        self.assertEqual(stats["note_body"], (0, 1))
+
+        response = self.client.get(self.url)
+        self.assertContains(response, "<b>Original content</b>", html=True)
+        stats = dict((n, (h, m)) for n, h, m in cache_stats())
+        self.assertEqual(stats["note_body"], (1, 1))
+
+    def test_edit_invalidates_body(self):
+        """
+        Test that editing a note renders its new content.
+        """
+        self.client.get(self.url)
+        self.note.content = "<b>Updated content</b>"
+        self.note.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, "<b>Updated content</b>", html=True)
+
+    def test_stats_in_admin(self):
+        """
+        Test that the hit/miss counters are shown on the notes admin page.
+        """
+        User.objects.create_superuser(username="admin", password="password123")
+        self.client.login(username="admin", password="password123")
+        response = self.client.get(reverse("admin:notes_note_changelist"))
+        self.assertContains(response, "Page cache")
+        self.assertContains(response, "note_body")
+
+
+class ConditionalRequestTests(TestCase):
+    """
+    Test suite for the ETag/Last-Modified validators of the note & archive pages.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating users & a note.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.user2 = User.objects.create_user(
+            username="testuser2", email="testuser2@uoi.gr", password="password456"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        self.url = reverse("notes:note", args=[self.note.id])
+
+    def revalidate(self, url, response):
+        """
+        Request the url again, with the ETag of a previous response.
+        """
+        return self.client.get(url, headers={"if-none-match": response["ETag"]})
+
+    def test_unchanged_note_not_modified(self):
+        """
+        Test that an unchanged note returns 304 without rendering.
+        """
+        response = self.client.get(self.url)
+        self.assertIn("Last-Modified", response)
+        response = self.revalidate(self.url, response)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.templates, [])
+
+    def test_unchanged_note_by_date(self):
+        """
+        Test that If-Modified-Since alone is honoured too.
+        """
+        response = self.client.get(self.url)
+        response = self.client.get(
+            self.url, headers={"if-modified-since": response["Last-Modified"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_note(self):
+        """
+        Test that edits, comments & likes each change the note's ETag.
+        """
+        response = self.client.get(self.url)
+        Comment.objects.create(note=self.note, user=self.user, content="Comment")
+        self.assertEqual(self.revalidate(self.url, response).status_code, 200)
+
+        response = self.client.get(self.url)
+        self.note.likes.add(self.user2)
+        self.assertEqual(self.revalidate(self.url, response).status_code, 200)
+
+        response = self.client.get(self.url)
+        self.note.title = "Edited"
+        self.note.save()
+        self.assertEqual(self.revalidate(self.url, response).status_code, 200)
+
+    def test_etag_varies_per_user(self):
+        """
+        Test that a page cached by one user isn't reused for another.
+        """
+        self.client.login(username="testuser", password="password123")
+        response = self.client.get(self.url)
+        self.assertIn("Cookie", response["Vary"])
+        self.client.login(username="testuser2", password="password456")
+        self.assertEqual(self.revalidate(self.url, response).status_code, 200)
+
+    def test_archive_not_modified(self):
+        """
+        Test that an unchanged archive page returns 304, until a note changes.
+        """
+        url = reverse("notes:display_notes")
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+        Note.objects.create(
+            title="New Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_archive_version_shared_by_processes(self):
+        """
+        Test that a change made by another server process, with its own
+        cache, still changes the archive's ETag.
+        """
+        url = reverse("notes:display_notes")
+        response = self.client.get(url)
+        self.note.likes.add(self.user2)
+        # This process' cache never saw the bump
+        cache.clear()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_related_notes_rebuild_changes_etag(self):
+        """
+        Test that storing new related notes changes the note's ETag.
+        """
+        other = Note.objects.create(
+            title="Other Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        response = self.client.get(self.url)
+        RelatedNote.objects.create(note=self.note, related=other, score=1, rank=1)
+        response = self.revalidate(self.url, response)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Other Note")
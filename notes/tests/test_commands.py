@@ -0,0 +1,604 @@
+"""
+This module contains test cases for the following management commands:
+* reconcile_counters, update_trending_scores, build_related_notes,
+  send_comment_digests, dedupe_files, render_notes, seed_archive,
+  run_benchmarks
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from datetime import timedelta
+from unittest import skipUnless
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth.models import User
+from django.utils import timezone
+from mailer.models import OutgoingEmail
+from users.models import NotificationSettings
+from ..models import AttachmentText, Note, Comment, CommentNotification, RelatedNote
+from ..storage import is_blob, note_storage
+
+
+class ReconcileCountersCommandTests(TestCase):
+    """
+    Test suite for the reconcile_counters command.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a note with a like & a comment.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        self.note.likes.add(self.user)
+        Comment.objects.create(note=self.note, user=self.user, content="Comment")
+
+    def test_fixes_drifted_counters(self):
+        """
+        Test that drifted counters are recomputed from the real rows.
+        """
+        Note.objects.update(like_count=7, comment_count=0)
+        out = StringIO()
+        call_command("reconcile_counters", stdout=out)
+
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.like_count, 1)
+        self.assertEqual(self.note.comment_count, 1)
+        self.assertIn("Fixed 1 drifted note(s).", out.getvalue())
+
+    def test_dry_run(self):
+        """
+        Test that a dry run reports drifted notes without fixing them.
+        """
+        Note.objects.update(like_count=7)
+        out = StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.like_count, 7)
+        self.assertIn("Found 1 drifted note(s).", out.getvalue())
+
+    def test_consistent_counters_untouched(self):
+        """
+        Test that notes with correct counters are not reported.
+        """
+        out = StringIO()
+        call_command("reconcile_counters", stdout=out)
+        self.assertIn("Fixed 0 drifted note(s).", out.getvalue())
+
+
+class UpdateTrendingScoresCommandTests(TestCase):
+    """
+    Test suite for the update_trending_scores command.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating notes, one of them liked.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.notes = [
+            Note.objects.create(
+                title=f"Test Note {i}",
+                department="Philosophy",
+                subject="Modern Philosophy",
+                content="Test content",
+                user=self.user,
+            )
+            for i in range(3)
+        ]
+        self.notes[0].likes.add(self.user)
+
+    def test_scores_notes_in_batches(self):
+        """
+        Test that every note is scored, batch by batch, liked notes higher,
+        and that unchanged scores are left alone on the next run.
+        """
+        out = StringIO()
+        call_command("update_trending_scores", "--batch-size", "2", stdout=out)
+        self.assertIn("Updated 3 trending score(s).", out.getvalue())
+        ranked = list(Note.objects.order_by("-trending_score"))
+        self.assertEqual(ranked[0], self.notes[0])
+
+        out = StringIO()
+        call_command("update_trending_scores", stdout=out)
+        self.assertIn("Updated 0 trending score(s).", out.getvalue())
+
+
+class BuildRelatedNotesCommandTests(TestCase):
+    """
+    Test suite for the build_related_notes command.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating notes of one subject.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.notes = [
+            Note.objects.create(
+                title=f"Graph Note {i}",
+                department="Sciences",
+                subject="Algorithms",
+                content=f"<p>graph search {'tree ' * i}</p>",
+                user=self.user,
+            )
+            for i in range(3)
+        ]
+
+    def test_stores_related_notes(self):
+        """
+        Test that each note gets up to --count related notes, ranked.
+        """
+        out = StringIO()
+        call_command("build_related_notes", "--count", "1", stdout=out)
+        self.assertIn("Stored 3 related note(s).", out.getvalue())
+        self.assertEqual(
+            RelatedNote.objects.get(note=self.notes[1]).related, self.notes[2]
+        )
+
+
+class SendCommentDigestsCommandTests(TestCase):
+    """
+    Test suite for the send_comment_digests command.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating an author on hourly digests,
+        with a note that received three comments.
+        """
+        self.author = User.objects.create_user(
+            username="author", email="author@uoi.gr", password="password123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@uoi.gr", password="password123"
+        )
+        self.settings = NotificationSettings.objects.create(
+            user=self.author,
+            comment_frequency=NotificationSettings.HOURLY,
+            last_digest_at=timezone.now() - timedelta(hours=2),
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.author,
+        )
+        for i in range(3):
+            comment = Comment.objects.create(
+                note=self.note, user=self.reader, content=f"Comment {i}"
+            )
+            CommentNotification.objects.create(receiver=self.author, comment=comment)
+
+    def test_immediate_notifications_are_emailed_one_by_one(self):
+        """
+        Test that users without digests get one email per comment.
+        """
+        NotificationSettings.objects.update(
+            comment_frequency=NotificationSettings.IMMEDIATE
+        )
+        out = StringIO()
+        call_command("send_comment_digests", stdout=out)
+
+        self.assertIn("Queued comment emails for 1 user(s).", out.getvalue())
+        emails = OutgoingEmail.objects.order_by("pk")
+        self.assertEqual(len(emails), 3)
+        for i, email in enumerate(emails):
+            self.assertEqual(email.recipients, ["author@uoi.gr"])
+            self.assertIn(f"Comment {i}", email.html_message)
+        self.assertEqual(CommentNotification.objects.count(), 0)
+
+    def test_due_digest_is_one_email(self):
+        """
+        Test that the due comments are queued as a single email,
+        & the digest window restarts.
+        """
+        call_command("send_comment_digests", stdout=StringIO())
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipients, ["author@uoi.gr"])
+        for i in range(3):
+            self.assertIn(f"Comment {i}", email.html_message)
+        self.assertEqual(CommentNotification.objects.count(), 0)
+        self.settings.refresh_from_db()
+        self.assertGreater(
+            self.settings.last_digest_at, timezone.now() - timedelta(minutes=1)
+        )
+
+    @override_settings(SITE_URL="https://notes.uoi.gr")
+    def test_digest_links_are_absolute(self):
+        """
+        Test that the digest links to the note pages with absolute URLs,
+        as emails have no page to resolve relative ones against.
+        """
+        call_command("send_comment_digests", stdout=StringIO())
+        email = OutgoingEmail.objects.get()
+        self.assertIn(
+            f'href="https://notes.uoi.gr/note/{self.note.id}/"', email.html_message
+        )
+
+    def test_digest_waits_for_its_window(self):
+        """
+        Test that no digest is sent before the window has elapsed.
+        """
+        NotificationSettings.objects.update(last_digest_at=timezone.now())
+        call_command("send_comment_digests", stdout=StringIO())
+        self.assertEqual(OutgoingEmail.objects.count(), 0)
+        self.assertEqual(CommentNotification.objects.count(), 3)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+@skipUnless(connection.vendor == "postgresql", "Row locks require PostgreSQL")
+class OverlappingCommentDigestsTests(TransactionTestCase):
+    """
+    Test suite for send_comment_digests runs overlapping each other.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a note with a comment,
+        whose author is notified of it.
+        """
+        author = User.objects.create_user(
+            username="author", email="author@uoi.gr", password="password123"
+        )
+        note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=author,
+        )
+        comment = Comment.objects.create(note=note, user=author, content="Comment")
+        CommentNotification.objects.create(receiver=author, comment=comment)
+
+    def test_claimed_notifications_skipped(self):
+        """
+        Test that notifications locked by another run aren't emailed again.
+        """
+        locked, released = threading.Event(), threading.Event()
+
+        def other_run():
+            try:
+                with transaction.atomic():
+                    list(CommentNotification.objects.select_for_update())
+                    locked.set()
+                    released.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_run)
+        thread.start()
+        try:
+            locked.wait(5)
+            call_command("send_comment_digests", stdout=StringIO())
+        finally:
+            released.set()
+            thread.join()
+
+        self.assertFalse(OutgoingEmail.objects.exists())
+        self.assertEqual(CommentNotification.objects.count(), 1)
+
+
+class DedupeFilesCommandTests(TestCase):
+    """
+    Test suite for the dedupe_files command.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating two notes with copies
+        of the same file, stored under their uploaded names.
+        """
+        user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.notes = []
+        for name in ("uploads/lecture.pdf", "uploads/lecture_copy.pdf"):
+            FileSystemStorage().save(name, ContentFile(b"same lecture"))
+            self.notes.append(
+                Note.objects.create(
+                    title="Test Note",
+                    department="Philosophy",
+                    subject="Modern Philosophy",
+                    content="Test content",
+                    user=user,
+                )
+            )
+            Note.objects.filter(pk=self.notes[-1].pk).update(file=name)
+
+    def tearDown(self):
+        """
+        Remove the uploaded copies & the blobs they were deduplicated into.
+        """
+        shutil.rmtree(note_storage.location, ignore_errors=True)
+
+    def test_files_are_deduplicated(self):
+        """
+        Test that copies are moved to one blob, keeping their uploaded names.
+        """
+        out = StringIO()
+        call_command("dedupe_files", stdout=out)
+        self.assertIn("Deduplicated 2 file(s).", out.getvalue())
+
+        first, second = Note.objects.order_by("pk")
+        self.assertTrue(is_blob(first.file.name))
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(first.file_name, "lecture.pdf")
+        self.assertEqual(second.file_name, "lecture_copy.pdf")
+        self.assertTrue(note_storage.exists(first.file.name))
+        self.assertFalse(note_storage.exists("uploads/lecture.pdf"))
+
+        out = StringIO()
+        call_command("dedupe_files", stdout=out)
+        self.assertIn("Deduplicated 0 file(s).", out.getvalue())
+
+    def test_extracted_text_follows_file(self):
+        """
+        Test that the text extracted from a moved file is kept for the blob,
+        so the note stays searchable by it.
+        """
+        AttachmentText.objects.create(
+            note=self.notes[0],
+            file="uploads/lecture.pdf",
+            text="Lecture",
+            status=AttachmentText.DONE,
+        )
+        call_command("dedupe_files", stdout=StringIO())
+        attachment = AttachmentText.objects.get()
+        self.assertEqual(attachment.file, Note.objects.get(pk=self.notes[0].pk).file)
+        self.assertEqual(attachment.status, AttachmentText.DONE)
+
+    def test_hidden_notes_moved_too(self):
+        """
+        Test that notes pending deletion are moved to the blob as well,
+        before the file they used is deleted.
+        """
+        Note.all_objects.filter(pk=self.notes[0].pk).update(deleted_at=timezone.now())
+        call_command("dedupe_files", stdout=StringIO())
+        hidden = Note.all_objects.get(pk=self.notes[0].pk)
+        self.assertTrue(is_blob(hidden.file.name))
+        self.assertTrue(note_storage.exists(hidden.file.name))
+
+    def test_dry_run(self):
+        """
+        Test that a dry run reports the files without moving them.
+        """
+        out = StringIO()
+        call_command("dedupe_files", "--dry-run", stdout=out)
+        self.assertIn("Found 2 file(s) to deduplicate.", out.getvalue())
+        self.assertTrue(note_storage.exists("uploads/lecture.pdf"))
+
+
+class RenderNotesCommandTests(TestCase):
+    """
+    Test suite for the render_notes command.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a note saved before
+        its content was pre-rendered.
+        """
+        user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="<p>Text<script>alert(1)</script></p>",
+            user=user,
+        )
+        Note.objects.update(rendered_content="")
+
+    def test_backfills_rendered_content(self):
+        """
+        Test that notes without rendered content are rendered, & only those.
+        """
+        out = StringIO()
+        call_command("render_notes", "--batch-size", "1", stdout=out)
+        self.assertIn("Rendered 1 note(s).", out.getvalue())
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.rendered_content, "<p>Text</p>")
+
+        out = StringIO()
+        call_command("render_notes", stdout=out)
+        self.assertIn("Rendered 0 note(s).", out.getvalue())
+        call_command("render_notes", "--all", stdout=out)
+        self.assertIn("Rendered 1 note(s).", out.getvalue())
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_inline_images(self):
+        """
+        Test that only notes with pasted images are rendered with --inline-images.
+        """
+        self.addCleanup(shutil.rmtree, note_storage.location, ignore_errors=True)
+        Note.objects.update(
+            content='<img src="data:image/gif;base64,R0lGODlhAQABAIAAAP///wAAACH5BAEAAAAALAAAAAABAAEAAAICRAEAOw==">'
+        )
+        out = StringIO()
+        call_command("render_notes", "--inline-images", stdout=out)
+        self.assertIn("Rendered 1 note(s).", out.getvalue())
+        self.note.refresh_from_db()
+        self.assertNotIn("base64", self.note.content)
+        self.assertIn("/media/note_images/", self.note.rendered_content)
+
+        out = StringIO()
+        call_command("render_notes", "--inline-images", stdout=out)
+        self.assertIn("Rendered 0 note(s).", out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class SeedArchiveCommandTests(TestCase):
+    """
+    Test suite for the seed_archive command.
+    """
+
+    def tearDown(self):
+        """
+        Remove the attachments of the seeded notes.
+        """
+        shutil.rmtree(note_storage.location, ignore_errors=True)
+
+    def seed(self, *args):
+        """
+        Run seed_archive on a small archive, return its output.
+        """
+        out = StringIO()
+        call_command(
+            "seed_archive",
+            "--users=5",
+            "--notes=20",
+            "--comments=30",
+            "--likes=40",
+            "--attachments=3",
+            "--batch-size=7",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_seeds_archive(self):
+        """
+        Test that the requested rows are created, with consistent counters
+        & attachments waiting for their text to be extracted.
+        """
+        out = self.seed()
+        self.assertIn(
+            "Seeded 5 users, 20 notes, 30 comments, 40 likes & 3 attachments.", out
+        )
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(Note.likes.through.objects.count(), 40)
+        for note in Note.objects.all():
+            self.assertEqual(note.like_count, note.likes.count())
+            self.assertEqual(note.comment_count, note.comments.count())
+
+        notes = Note.objects.exclude(file="")
+        self.assertEqual(notes.count(), 3)
+        for note in notes:
+            self.assertTrue(note_storage.exists(note.file.name))
+        self.assertEqual(
+            AttachmentText.objects.filter(status=AttachmentText.PENDING).count(), 3
+        )
+        # Spread over the past year
+        self.assertGreater(
+            Note.objects.filter(
+                timestamp__lt=timezone.now() - timedelta(days=1)
+            ).count(),
+            0,
+        )
+
+    def test_seed_is_reproducible(self):
+        """
+        Test that the same seed generates the same notes.
+        """
+        self.seed("--prefix=first")
+        self.seed("--prefix=second")
+        titles = list(Note.objects.order_by("pk").values_list("title", flat=True))
+        self.assertEqual(titles[:20], titles[20:])
+
+    def test_existing_prefix(self):
+        """
+        Test that seeding twice with the same prefix fails.
+        """
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RunBenchmarksCommandTests(TestCase):
+    """
+    Test suite for the run_benchmarks command, through the test client.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by seeding a small archive.
+        """
+        call_command(
+            "seed_archive",
+            "--users=3",
+            "--notes=5",
+            "--comments=5",
+            "--likes=5",
+            "--attachments=0",
+            stdout=StringIO(),
+        )
+        self.output = os.path.join(tempfile.mkdtemp(), "report.json")
+
+    def tearDown(self):
+        """
+        Remove the report & the stored attachments.
+        """
+        shutil.rmtree(os.path.dirname(self.output), ignore_errors=True)
+        shutil.rmtree(note_storage.location, ignore_errors=True)
+
+    def run_benchmarks(self, *args):
+        """
+        Run a short run_benchmarks through the test client.
+        """
+        call_command(
+            "run_benchmarks",
+            "--transport=client",
+            "--requests=2",
+            "--warmup=0",
+            *args,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+    def test_writes_report(self):
+        """
+        Test that every scenario is run without errors & reported as JSON.
+        """
+        self.run_benchmarks(f"--output={self.output}")
+        with open(self.output) as file:
+            report = json.load(file)
+        self.assertEqual(report["counts"]["notes"], 7)
+        self.assertEqual(
+            [result["scenario"] for result in report["results"]],
+            ["display_notes", "note", "like_note", "new_note", "register"],
+        )
+        for result in report["results"]:
+            self.assertEqual(result["requests"], 2)
+            self.assertEqual(result["errors"], 0)
+        self.assertTrue(User.objects.filter(username__startswith="bench-").exists())
+
+    def test_compare_fails_on_regression(self):
+        """
+        Test that runs slower than the baseline beyond the threshold fail.
+        """
+        self.run_benchmarks("--scenario=note", f"--output={self.output}")
+        with open(self.output) as file:
+            report = json.load(file)
+        report["results"][0]["rps"] *= 1000
+        with open(self.output, "w") as file:
+            json.dump(report, file)
+
+        with self.assertRaises(CommandError):
+            self.run_benchmarks("--scenario=note", f"--compare={self.output}")
@@ -0,0 +1,179 @@
+"""
+This module contains test cases for the sanitizing & pre-rendering of note content.
+"""
+
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+from PIL import Image
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ..models import Note
+from ..content import sanitize, extract_inline_images
+from ..storage import note_storage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(width, height, image_format="PNG"):
+    """
+    Return a base64 encoded image of the given size & format.
+    """
+    output = BytesIO()
+    Image.new("RGB", (width, height), "teal").save(output, image_format)
+    return base64.b64encode(output.getvalue()).decode()
+
+
+PIXEL = make_image(1, 1, "GIF")
+
+
+class SanitizeTests(SimpleTestCase):
+    """
+    Test suite for sanitizing the Summernote HTML.
+    """
+
+    def test_unsafe_markup_removed(self):
+        """
+        Test that scripts, event handlers & javascript: links are removed.
+        """
+        html = sanitize(
+            '<p onclick="steal()">Text<script>alert(1)</script></p>'
+            '<a href="javascript:alert(1)">link</a><iframe src="x"></iframe>'
+        )
+        self.assertNotIn("script", html)
+        self.assertNotIn("onclick", html)
+        self.assertNotIn("javascript", html)
+        self.assertNotIn("iframe", html)
+        self.assertIn("<p>Text", html)
+
+    def test_styles_filtered(self):
+        """
+        Test that only allowlisted CSS declarations without URLs are kept.
+        """
+        html = sanitize(
+            '<span style="color: red; position: fixed; '
+            'background-color: url(http://x)">Text</span>'
+        )
+        self.assertEqual(html, '<span style="color: red">Text</span>')
+
+    def test_images_and_links_normalized(self):
+        """
+        Test that images are lazy-loaded & new-tab links get rel=noopener.
+        """
+        html = sanitize(
+            '<img src="/media/a.png"><a href="https://uoi.gr" target="_blank">UOI</a>'
+        )
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('decoding="async"', html)
+        self.assertIn('rel="noopener noreferrer"', html)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RenderedContentTests(TestCase):
+    """
+    Test suite for rendering the content of notes when they're saved.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Remove the saved images.
+        """
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+
+    def test_inline_images_extracted(self):
+        """
+        Test that base64 images are saved to media files & linked instead.
+        """
+        html = extract_inline_images(f'<img src="data:image/gif;base64,{PIXEL}">')
+        self.assertNotIn("base64", html)
+        url = html.split('"')[1]
+        self.assertTrue(url.startswith("/media/note_images/"))
+        self.assertTrue(note_storage.exists(url.removeprefix("/media/")))
+
+    def test_large_images_resized(self):
+        """
+        Test that large images are shrunk, recompressed & get a thumbnail.
+        """
+        with self.settings(NOTES_IMAGE_MAX_SIZE=800, NOTES_IMAGE_THUMBNAIL_WIDTH=200):
+            html = extract_inline_images(
+                f'<img src="data:image/png;base64,{make_image(1600, 1200)}">'
+            )
+        html = sanitize(html)
+        self.assertIn("800w", html)
+        self.assertIn("200w", html)
+        urls = [
+            url.split(" ")[0]
+            for url in html.split('srcset="')[1].split('"')[0].split(", ")
+        ]
+        sizes = []
+        for url in urls:
+            with note_storage.open(url.removeprefix("/media/")) as file:
+                sizes.append(Image.open(file).size)
+        self.assertEqual(sizes, [(200, 150), (800, 600)])
+
+    def test_invalid_images_dropped(self):
+        """
+        Test that pasted data that isn't an image is removed.
+        """
+        html = extract_inline_images(
+            '<img src="data:image/png;base64,bm90IGFuIGltYWdl">'
+        )
+        self.assertEqual(html, '<img src="">')
+
+    def test_content_rendered_on_save(self):
+        """
+        Test that saved notes store their sanitized content,
+        which the note page outputs.
+        """
+        note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="<p>Text<script>alert(1)</script></p>"
+            f'<img src="data:image/gif;base64,{PIXEL}">',
+            user=self.user,
+        )
+        self.assertNotIn("base64", note.content)
+        self.assertNotIn("script", note.rendered_content)
+        self.assertIn('loading="lazy"', note.rendered_content)
+
+        self.client.login(username="testuser", password="password123")
+        response = self.client.get(reverse("notes:note", args=[note.id]))
+        self.assertContains(response, note.rendered_content)
+        self.assertNotContains(response, "alert(1)")
+
+    def test_edit_rerenders_content(self):
+        """
+        Test that editing a note renders its new content.
+        """
+        note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="<p>Old</p>",
+            user=self.user,
+        )
+        self.client.login(username="testuser", password="password123")
+        self.client.post(
+            reverse("notes:edit_note", args=[note.id]),
+            {
+                "title": "Test Note",
+                "department": "Philosophy",
+                "subject": "Modern Philosophy",
+                "content": "<p>New<script>x</script></p>",
+            },
+        )
+        note.refresh_from_db()
+        self.assertEqual(note.rendered_content, "<p>New</p>")
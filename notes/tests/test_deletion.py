@@ -0,0 +1,157 @@
+"""
+This module contains test cases for the background deletion of notes & accounts.
+"""
+
+import shutil
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from users.models import AccountDeletion, NotificationSettings
+from ..deletion import purge_batch, schedule_note_deletion
+from ..models import (
+    AttachmentText,
+    CacheVersion,
+    Comment,
+    CommentNotification,
+    Note,
+)
+from ..storage import note_storage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, NOTES_FILE_GRACE_PERIOD=0)
+class PurgeDeletedTests(TestCase):
+    """
+    Test suite for purging deleted notes & accounts batch by batch.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Remove the files of the notes left after purging.
+        """
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        Set up the test environment by creating an author with a note
+        liked & commented by a reader, who also has a note of their own.
+        """
+        self.author = User.objects.create_user(
+            username="author", email="author@uoi.gr", password="password123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@uoi.gr", password="password123"
+        )
+        self.note = self.create_note(self.author, "lecture.txt")
+        self.other = self.create_note(self.reader, "other.txt")
+        for i in range(3):
+            comment = Comment.objects.create(
+                note=self.note, user=self.reader, content=f"Comment {i}"
+            )
+            CommentNotification.objects.create(receiver=self.author, comment=comment)
+        Comment.objects.create(note=self.other, user=self.author, content="Reply")
+        self.note.likes.add(self.reader)
+        self.other.likes.add(self.author, self.reader)
+
+    def create_note(self, user, name):
+        """
+        Create a note of the user, with a file of the given name.
+        """
+        return Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            file=SimpleUploadedFile(name, f"{name} content".encode()),
+            user=user,
+        )
+
+    def purge(self):
+        """
+        Run purge_deleted in small batches, return its output.
+        """
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("purge_deleted", "--batch-size=2", stdout=out)
+        return out.getvalue()
+
+    def test_note_purged(self):
+        """
+        Test that a deleted note is hidden at once, then deleted along with
+        its comments, notifications, likes & file in batches.
+        """
+        name = self.note.file.name
+        schedule_note_deletion(Note.objects.filter(pk=self.note.pk))
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+        self.assertTrue(note_storage.exists(name))
+
+        out = self.purge()
+        self.assertIn("Purging 1 note(s) & 0 account(s).", out)
+        self.assertIn("Deleted 2 comment(s) on deleted notes.", out)
+        self.assertIn("Deleted 1 comment(s) on deleted notes.", out)
+        self.assertIn("Deleted 1 deleted note(s).", out)
+        self.assertFalse(Note.all_objects.filter(pk=self.note.pk).exists())
+        self.assertFalse(Comment.objects.filter(note_id=self.note.pk).exists())
+        self.assertFalse(CommentNotification.objects.exists())
+        self.assertFalse(AttachmentText.objects.filter(note_id=self.note.pk).exists())
+        self.assertFalse(note_storage.exists(name))
+        # Others are left alone
+        self.assertEqual(self.other.likes.count(), 2)
+        self.assertTrue(note_storage.exists(self.other.file.name))
+
+    def test_account_purged(self):
+        """
+        Test that a deleted account's notes are hidden at once, then its rows
+        deleted & the counters of the notes it commented or liked recomputed.
+        """
+        NotificationSettings.objects.create(user=self.author)
+        AccountDeletion.objects.create(user=self.author)
+        self.assertFalse(Note.objects.filter(user=self.author).exists())
+
+        out = self.purge()
+        self.assertIn("Purging 1 note(s) & 1 account(s).", out)
+        self.assertIn("Deleted 1 comment(s) of deleted accounts.", out)
+        self.assertIn("Deleted 1 like(s) of deleted accounts.", out)
+        self.assertIn("Deleted 1 deleted account(s).", out)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Note.all_objects.filter(user_id=self.author.pk).exists())
+        self.assertFalse(NotificationSettings.objects.exists())
+
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.comment_count, 0)
+        self.assertEqual(self.other.like_count, 1)
+        self.assertEqual(list(self.other.likes.all()), [self.reader])
+
+    def test_interrupted_purge_resumes(self):
+        """
+        Test that a purge stopped after a batch is finished by the next one.
+        """
+        AccountDeletion.objects.create(user=self.author)
+        self.assertEqual(purge_batch(2), (2, "comment(s) on deleted notes"))
+
+        out = self.purge()
+        self.assertIn("Deleted 1 comment(s) on deleted notes.", out)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertIsNone(purge_batch(2))
+
+    def test_note_batch_invalidates_cache_once(self):
+        """
+        Test that a batch of deleted notes invalidates the archive once,
+        rather than once per note.
+        """
+        notes = [self.create_note(self.author, f"note{i}.txt") for i in range(3)]
+        schedule_note_deletion(Note.objects.filter(pk__in=[n.pk for n in notes]))
+        table = CacheVersion._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(purge_batch(10), (3, "deleted note(s)"))
+        bumps = [q for q in queries if q["sql"].startswith(f'UPDATE "{table}"')]
+        self.assertEqual(len(bumps), 1)
+        self.assertFalse(Note.all_objects.filter(pk__in=[n.pk for n in notes]).exists())
@@ -0,0 +1,127 @@
+"""
+This module contains test cases for the download_file view & parse_range.
+"""
+
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import User
+from ..models import Note
+from ..downloads import parse_range
+
+CONTENT = bytes(range(256)) * 1024  # 256 KiB, a few chunks
+
+
+class ParseRangeTests(SimpleTestCase):
+    """
+    Test suite for parsing the Range header.
+    """
+
+    def test_ranges(self):
+        """
+        Test single, open-ended, suffix & invalid ranges, of empty files too.
+        """
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=500-5000", 1000), (500, 999))
+        self.assertIs(parse_range("bytes=1000-", 1000), False)
+        self.assertIs(parse_range("bytes=-100", 0), False)
+        self.assertIs(parse_range("bytes=0-", 0), False)
+        self.assertIsNone(parse_range("bytes=0-1,5-9", 1000))
+        self.assertIsNone(parse_range(None, 1000))
+
+
+class DownloadFileViewTests(TestCase):
+    """
+    Test suite for the download_file view.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note with a file.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            file=SimpleUploadedFile("lecture.pdf", CONTENT),
+            user=self.user,
+        )
+        self.url = reverse("notes:download_file", args=[self.note.id])
+        self.client.login(username="testuser", password="password123")
+
+    def test_redirect_if_not_logged_in(self):
+        """
+        Test that anonymous users are sent to the login page.
+        """
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertRedirects(response, f"{reverse('users:login')}?next={self.url}")
+
+    def test_full_download(self):
+        """
+        Test that the whole file is streamed as an attachment & counted.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertIn("attachment", response["Content-Disposition"])
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.download_count, 1)
+
+    def test_range_download(self):
+        """
+        Test that a byte range is served as partial content,
+        without counting another download.
+        """
+        response = self.client.get(self.url, headers={"range": "bytes=1000-1999"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 1000-1999/{len(CONTENT)}")
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[1000:2000])
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.download_count, 0)
+
+    def test_unsatisfiable_range(self):
+        """
+        Test that a range past the end of the file is rejected.
+        """
+        response = self.client.get(self.url, headers={"range": "bytes=999999999-"})
+        self.assertEqual(response.status_code, 416)
+
+    def test_if_range(self):
+        """
+        Test that a range is only honoured if the file is unchanged.
+        """
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(
+            self.url, headers={"range": "bytes=0-9", "if-range": etag}
+        )
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(
+            self.url, headers={"range": "bytes=0-9", "if-range": '"stale"'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_note_without_file(self):
+        """
+        Test that notes without an attachment return 404.
+        """
+        Note.objects.filter(pk=self.note.pk).update(file="")
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(NOTES_DOWNLOAD_SERVER="x-accel-redirect")
+    def test_accel_redirect(self):
+        """
+        Test that the file is handed off to nginx in X-Accel-Redirect mode.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response["X-Accel-Redirect"], f"/protected-media/{self.note.file.name}"
+        )
+        self.assertEqual(response.content, b"")
@@ -0,0 +1,367 @@
+"""
+This module contains test cases for the live updates of note pages.
+"""
+
+import asyncio
+import json
+import threading
+from unittest import mock
+from django.test import (
+    TestCase,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.core.asgi import get_asgi_application
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.urls import reverse
+from django.contrib.auth.models import User
+from main.asgi import application
+from ..events import LocalBroker, get_broker, note_channel
+from ..likes import set_like
+from ..models import Note, Comment
+
+
+class LocalBrokerTests(SimpleTestCase):
+    """
+    Test suite for fanning events out within the process.
+    """
+
+    async def test_publish_from_another_thread(self):
+        """
+        Test that events published from sync code reach every subscriber.
+        """
+        broker = LocalBroker()
+        first = broker.subscribe("note:1")
+        second = broker.subscribe("note:1")
+        other = broker.subscribe("note:2")
+        await asyncio.to_thread(broker.publish, "note:1", "likes", {"like_count": 1})
+
+        self.assertEqual(await first.get(), ("likes", {"like_count": 1}))
+        self.assertEqual(await second.get(), ("likes", {"like_count": 1}))
+        self.assertTrue(other.queue.empty())
+
+    @override_settings(NOTES_EVENTS_QUEUE_SIZE=2)
+    async def test_slow_subscribers_dropped(self):
+        """
+        Test that a subscriber whose queue is full is dropped,
+        without its backlog.
+        """
+        broker = LocalBroker()
+        subscription = broker.subscribe("note:1")
+        for i in range(3):
+            broker.publish("note:1", "likes", {"like_count": i})
+        await asyncio.sleep(0)
+
+        self.assertIsNone(await subscription.get())
+        self.assertTrue(subscription.dropped)
+
+    async def test_unsubscribe(self):
+        """
+        Test that unsubscribed readers no longer receive events.
+        """
+        broker = LocalBroker()
+        subscription = broker.subscribe("note:1")
+        broker.unsubscribe("note:1", subscription)
+        broker.publish("note:1", "likes", {"like_count": 1})
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.queue.empty())
+        self.assertEqual(broker.channels, {})
+
+
+class PublishTests(TestCase):
+    """
+    Test suite for publishing the changes of notes once committed.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        self.channel = note_channel(self.note.pk)
+
+    def test_new_comment_published(self):
+        """
+        Test that new comments are published, rendered, after the commit.
+        """
+        broker = get_broker()
+        with (
+            mock.patch.object(broker, "has_readers", return_value=True),
+            mock.patch.object(broker, "publish") as publish,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                comment = Comment.objects.create(
+                    note=self.note, user=self.user, content="Live comment"
+                )
+                publish.assert_not_called()
+
+        channel, event, data = publish.call_args.args
+        self.assertEqual((channel, event), (self.channel, "comment"))
+        self.assertEqual(data["id"], comment.pk)
+        self.assertIn("Live comment", data["html"])
+
+    def test_like_count_published(self):
+        """
+        Test that like counts are published when they change.
+        """
+        broker = get_broker()
+        with (
+            mock.patch.object(broker, "has_readers", return_value=True),
+            mock.patch.object(broker, "publish") as publish,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                set_like(self.note.pk, self.user.pk, True)
+            publish.assert_called_once_with(self.channel, "likes", {"like_count": 1})
+
+    def test_like_counts_published_on_account_deletion(self):
+        """
+        Test that the notes liked by a deleted account publish their new
+        like counts, though its likes are gone by the commit.
+        """
+        self.note.likes.add(self.user)
+        reader = User.objects.create_user(
+            username="reader", email="reader@uoi.gr", password="password123"
+        )
+        self.note.likes.add(reader)
+        broker = get_broker()
+        with (
+            mock.patch.object(broker, "has_readers", return_value=True),
+            mock.patch.object(broker, "publish") as publish,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                reader.delete()
+            publish.assert_called_once_with(self.channel, "likes", {"like_count": 1})
+
+    def test_nothing_published_without_readers(self):
+        """
+        Test that changes of notes nobody reads aren't rendered nor queried.
+        """
+        with (
+            mock.patch.object(get_broker(), "publish") as publish,
+            mock.patch("notes.events.render_to_string") as render,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(note=self.note, user=self.user, content="C")
+            with self.captureOnCommitCallbacks() as callbacks:
+                set_like(self.note.pk, self.user.pk, True)
+            with self.assertNumQueries(0):
+                for callback in callbacks:
+                    callback()
+        publish.assert_not_called()
+        render.assert_not_called()
+
+
+class NoteEventsTests(TestCase):
+    """
+    Test suite for streaming the events of a note.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        self.url = reverse("notes:note_events", args=[self.note.id])
+
+    def test_wsgi_stops_reconnects(self):
+        """
+        Test that WSGI workers answer with 204, so browsers don't reconnect.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 204)
+
+    async def test_django_view_streams_events(self):
+        """
+        Test that the view streams published events under ASGI.
+        """
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+
+        get_broker().publish(note_channel(self.note.pk), "likes", {"like_count": 3})
+        chunk = await anext(chunks)
+        self.assertEqual(chunk, b'event: likes\ndata: {"like_count": 3}\n\n')
+        await chunks.aclose()
+
+    @override_settings(NOTES_EVENTS_KEEPALIVE=0.01)
+    async def test_asgi_request_lifecycle(self):
+        """
+        Test that the ASGI application streams events with keep-alives,
+        until the client disconnects, then finishes the request.
+        """
+        application = get_asgi_application()
+        disconnect = asyncio.Event()
+        sent = []
+        finished = []
+        messages = [{"type": "http.request", "body": b""}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        def on_finished(**kwargs):
+            finished.append(kwargs["sender"])
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": self.url,
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+        }
+        # Kept open for the test's transaction, as the test client does
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        request_finished.connect(on_finished)
+        try:
+            task = asyncio.create_task(application(scope, receive, send))
+            async with asyncio.timeout(5):
+                while len(sent) < 3:
+                    await asyncio.sleep(0.01)
+                get_broker().publish(note_channel(self.note.pk), "comment", {"id": 1})
+                while not any(b"event: comment" in m.get("body", b"") for m in sent):
+                    await asyncio.sleep(0.01)
+                disconnect.set()
+                await task
+        finally:
+            request_finished.disconnect(on_finished)
+            request_finished.connect(close_old_connections)
+            request_started.connect(close_old_connections)
+
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertIn((b"Content-Type", b"text/event-stream"), sent[0]["headers"])
+        bodies = [message["body"] for message in sent[1:]]
+        self.assertIn(b": keep-alive\n\n", bodies)
+        self.assertIn(b'event: comment\ndata: {"id": 1}\n\n', bodies)
+        self.assertEqual(get_broker().channels, {})
+        self.assertEqual(len(finished), 1)
+
+    async def test_missing_note(self):
+        """
+        Test that the events of missing notes aren't streamed.
+        """
+        url = reverse("notes:note_events", args=[self.note.id + 1])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+
+class EventsApplicationTests(TransactionTestCase):
+    """
+    Test suite for serving event streams outside Django's request handling.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note,
+        committed, as streams check the note on their own connection.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+
+    async def open_streams(self, note_id, count, disconnect):
+        """
+        Request count streams of the note's events from main.asgi,
+        return their tasks & the lists of messages sent to each.
+        """
+        url = reverse("notes:note_events", args=[note_id])
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": url,
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+        }
+        tasks, sent = [], []
+        for _ in range(count):
+            requests = [{"type": "http.request", "body": b""}]
+            messages = []
+
+            async def receive(requests=requests):
+                if requests:
+                    return requests.pop()
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message, messages=messages):
+                messages.append(message)
+
+            sent.append(messages)
+            tasks.append(asyncio.create_task(application(scope, receive, send)))
+        return tasks, sent
+
+    def test_streams_hold_no_thread(self):
+        """
+        Test that open streams don't hold a thread each, and stop once
+        their clients disconnect.
+        """
+
+        async def run():
+            disconnect = asyncio.Event()
+            threads = threading.active_count()
+            tasks, sent = await self.open_streams(self.note.pk, 20, disconnect)
+            async with asyncio.timeout(5):
+                while not all(len(messages) == 2 for messages in sent):
+                    await asyncio.sleep(0.01)
+                # At most the thread shared by the existence checks
+                self.assertLessEqual(threading.active_count(), threads + 1)
+                get_broker().publish(note_channel(self.note.pk), "likes", {"id": 1})
+                while not all(len(messages) == 3 for messages in sent):
+                    await asyncio.sleep(0.01)
+                disconnect.set()
+                await asyncio.gather(*tasks)
+            return sent
+
+        sent = asyncio.run(run())
+        for messages in sent:
+            self.assertEqual(messages[0]["status"], 200)
+            self.assertEqual(messages[1]["body"], b"retry: 5000\n\n")
+            self.assertEqual(messages[2]["body"], b'event: likes\ndata: {"id": 1}\n\n')
+        self.assertEqual(get_broker().channels, {})
+
+    def test_missing_note(self):
+        """
+        Test that the events of missing notes aren't streamed.
+        """
+
+        async def run():
+            disconnect = asyncio.Event()
+            tasks, sent = await self.open_streams(self.note.pk + 1, 1, disconnect)
+            await asyncio.gather(*tasks)
+            return sent[0]
+
+        sent = asyncio.run(run())
+        self.assertEqual(sent[0]["status"], 404)
@@ -0,0 +1,350 @@
+"""
+This module contains test cases for the text extraction of note files.
+"""
+
+import io
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..extraction import claim_attachments
+from ..models import Note, AttachmentText
+from ..parsers import (
+    ExtractionTimeout,
+    UnsupportedFile,
+    extract_text,
+    extract_text_with_timeout,
+)
+from ..search import search_notes
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class CrashingExecutor:
+    """
+    Stand-in for the pool of worker processes, parsing in this process.
+    A file reading "crash" breaks the pool, failing every file submitted to it.
+    """
+
+    def __init__(self, **kwargs):
+        self.paths = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def submit(self, function, path, *args):
+        self.paths.append(path)
+        return mock.Mock(result=lambda: self.result(function, path, *args))
+
+    def result(self, function, path, *args):
+        """
+        Parse the file, unless the pool was broken.
+        """
+        if any(Path(path).read_bytes() == b"crash" for path in self.paths):
+            raise BrokenProcessPool("A child process terminated abruptly")
+        return function(path, *args)
+
+
+def make_zip(files):
+    """
+    Return a zip file holding the given names & contents.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def make_docx(*paragraphs):
+    """
+    Return a minimal Word document with the given paragraphs.
+    """
+    body = "".join(f"<w:p><w:r><w:t>{p}</w:t></w:r></w:p>" for p in paragraphs)
+    return make_zip(
+        {
+            "word/document.xml": '<w:document xmlns:w="http://schemas.openxmlformats'
+            f'.org/wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>'
+        }
+    )
+
+
+def make_pdf(text):
+    """
+    Return a minimal PDF document showing the given text.
+    """
+    content = zlib.compress(f"BT /F1 12 Tf 72 712 Td ({text}) Tj ET".encode())
+    return (
+        b"%%PDF-1.4\n1 0 obj\n<< /Type /Font /Subtype /Type1 >>\nendobj\n"
+        b"2 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream\n"
+        b"endobj\n%%%%EOF" % (len(content), content)
+    )
+
+
+class ParserTests(SimpleTestCase):
+    """
+    Test suite for the file parsers.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a temporary directory.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def extract(self, name, content, max_chars=1000):
+        """
+        Write the content to a file of the given name, return its text.
+        """
+        path = f"{self.directory}/{name}"
+        with open(path, "wb") as file:
+            file.write(content)
+        return extract_text(path, max_chars)
+
+    def test_plain_text(self):
+        """
+        Test that UTF-8 & Windows-1253 Greek text files are decoded.
+        """
+        self.assertEqual(self.extract("a.txt", "Φιλοσοφία".encode()), "Φιλοσοφία")
+        self.assertEqual(
+            self.extract("b.txt", "Φιλοσοφία".encode("cp1253")), "Φιλοσοφία"
+        )
+
+    def test_plain_text_cut_within_character(self):
+        """
+        Test that UTF-8 text read up to max_chars isn't taken for Windows-1253
+        when the read stops within a Greek letter.
+        """
+        text = self.extract("a.txt", "aΦιλοσοφία".encode(), max_chars=3)
+        self.assertEqual(text, "aΦι")
+
+    def test_word(self):
+        """
+        Test that the paragraphs of a Word document are extracted.
+        """
+        text = self.extract("a.docx", make_docx("Modern Philosophy", "Kant"))
+        self.assertEqual(text, "Modern Philosophy\nKant")
+
+    def test_excel(self):
+        """
+        Test that shared strings & numbers of a spreadsheet are extracted.
+        """
+        content = make_zip(
+            {
+                "xl/workbook.xml": "<workbook/>",
+                "xl/sharedStrings.xml": "<sst><si><t>Grades</t></si></sst>",
+                "xl/worksheets/sheet1.xml": '<worksheet><sheetData><row><c t="s">'
+                "<v>0</v></c><c><v>9.5</v></c></row></sheetData></worksheet>",
+            }
+        )
+        text = self.extract("a.xlsx", content)
+        self.assertIn("Grades", text)
+        self.assertIn("9.5", text)
+        self.assertNotIn("0 ", text)
+
+    def test_pdf(self):
+        """
+        Test that the text drawn in compressed PDF page contents is extracted.
+        """
+        self.assertEqual(self.extract("a.pdf", make_pdf("Lecture 1")), "Lecture 1")
+
+    def test_max_chars(self):
+        """
+        Test that the text is truncated to max_chars.
+        """
+        self.assertEqual(self.extract("a.txt", b"x" * 100, max_chars=10), "x" * 10)
+
+    def test_timeout(self):
+        """
+        Test that a parser running past the timeout is interrupted.
+        """
+        with mock.patch("notes.parsers.extract_text", lambda *args: time.sleep(5)):
+            with self.assertRaises(ExtractionTimeout):
+                extract_text_with_timeout("a.txt", 1000, 1)
+
+    def test_unsupported(self):
+        """
+        Test that unknown & corrupt files are reported as unsupported.
+        """
+        with self.assertRaises(UnsupportedFile):
+            self.extract("a.png", b"\x89PNG")
+        with self.assertRaises(UnsupportedFile):
+            self.extract("a.docx", b"not a zip")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ExtractAttachmentsTests(TestCase):
+    """
+    Test suite for queueing & extracting note files with extract_attachments.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Remove the attachments stored for extraction.
+        """
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a note with a Word file.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.docx = make_docx("Categorical imperative")
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            file=SimpleUploadedFile("lecture.docx", self.docx),
+            user=self.user,
+        )
+
+    def extract(self):
+        """
+        Run extract_attachments with a single worker, return its output.
+        """
+        out = io.StringIO()
+        call_command("extract_attachments", "--workers", "1", stdout=out)
+        return out.getvalue()
+
+    def test_upload_is_queued(self):
+        """
+        Test that an uploaded file is queued for extraction.
+        """
+        attachment = AttachmentText.objects.get(note=self.note)
+        self.assertEqual(attachment.status, AttachmentText.PENDING)
+        self.assertEqual(attachment.file, self.note.file.name)
+
+    def test_extracted_text_is_searchable(self):
+        """
+        Test that the extracted text is stored & matched by the archive search.
+        """
+        self.assertIn("Extracted text from 1 file(s).", self.extract())
+        attachment = AttachmentText.objects.get(note=self.note)
+        self.assertEqual(attachment.status, AttachmentText.DONE)
+        self.assertEqual(attachment.text, "Categorical imperative")
+        self.assertEqual(
+            list(search_notes(Note.objects.all(), "imperative")), [self.note]
+        )
+
+    def test_replaced_file_is_reextracted(self):
+        """
+        Test that only a changed file is extracted again.
+        """
+        self.extract()
+        self.note.save()
+        attachment = AttachmentText.objects.get(note=self.note)
+        self.assertEqual(attachment.status, AttachmentText.DONE)
+
+        self.note.file = SimpleUploadedFile("lecture.docx", make_docx("Hypothetical"))
+        self.note.save()
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.status, AttachmentText.PENDING)
+        self.assertEqual(attachment.text, "")
+
+        self.extract()
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.text, "Hypothetical")
+
+        self.note.file = None
+        self.note.save()
+        self.assertFalse(AttachmentText.objects.filter(note=self.note).exists())
+
+    def test_shared_file_is_extracted_once(self):
+        """
+        Test that notes sharing a file reuse its extracted text.
+        """
+        self.extract()
+        other = Note.objects.create(
+            title="Copy",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            file=SimpleUploadedFile("copy.docx", self.docx),
+            user=self.user,
+        )
+        with mock.patch("notes.extraction.ProcessPoolExecutor") as executor:
+            self.assertIn("Extracted text from 1 file(s).", self.extract())
+        executor.assert_not_called()
+        attachment = AttachmentText.objects.get(note=other)
+        self.assertEqual(attachment.text, "Categorical imperative")
+
+    @override_settings(NOTES_EXTRACTION_RETRY_DELAY=0)
+    def test_crashing_file_retried_alone(self):
+        """
+        Test that a file crashing its worker process is retried until it
+        fails, while the other files of its batch are extracted.
+        """
+        crashing = Note.objects.create(
+            title="Crashing Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            file=SimpleUploadedFile("crash.txt", b"crash"),
+            user=self.user,
+        )
+        with mock.patch("notes.extraction.ProcessPoolExecutor", CrashingExecutor):
+            self.assertIn("Extracted text from 1 file(s).", self.extract())
+        attachment = AttachmentText.objects.get(note=self.note)
+        self.assertEqual(attachment.status, AttachmentText.DONE)
+        self.assertEqual(attachment.attempts, 1)
+        attachment = AttachmentText.objects.get(note=crashing)
+        self.assertEqual(attachment.status, AttachmentText.FAILED)
+        self.assertEqual(attachment.attempts, 3)
+        self.assertIn("BrokenProcessPool", attachment.last_error)
+
+    @override_settings(NOTES_EXTRACTION_MAX_ATTEMPTS=2, NOTES_EXTRACTION_RETRY_DELAY=0)
+    def test_failing_file_gives_up(self):
+        """
+        Test that a file failing to extract is retried, then marked as failed.
+        """
+        self.note.file.storage.delete(self.note.file.name)
+        self.extract()
+        attachment = AttachmentText.objects.get(note=self.note)
+        self.assertEqual(attachment.status, AttachmentText.FAILED)
+        self.assertEqual(attachment.attempts, 2)
+        self.assertIn("FileNotFoundError", attachment.last_error)
+
+    @override_settings(NOTES_EXTRACTION_RETRY_DELAY=60)
+    def test_failing_file_retried_with_backoff(self):
+        """
+        Test that a file failing to extract is only claimed again once its
+        retry delay, doubled on each attempt, is over.
+        """
+        self.note.file.storage.delete(self.note.file.name)
+        before = timezone.now()
+        self.extract()
+        attachment = AttachmentText.objects.get(note=self.note)
+        self.assertEqual(attachment.status, AttachmentText.PENDING)
+        self.assertEqual(attachment.attempts, 1)
+        self.assertGreaterEqual(
+            attachment.next_attempt_at, before + timedelta(seconds=60)
+        )
+        self.assertEqual(claim_attachments(batch_size=10), [])
+
+        AttachmentText.objects.update(next_attempt_at=timezone.now())
+        before = timezone.now()
+        self.extract()
+        attachment.refresh_from_db()
+        self.assertEqual(attachment.attempts, 2)
+        self.assertGreaterEqual(
+            attachment.next_attempt_at, before + timedelta(seconds=120)
+        )
@@ -0,0 +1,85 @@
+"""
+This module contains a load test of concurrent like & unlike requests.
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+from django.test import TransactionTestCase, Client
+from django.urls import reverse
+from django.db import connection
+from django.contrib.auth.models import User
+from ..models import Note
+
+
+@skipUnless(connection.vendor == "postgresql", "Concurrent writes require PostgreSQL")
+class ConcurrentLikesTests(TransactionTestCase):
+    """
+    Test suite for the like counter under parallel requests.
+    """
+
+    USERS = 8
+    REQUESTS_PER_USER = 25
+
+    def setUp(self):
+        """
+        Set up the test environment by creating users & a note.
+        """
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="password123")
+            for i in range(self.USERS)
+        ]
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test note content.",
+            user=self.users[0],
+        )
+        self.url = reverse("notes:like_note", args=[self.note.id])
+
+    def post(self, client, data):
+        """
+        Like the note through the client, from its own thread.
+        """
+        try:
+            return client.post(self.url, data, headers={"accept": "application/json"})
+        finally:
+            # Each thread opens its own database connection
+            connection.close()
+
+    def hammer(self, user):
+        """
+        Send random like, unlike & toggle requests as the user,
+        each of them twice at once like a double click.
+        """
+        client = Client()
+        client.force_login(user)
+        rng = random.Random(user.pk)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for _ in range(self.REQUESTS_PER_USER):
+                    data = rng.choice([{"liked": "true"}, {"liked": "false"}, {}])
+                    responses = [
+                        executor.submit(self.post, client, data) for _ in range(2)
+                    ]
+                    for response in responses:
+                        self.assertEqual(response.result().status_code, 200)
+        finally:
+            connection.close()
+
+    def test_counter_matches_likes(self):
+        """
+        Test that the like counter equals the number of likes
+        after parallel requests from every user.
+        """
+        with ThreadPoolExecutor(max_workers=self.USERS) as executor:
+            for future in [executor.submit(self.hammer, u) for u in self.users]:
+                future.result()
+
+        self.note.refresh_from_db()
+        likes = self.note.likes.count()
+        self.assertEqual(self.note.like_count, likes)
+        self.assertEqual(
+            likes, Note.likes.through.objects.values("user_id").distinct().count()
+        )
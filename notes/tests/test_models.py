@@ -1,13 +1,18 @@
 """
-This module contains test cases for the Note & Comment models.
+This module contains test cases for the Note, Comment & DepartmentCount models.
 The tests cover various aspects of the model, including note & comment creation,
 field validations, foreign key constraints, and the __str__ method.
 """
 
+from io import StringIO
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
-from ..models import Note, Comment
+from ..deletion import schedule_note_deletion
+from ..models import Note, Comment, DepartmentCount
 
 
 class NoteModelTests(TestCase):
@@ -54,6 +59,32 @@ class NoteModelTests(TestCase):
         note.likes.add(self.user)  # 1 likes
         self.assertEqual(note.number_of_likes(), 1)
 
+    def test_like_counter(self):
+        """
+        Test that the stored like counter follows likes being added & removed,
+        including likes removed by deleting the user.
+        """
+        other = User.objects.create_user(username="other", password="password123")
+        note = Note.objects.create(**self.note_data)
+        note.likes.add(self.user)
+        other.liked_notes.add(note)
+        note.refresh_from_db()
+        self.assertEqual(note.like_count, 2)
+
+        note.likes.remove(self.user)
+        note.refresh_from_db()
+        self.assertEqual(note.like_count, 1)
+
+        # Removing likes that don't exist doesn't move the counter
+        note.likes.remove(self.user)
+        self.user.liked_notes.remove(note)
+        note.refresh_from_db()
+        self.assertEqual(note.like_count, 1)
+
+        other.delete()
+        note.refresh_from_db()
+        self.assertEqual(note.like_count, 0)
+
     def test_str_method(self):
         """
         Test that the __str__ method returns the note name.
@@ -113,3 +144,110 @@ class CommentModelTests(TestCase):
         """
         comment = Comment.objects.create(**self.comment_data)
         self.assertIn(comment, self.note.comments.all())
+
+    def test_comment_counter(self):
+        """
+        Test that the stored comment counter follows comments being saved & deleted.
+        """
+        comment = Comment.objects.create(**self.comment_data)
+        Comment.objects.create(**self.comment_data)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.comment_count, 2)
+
+        comment.content = "Edited comment."
+        comment.save()  # Editing a comment doesn't change the count
+        comment.delete()
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.comment_count, 1)
+
+
+class DepartmentCountTests(TestCase):
+    """
+    Test suite for keeping the number of notes per department in sync.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+
+    def create_note(self, department):
+        """
+        Create a note of the given department.
+        """
+        return Note.objects.create(
+            title="Test Note",
+            department=department,
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+
+    def counts(self):
+        """
+        Return the non-zero department counts.
+        """
+        counts = DepartmentCount.objects.filter(count__gt=0)
+        return dict(counts.values_list("department", "count"))
+
+    def test_counts_follow_notes(self):
+        """
+        Test that creating, moving, hiding & deleting notes moves the counts.
+        """
+        first = self.create_note("Philosophy")
+        second = self.create_note("Philosophy")
+        self.assertEqual(self.counts(), {"Philosophy": 2})
+
+        second.department = "Sciences"
+        second.save()
+        self.assertEqual(self.counts(), {"Philosophy": 1, "Sciences": 1})
+
+        schedule_note_deletion(Note.objects.filter(pk=first.pk))
+        schedule_note_deletion(Note.all_objects.filter(pk=first.pk))
+        self.assertEqual(self.counts(), {"Sciences": 1})
+        # Purged after being hidden
+        Note.all_objects.get(pk=first.pk).delete()
+        self.assertEqual(self.counts(), {"Sciences": 1})
+
+        second.delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_rebuild(self):
+        """
+        Test that the rebuild_department_counts command fixes drifted counts.
+        """
+        self.create_note("Philosophy")
+        DepartmentCount.objects.filter(department="Philosophy").update(count=5)
+        DepartmentCount.objects.filter(department="Sciences").update(count=3)
+        out = StringIO()
+        call_command("rebuild_department_counts", stdout=out)
+        self.assertIn("Counted 1 note(s) in 1 department(s).", out.getvalue())
+        self.assertEqual(self.counts(), {"Philosophy": 1})
+
+    def test_save_compares_loaded_values(self):
+        """
+        Test that saving a note compares its department with the one it was
+        loaded or last saved with, without reading its row again, hidden
+        notes included.
+        """
+        note = Note.objects.get(pk=self.create_note("Philosophy").pk)
+        note.department = "Sciences"
+        with CaptureQueriesContext(connection) as queries:
+            note.save()
+        table = Note._meta.db_table
+        self.assertFalse(
+            [q for q in queries if q["sql"].startswith("SELECT") and table in q["sql"]]
+        )
+        self.assertEqual(self.counts(), {"Sciences": 1})
+        note.department = "Philosophy"
+        note.save()
+        self.assertEqual(self.counts(), {"Philosophy": 1})
+
+        schedule_note_deletion(Note.objects.filter(pk=note.pk))
+        hidden = Note.all_objects.get(pk=note.pk)
+        hidden.department = "Sciences"
+        hidden.save()
+        self.assertEqual(hidden._previous_department, "Philosophy")
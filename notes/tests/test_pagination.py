@@ -0,0 +1,68 @@
+"""
+This module contains test cases for the CursorPaginator class.
+"""
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from ..models import Note
+from ..pagination import CursorPaginator
+
+
+class CursorPaginatorTests(TestCase):
+    """
+    Test suite for the keyset CursorPaginator.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating notes sharing one timestamp,
+        so the id tie-breaker is exercised.
+        """
+        user = User.objects.create_user(username="testuser", password="password123")
+        for i in range(7):
+            Note.objects.create(
+                title=f"Note {i}",
+                department="Philosophy",
+                subject="Modern Philosophy",
+                content="Test content",
+                user=user,
+            )
+        Note.objects.update(timestamp=Note.objects.first().timestamp)
+        self.notes = list(Note.objects.order_by("-timestamp", "-id"))
+        self.paginator = CursorPaginator(Note.objects.order_by("-timestamp"), 3)
+
+    def test_walk_forward_and_back(self):
+        """
+        Test that following next cursors visits each note once in order,
+        and previous cursors return the same pages.
+        """
+        pages = [self.paginator.get_page()]
+        while pages[-1].has_next:
+            pages.append(self.paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([note for page in pages for note in page], self.notes)
+        self.assertFalse(pages[0].has_previous)
+
+        back = self.paginator.get_page(pages[2].previous_cursor)
+        self.assertEqual(list(back), list(pages[1]))
+        back = self.paginator.get_page(back.previous_cursor)
+        self.assertEqual(list(back), list(pages[0]))
+        self.assertFalse(back.has_previous)
+
+    def test_cursor_is_signed(self):
+        """
+        Test that a modified cursor is ignored.
+        """
+        cursor = self.paginator.get_page().next_cursor
+        page = self.paginator.get_page(cursor[:-1] + "x")
+        self.assertEqual(list(page), self.notes[:3])
+
+    def test_cursor_of_another_ordering_is_ignored(self):
+        """
+        Test that a cursor of another ordering shows the first page.
+        """
+        cursor = self.paginator.get_page().next_cursor
+        paginator = CursorPaginator(Note.objects.order_by("-like_count"), 3)
+        page = paginator.get_page(cursor)
+        self.assertFalse(page.has_previous)
+        self.assertEqual(len(page), 3)
@@ -0,0 +1,142 @@
+"""
+This module contains query plan regression tests for the hot queries of
+notes.views, run with EXPLAIN against the configured database.
+Each query must be answered from an index, without a sequential/full table scan
+or an extra sort step.
+"""
+
+import re
+from django.test import TestCase
+from django.db import connection
+from django.contrib.auth.models import User
+from ..models import Note, Comment, RelatedNote
+from ..views import _comment_paginator
+
+if connection.vendor == "postgresql":
+    FULL_SCAN = re.compile(
+        r"Seq Scan on (notes_note|notes_comment|notes_relatednote)\b"
+    )
+    SORT = re.compile(r"\bSort\b")
+else:
+    FULL_SCAN = re.compile(
+        r"SCAN (notes_note|notes_comment|notes_relatednote)$", re.MULTILINE
+    )
+    SORT = re.compile(r"USE TEMP B-TREE FOR ORDER BY")
+
+
+class QueryPlanTests(TestCase):
+    """
+    Test suite for the index usage of the archive, note & comment queries.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a note with a comment.
+        On PostgreSQL the planner is told to avoid scans & sorts whenever
+        an index can serve the query, as the test tables are tiny.
+        """
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("SET LOCAL enable_bitmapscan = off")
+                cursor.execute("SET LOCAL enable_sort = off")
+
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        self.comment = Comment.objects.create(
+            note=self.note, user=self.user, content="Comment"
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        """
+        Assert that the queryset's plan uses the given index,
+        without full scans or sorts.
+        """
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertIsNone(FULL_SCAN.search(plan), plan)
+        self.assertIsNone(SORT.search(plan), plan)
+
+    def test_archive_page(self):
+        """
+        Test that the archive page is read in timestamp order from its index.
+        """
+        notes = Note.objects.select_related("user").order_by("-timestamp", "-id")
+        self.assertUsesIndex(notes[:11], "note_timestamp_id_idx")
+
+    def test_archive_page_by_department(self):
+        """
+        Test that a department's archive page is read from its index.
+        """
+        notes = (
+            Note.objects.select_related("user")
+            .filter(department="Philosophy")
+            .order_by("-timestamp", "-id")
+        )
+        self.assertUsesIndex(notes[:11], "note_department_timestamp_idx")
+
+    def test_archive_page_by_trending_score(self):
+        """
+        Test that the trending archive page is read from its index,
+        with or without a department.
+        """
+        notes = Note.objects.select_related("user").order_by("-trending_score", "-id")
+        self.assertUsesIndex(notes[:11], "note_trending_idx")
+        self.assertUsesIndex(
+            notes.filter(department="Philosophy")[:11], "note_department_trending_idx"
+        )
+
+    def test_archive_page_by_likes(self):
+        """
+        Test that the most liked archive page is read from its index,
+        with or without a department.
+        """
+        notes = Note.objects.select_related("user").order_by("-like_count", "-id")
+        self.assertUsesIndex(notes[:11], "note_likes_idx")
+        self.assertUsesIndex(
+            notes.filter(department="Philosophy")[:11], "note_department_likes_idx"
+        )
+
+    def test_notes_with_file(self):
+        """
+        Test that notes with an attachment are read from the partial index.
+        """
+        notes = Note.objects.filter(file__gt="").order_by("-timestamp")
+        self.assertUsesIndex(notes[:11], "note_with_file_idx")
+
+    def test_note_comments(self):
+        """
+        Test that the pages of a note's comments are read in posting order
+        from their index, past the cursor too.
+        """
+        paginator = _comment_paginator(self.note.pk)
+        comments, _, _ = paginator._query(None)
+        self.assertUsesIndex(comments, "comment_note_timestamp_id_idx")
+
+        cursor = paginator._cursor(self.comment, False)
+        comments, _, _ = paginator._query(cursor)
+        self.assertUsesIndex(comments, "comment_note_timestamp_id_idx")
+
+    def test_related_notes(self):
+        """
+        Test that a note's related notes are read in rank order from the index
+        of their unique constraint.
+        """
+        related = (
+            RelatedNote.objects.filter(note=self.note, related__deleted_at=None)
+            .select_related("related")
+            .order_by("rank")
+        )
+        if connection.vendor == "postgresql":
+            self.assertUsesIndex(related, "related_note_rank_unique")
+        else:
+            # SQLite names the indexes of unique constraints itself
+            self.assertUsesIndex(related, "sqlite_autoindex_notes_relatednote")
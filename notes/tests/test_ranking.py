@@ -0,0 +1,76 @@
+"""
+This module contains test cases for the trending scores of notes.
+"""
+
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..models import Comment, Note
+from ..ranking import trending_score, update_trending_scores
+
+
+@override_settings(NOTES_TRENDING_HALF_LIFE=3600, NOTES_TRENDING_COMMENT_WEIGHT=2)
+class TrendingScoreTests(TestCase):
+    """
+    Test suite for computing & storing trending scores.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a note with a like & a comment.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        self.note.likes.add(self.user)
+        Comment.objects.create(note=self.note, user=self.user, content="Comment")
+
+    def test_new_note_is_scored(self):
+        """
+        Test that a new note is scored by its posting time before any update.
+        """
+        self.assertAlmostEqual(
+            self.note.trending_score,
+            trending_score(0, 0, self.note.timestamp),
+            places=2,
+        )
+
+    def test_doubled_points_equal_a_half_life(self):
+        """
+        Test that doubling a note's points ranks it as high as posting it
+        one half-life later.
+        """
+        posted = timezone.now()
+        self.assertAlmostEqual(
+            trending_score(7, 0, posted),
+            trending_score(3, 0, posted + timedelta(hours=1)),
+        )
+        self.assertEqual(trending_score(1, 1, posted), trending_score(3, 0, posted))
+
+    def test_update_matches_python(self):
+        """
+        Test that the scores computed in SQL match the Python ones.
+        """
+        updated = update_trending_scores(Note.objects.all())
+        self.assertEqual(updated, 1)
+        self.note.refresh_from_db()
+        self.assertAlmostEqual(
+            self.note.trending_score,
+            trending_score(1, 1, self.note.timestamp),
+            places=4,
+        )
+
+    def test_unchanged_scores_are_skipped(self):
+        """
+        Test that notes whose score didn't change aren't updated again.
+        """
+        update_trending_scores(Note.objects.all())
+        self.assertEqual(update_trending_scores(Note.objects.all()), 0)
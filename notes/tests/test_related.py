@@ -0,0 +1,135 @@
+"""
+This module contains test cases for the related notes recommendations.
+"""
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from ..models import Note, RelatedNote
+from ..related import (
+    build_related_notes,
+    nearest_neighbours,
+    term_counts,
+    tfidf_vectors,
+)
+
+
+class TfidfTests(TestCase):
+    """
+    Test suite for the TF-IDF vectors & their nearest neighbours.
+    """
+
+    def test_term_counts(self):
+        """
+        Test that the words of the text are counted without markup or numbers,
+        whatever their case & alphabet, and title words weigh more.
+        """
+        counts = term_counts("Algebra", "Math", "<p>Άλγεβρα &amp; algebra 42</p>")
+        self.assertEqual(counts, {"algebra": 4, "άλγεβρα": 1, "math": 2})
+
+    def test_vectors_are_normalized(self):
+        """
+        Test that vectors have unit length, rare terms weigh more,
+        and only the heaviest terms are kept.
+        """
+        vectors = tfidf_vectors(
+            [{"common": 1, "rare": 1}, {"common": 1}, {}], max_terms=1
+        )
+        self.assertEqual(list(vectors[0]), ["rare"])
+        self.assertAlmostEqual(sum(w * w for w in vectors[1].values()), 1)
+        self.assertEqual(vectors[2], {})
+
+    def test_nearest_neighbours(self):
+        """
+        Test that each vector's most similar vectors come first,
+        leaving out itself & vectors sharing no term.
+        """
+        vectors = tfidf_vectors(
+            [
+                {"graph": 2, "tree": 1},
+                {"graph": 1, "tree": 1},
+                {"tree": 1, "proof": 3},
+                {"poem": 1},
+            ]
+        )
+        neighbours = nearest_neighbours(vectors, 2)
+        self.assertEqual([j for j, _ in neighbours[0]], [1, 2])
+        self.assertGreater(neighbours[0][0][1], neighbours[0][1][1])
+        self.assertEqual(neighbours[3], [])
+
+    def test_common_terms_pruned(self):
+        """
+        Test that only the vectors weighing a term the most are found
+        through it, & only through a vector's heaviest terms.
+        """
+        vectors = [
+            {"graph": 1.0},
+            {"graph": 0.9, "tree": 0.1},
+            {"graph": 0.5},
+            {"graph": 0.1, "tree": 0.9},
+        ]
+        neighbours = nearest_neighbours(vectors, 3, max_postings=2)
+        self.assertEqual([j for j, _ in neighbours[2]], [0, 1])
+        neighbours = nearest_neighbours(vectors, 3, query_terms=1)
+        self.assertEqual([j for j, _ in neighbours[3]], [1])
+
+
+class BuildRelatedNotesTests(TestCase):
+    """
+    Test suite for storing the related notes of each note.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating notes of two subjects
+        & another department.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.graphs, self.trees, self.poems, self.other = [
+            Note.objects.create(
+                title=title,
+                department=department,
+                subject=subject,
+                content=content,
+                user=self.user,
+            )
+            for title, department, subject, content in (
+                ("Graphs", "Sciences", "Algorithms", "<p>graph search</p>"),
+                ("Trees", "Sciences", "algorithms", "<p>tree graph search</p>"),
+                ("Poems", "Sciences", "Literature", "<p>graph poems</p>"),
+                ("Graphs", "Engineering", "Algorithms", "<p>graph search</p>"),
+            )
+        ]
+
+    def test_related_notes_share_department_and_subject(self):
+        """
+        Test that notes are only related to notes of the same department &
+        subject, whatever its case.
+        """
+        self.assertEqual(build_related_notes(), 2)
+        self.assertEqual(
+            list(
+                RelatedNote.objects.order_by("note").values_list(
+                    "note", "related", "rank"
+                )
+            ),
+            [(self.graphs.pk, self.trees.pk, 1), (self.trees.pk, self.graphs.pk, 1)],
+        )
+
+    def test_rebuild_replaces_related_notes(self):
+        """
+        Test that rebuilding drops the related notes of notes that moved
+        or whose department has no notes left.
+        """
+        build_related_notes()
+        RelatedNote.objects.create(
+            note=self.other, related=self.graphs, score=1, rank=1
+        )
+        self.trees.subject = "Data Structures"
+        self.trees.save()
+        Note.objects.filter(pk=self.other.pk).update(deleted_at=timezone.now())
+
+        self.assertEqual(build_related_notes(), 0)
+        self.assertFalse(RelatedNote.objects.exists())
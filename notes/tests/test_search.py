@@ -0,0 +1,149 @@
+"""
+This module contains test cases for the notes full-text search:
+* html_to_text, search_notes
+"""
+
+from unittest import skipUnless
+from django.test import TestCase
+from django.db import connection
+from django.contrib.auth.models import User
+from ..models import AttachmentText, Note
+from ..search import html_to_text, search_notes, update_search_vectors
+from ..pagination import CursorPaginator
+
+
+class SearchNotesTests(TestCase):
+    """
+    Test suite for searching notes by title, subject & content.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & sample notes.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.title_match = Note.objects.create(
+            title="Thermodynamics",
+            department="Sciences",
+            subject="Physics",
+            content="<p>Heat &amp; work.</p>",
+            user=self.user,
+        )
+        self.content_match = Note.objects.create(
+            title="Lecture 3",
+            department="Engineering",
+            subject="Mechanics",
+            content="<p>Applying <b>thermodynamics</b> to engines.</p>",
+            user=self.user,
+        )
+        self.subject_match = Note.objects.create(
+            title="Week 1",
+            department="Health Sciences",
+            subject="Physiology",
+            content="<p>Cells.</p>",
+            user=self.user,
+        )
+
+    def test_html_to_text(self):
+        """
+        Test that tags are stripped & entities decoded from note content.
+        """
+        self.assertEqual(html_to_text("<p>Heat &amp; <b>work</b>.</p>"), "Heat & work.")
+
+    def test_search_matches_subject(self):
+        """
+        Test that notes are found by their subject.
+        """
+        results = search_notes(Note.objects.all(), "physiology")
+        self.assertEqual(list(results), [self.subject_match])
+
+    def test_search_matches_content(self):
+        """
+        Test that notes are found by the text of their content.
+        """
+        results = search_notes(Note.objects.all(), "engines")
+        self.assertEqual(list(results), [self.content_match])
+
+    def test_search_no_match(self):
+        """
+        Test that unrelated queries return no notes.
+        """
+        results = search_notes(Note.objects.all(), "astronomy")
+        self.assertEqual(list(results), [])
+
+    @skipUnless(connection.vendor == "postgresql", "Ranking requires PostgreSQL")
+    def test_title_match_ranks_first(self):
+        """
+        Test that a title match ranks above a content match.
+        """
+        results = search_notes(Note.objects.all(), "thermodynamics")
+        self.assertEqual(list(results), [self.title_match, self.content_match])
+
+    @skipUnless(connection.vendor == "postgresql", "Ranking requires PostgreSQL")
+    def test_cursor_pagination_of_ranked_results(self):
+        """
+        Test that ranked results can be paged through with cursors.
+        """
+        results = search_notes(Note.objects.all(), "thermodynamics")
+        first = CursorPaginator(results, 1).get_page()
+        second = CursorPaginator(results, 1).get_page(first.next_cursor)
+        self.assertEqual(list(first) + list(second), list(results))
+        self.assertFalse(second.has_next)
+
+    @skipUnless(connection.vendor == "postgresql", "Vectors require PostgreSQL")
+    def test_search_vector_updated_on_save(self):
+        """
+        Test that editing a note refreshes its search vector.
+        """
+        self.subject_match.content = "<p>Neurons.</p>"
+        self.subject_match.save()
+        results = search_notes(Note.objects.all(), "neurons")
+        self.assertEqual(list(results), [self.subject_match])
+
+    @skipUnless(connection.vendor == "postgresql", "Vectors require PostgreSQL")
+    def test_bulk_vectors_match_saved_ones(self):
+        """
+        Test that vectors stored in bulk are the ones stored on save,
+        with the text extracted from the note's file.
+        """
+        Note.objects.filter(pk=self.subject_match.pk).update(file="notes/week1.txt")
+        AttachmentText.objects.create(
+            note=self.subject_match,
+            file="notes/week1.txt",
+            text="Mitochondria",
+            status=AttachmentText.DONE,
+        )
+        Note.objects.update(search_vector=None)
+        update_search_vectors(Note.objects.all())
+        results = search_notes(Note.objects.all(), "mitochondria")
+        self.assertEqual(list(results), [self.subject_match])
+        bulk = dict(Note.objects.values_list("pk", "search_vector"))
+        for note in Note.objects.all():
+            note.save()
+        self.assertEqual(dict(Note.objects.values_list("pk", "search_vector")), bulk)
+
+    @skipUnless(connection.vendor == "postgresql", "Trigrams require PostgreSQL")
+    def test_misspelled_query_falls_back_to_trigrams(self):
+        """
+        Test that a misspelled title still finds the note.
+        """
+        results = search_notes(Note.objects.all(), "Thermodynamcs")
+        self.assertEqual(list(results)[0], self.title_match)
+
+    @skipUnless(connection.vendor == "postgresql", "Trigrams require PostgreSQL")
+    def test_department_filtered_before_fallback(self):
+        """
+        Test that full-text matches in other departments don't prevent the
+        trigram fallback within the selected one.
+        """
+        similar = Note.objects.create(
+            title="Thermodynamic",
+            department="Health Sciences",
+            subject="Biochemistry",
+            content="<p>Energy.</p>",
+            user=self.user,
+        )
+        results = search_notes(Note.objects.all(), "thermodynamics", "Health Sciences")
+        self.assertEqual(list(results), [similar])
@@ -0,0 +1,152 @@
+"""
+This module contains test cases for the deduplicating storage of note files.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import User
+from ..models import Note
+from ..storage import is_blob, note_storage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, NOTES_FILE_GRACE_PERIOD=0)
+class DeduplicatingStorageTests(TestCase):
+    """
+    Test suite for storing & releasing deduplicated note files.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Remove the blobs stored under the temporary media root.
+        """
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+
+    def create_note(self, filename, content, user=None):
+        """
+        Create a note with a file of the given name & content.
+        """
+        return Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            file=SimpleUploadedFile(filename, content),
+            user=user or self.user,
+        )
+
+    def test_identical_uploads_share_a_file(self):
+        """
+        Test that the same content is stored once under its digest,
+        keeping the uploaded names.
+        """
+        first = self.create_note("lecture.pdf", b"same lecture")
+        second = self.create_note("Lecture 1 (copy).PDF", b"same lecture")
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(is_blob(first.file.name))
+        self.assertTrue(first.file.name.endswith(".pdf"))
+        self.assertEqual(first.file_name, "lecture.pdf")
+        self.assertEqual(second.file_name, "Lecture 1 (copy).PDF")
+
+        other = self.create_note("lecture.pdf", b"another lecture")
+        self.assertNotEqual(other.file.name, first.file.name)
+
+    def test_file_deleted_with_last_note(self):
+        """
+        Test that a shared file is only deleted along with the last note using it.
+        """
+        first = self.create_note("lecture.pdf", b"same lecture")
+        second = self.create_note("lecture.pdf", b"same lecture")
+        name = first.file.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(note_storage.exists(name))
+
+        self.client.login(username="testuser", password="password123")
+        self.client.post(reverse("notes:delete_note", args=[second.id]))
+        self.assertTrue(note_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("purge_deleted", stdout=StringIO())
+        self.assertFalse(note_storage.exists(name))
+
+    @override_settings(NOTES_FILE_GRACE_PERIOD=60)
+    def test_recent_file_kept_until_swept(self):
+        """
+        Test that an unused file uploaded within the grace period is kept,
+        as a note reusing it may not be saved yet, then swept once it's over.
+        """
+        note = self.create_note("lecture.pdf", b"my lecture")
+        name = note.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            note.delete()
+        self.assertTrue(note_storage.exists(name))
+
+        call_command("sweep_files", stdout=StringIO())
+        self.assertTrue(note_storage.exists(name))
+        past = time.time() - 120
+        os.utime(note_storage.path(name), (past, past))
+        out = StringIO()
+        call_command("sweep_files", stdout=out)
+        self.assertIn("Deleted 1 unused file(s).", out.getvalue())
+        self.assertFalse(note_storage.exists(name))
+
+    @override_settings(NOTES_FILE_GRACE_PERIOD=60)
+    def test_reused_file_touched(self):
+        """
+        Test that uploading the content of an existing file restarts its
+        grace period, and that files in use are never swept.
+        """
+        name = self.create_note("lecture.pdf", b"my lecture").file.name
+        past = time.time() - 120
+        os.utime(note_storage.path(name), (past, past))
+        self.create_note("copy.pdf", b"my lecture")
+        self.assertGreater(os.path.getmtime(note_storage.path(name)), past)
+
+        os.utime(note_storage.path(name), (past, past))
+        call_command("sweep_files", stdout=StringIO())
+        self.assertTrue(note_storage.exists(name))
+
+    def test_file_deleted_with_account(self):
+        """
+        Test that files are released when the notes cascade with their user.
+        """
+        name = self.create_note("lecture.pdf", b"my lecture").file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertFalse(note_storage.exists(name))
+
+    def test_replaced_file_released(self):
+        """
+        Test that replacing a note's file deletes the old one if unused.
+        """
+        note = self.create_note("lecture.pdf", b"first draft")
+        name = note.file.name
+        note.file = SimpleUploadedFile("lecture.pdf", b"second draft")
+        with self.captureOnCommitCallbacks(execute=True):
+            note.save()
+        self.assertNotEqual(note.file.name, name)
+        self.assertFalse(note_storage.exists(name))
+        self.assertTrue(note_storage.exists(note.file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            note.save()
+        self.assertTrue(note_storage.exists(note.file.name))
@@ -0,0 +1,162 @@
+"""
+This module contains test cases for exporting & importing the notes archive.
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from zipfile import ZipFile
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from ..models import AttachmentText, Comment, Note
+from ..storage import note_storage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TransferTests(TestCase):
+    """
+    Test suite for the export_notes & import_notes commands.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Remove the files of the exported & imported notes.
+        """
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        Set up the test environment by creating notes of two departments,
+        one with a file, a comment & a like.
+        """
+        self.author = User.objects.create_user(
+            username="author", email="author@uoi.gr", password="password123"
+        )
+        self.reader = User.objects.create_user(
+            username="reader", email="reader@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Lecture 1",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="<p>Text</p>",
+            file=SimpleUploadedFile("lecture.txt", b"Lecture notes"),
+            user=self.author,
+        )
+        self.posted_at = datetime(2024, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        Note.objects.filter(pk=self.note.pk).update(timestamp=self.posted_at)
+        Comment.objects.create(note=self.note, user=self.reader, content="Thanks")
+        self.note.likes.add(self.reader)
+        Note.objects.create(
+            title="Lab 1",
+            department="Sciences",
+            subject="Physics",
+            content="<p>Lab</p>",
+            user=self.reader,
+        )
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "archive.zip")
+
+    def tearDown(self):
+        """
+        Remove the exported archive.
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def export(self, *args):
+        """
+        Run export_notes into the archive, return its output.
+        """
+        out = StringIO()
+        call_command("export_notes", self.path, *args, stdout=out)
+        return out.getvalue()
+
+    def import_(self):
+        """
+        Run import_notes on the archive, return its output.
+        """
+        out = StringIO()
+        call_command("import_notes", self.path, "--batch-size=1", stdout=out)
+        return out.getvalue()
+
+    def test_round_trip(self):
+        """
+        Test that exported notes are imported with their comments, likes,
+        files & timestamps, remapped to the imported rows.
+        """
+        self.assertIn(
+            "Exported 2 note(s), 1 comment(s), 1 like(s), 1 file(s) & 2 user(s)",
+            self.export(),
+        )
+        Note.objects.all().delete()
+        User.objects.filter(username="reader").delete()
+
+        self.assertIn(
+            "Imported 2 note(s), 1 comment(s), 1 like(s), 1 file(s) & 1 new user(s).",
+            self.import_(),
+        )
+        note = Note.objects.get(title="Lecture 1")
+        reader = User.objects.get(username="reader")
+        self.assertEqual(note.user, self.author)
+        self.assertEqual(note.rendered_content, "<p>Text</p>")
+        self.assertEqual(note.timestamp, self.posted_at)
+        self.assertEqual(note.file_name, "lecture.txt")
+        with note_storage.open(note.file.name) as file:
+            self.assertEqual(file.read(), b"Lecture notes")
+        self.assertTrue(
+            AttachmentText.objects.filter(
+                note=note, status=AttachmentText.PENDING
+            ).exists()
+        )
+        self.assertEqual(note.comments.get().user, reader)
+        self.assertEqual(list(note.likes.all()), [reader])
+        self.assertEqual((note.like_count, note.comment_count), (1, 1))
+        # Imported users can't log in until they reset their password
+        self.assertFalse(reader.has_usable_password())
+
+    def test_duplicate_likes_counted_once(self):
+        """
+        Test that likes skipped as duplicates aren't reported as imported.
+        """
+        self.export()
+        with ZipFile(self.path) as archive:
+            entries = {name: archive.read(name) for name in archive.namelist()}
+        entries["likes.ndjson"] *= 2
+        with ZipFile(self.path, "w") as archive:
+            for name, data in entries.items():
+                archive.writestr(name, data)
+        Note.objects.all().delete()
+
+        self.assertIn("1 like(s)", self.import_())
+
+    def test_filters(self):
+        """
+        Test that only notes of the departments & dates are exported.
+        """
+        self.export("--department=Philosophy")
+        with ZipFile(self.path) as archive:
+            self.assertEqual(len(archive.read("notes.ndjson").splitlines()), 1)
+        self.assertIn("Exported 1 note(s)", self.export("--since=2024-03-02"))
+        self.assertIn("Exported 1 note(s)", self.export("--until=2024-03-01"))
+        self.assertIn(
+            "Exported 0 note(s)",
+            self.export("--until=2024-03-01", "--department=Sciences"),
+        )
+
+    def test_invalid_archive(self):
+        """
+        Test that files that aren't notes archives are rejected.
+        """
+        with ZipFile(self.path, "w") as archive:
+            archive.writestr("notes.ndjson", "")
+        with self.assertRaises(CommandError):
+            self.import_()
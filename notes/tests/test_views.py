@@ -1,13 +1,20 @@
 """
 This module contains test cases for the following views:
-* display_notes, note, new_note, edit_note, delete_note
+* display_notes, note, note_comments, like_note, new_note, edit_note, delete_note
 """
 
-from django.test import TestCase, Client
+from io import StringIO
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth.models import User
-from ..models import Note
+from django.utils import timezone
+from django.core import mail
+from django.core.management import call_command
+from mailer.models import OutgoingEmail
+from ..models import Note, Comment, CommentNotification, RelatedNote
 
 
 class DisplayNotesViewTests(TestCase):
@@ -83,6 +90,24 @@ class DisplayNotesViewTests(TestCase):
         )
         self.assertEqual(len(response.context["page_obj"]), 1)
 
+    def test_department_counts(self):
+        """
+        Test that the department dropdown shows the number of notes of each,
+        the same when searching, as they aren't counted over the matches.
+        """
+        response = self.client.get(reverse("notes:display_notes"))
+        departments = {key: count for key, _, count in response.context["departments"]}
+        self.assertEqual(departments["Philosophy"], 1)
+        self.assertEqual(departments["Fine Arts"], 0)
+        self.assertContains(response, "Health Sciences (1)</option>")
+
+        response = self.client.get(
+            reverse("notes:display_notes"), {"search_query": "Note 2"}
+        )
+        departments = {key: count for key, _, count in response.context["departments"]}
+        self.assertEqual(departments["Informatics and Telecommunications"], 1)
+        self.assertEqual(departments["Philosophy"], 1)
+
     def test_pagination(self):
         """
         Test that the view paginates notes, displaying a maximum of 10 per page.
@@ -105,6 +130,149 @@ class DisplayNotesViewTests(TestCase):
         response = self.client.get(reverse("notes:display_notes"), {"page": 2})
         self.assertEqual(len(response.context["page_obj"]), 2)
 
+    def test_annotated_counts(self):
+        """
+        Test that each listed note carries its comment & like counts.
+        """
+        note = self.notes[0]
+        note.likes.add(self.user)
+        Comment.objects.create(note=note, user=self.user, content="Comment 1")
+        Comment.objects.create(note=note, user=self.user, content="Comment 2")
+
+        response = self.client.get(
+            reverse("notes:display_notes"), {"department": "Philosophy"}
+        )
+        listed = response.context["page_obj"][0]
+        self.assertEqual(listed.comment_count, 2)
+        self.assertEqual(listed.like_count, 1)
+        self.assertContains(response, "Comments: 2 | Likes: 1")
+
+    def test_query_count_is_constant(self):
+        """
+        Test that the number of queries per page doesn't grow with the data.
+        """
+        for i in range(20):
+            note = Note.objects.create(
+                title=f"Busy Note {i}",
+                department="Philosophy",
+                subject="Modern Philosophy",
+                content="Test note content",
+                user=self.user,
+            )
+            note.likes.add(self.user)
+            Comment.objects.create(note=note, user=self.user, content="Comment")
+
+        # The archive version of the ETag, a single SELECT for a cursor page,
+        # no COUNT, and one of the precomputed department counts
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("notes:display_notes"))
+        with self.assertNumQueries(3):
+            self.client.get(
+                reverse("notes:display_notes"),
+                {"cursor": response.context["page_obj"].next_cursor},
+            )
+
+        # The archive version, a COUNT for the paginator, a SELECT for the
+        # page & the department counts
+        with self.assertNumQueries(4):
+            self.client.get(reverse("notes:display_notes"), {"page": 2})
+
+    def test_content_not_loaded(self):
+        """
+        Test that the archive doesn't fetch the (possibly large) note content.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("notes:display_notes"))
+        for query in queries:
+            self.assertNotIn('"content"', query["sql"])
+            self.assertNotIn('"rendered_content"', query["sql"])
+
+    def test_cursor_pagination_keeps_filters(self):
+        """
+        Test that the next & previous page links keep the department filter,
+        and walk through every matching note once.
+        """
+        for i in range(14):
+            Note.objects.create(
+                title=f"Test Note {i}",
+                department="Philosophy",
+                subject="Modern Philosophy",
+                content="Test note content",
+                user=self.user,
+            )
+        url = reverse("notes:display_notes")
+
+        first = self.client.get(url, {"department": "Philosophy"})
+        self.assertEqual(len(first.context["page_obj"]), 10)
+        self.assertEqual(first.context["previous_query"], "")
+        next_query = first.context["next_query"]
+        self.assertIn("department=Philosophy", next_query)
+
+        second = self.client.get(f"{url}?{next_query}")
+        self.assertEqual(len(second.context["page_obj"]), 5)  # 14 + "Note 1"
+        self.assertEqual(second.context["next_query"], "")
+        seen = list(first.context["page_obj"]) + list(second.context["page_obj"])
+        self.assertEqual(len(set(seen)), 15)
+
+        previous = self.client.get(f"{url}?{second.context['previous_query']}")
+        self.assertEqual(
+            list(previous.context["page_obj"]), list(first.context["page_obj"])
+        )
+
+    def test_sort_by_trending_and_likes(self):
+        """
+        Test that the trending & most liked orderings list the scored & liked
+        notes first, and keep the ordering on the page links.
+        """
+        liked = self.notes[0]
+        liked.likes.add(self.user)
+        Comment.objects.create(note=liked, user=self.user, content="Comment")
+        call_command("update_trending_scores", stdout=StringIO())
+        for i in range(10):
+            Note.objects.create(
+                title=f"Test Note {i}",
+                department="Philosophy",
+                subject="Modern Philosophy",
+                content="Test note content",
+                user=self.user,
+            )
+        url = reverse("notes:display_notes")
+
+        latest = self.client.get(url)
+        self.assertNotIn(liked, latest.context["page_obj"])
+
+        top = self.client.get(url, {"sort": "top"})
+        self.assertEqual(top.context["page_obj"][0], liked)
+        self.assertIn("sort=top", top.context["next_query"])
+
+        trending = self.client.get(url, {"sort": "trending"})
+        self.assertEqual(trending.context["page_obj"][0], liked)
+        self.assertContains(trending, '<option value="trending" selected>')
+        # Notes without likes or comments follow, latest first
+        self.assertEqual(trending.context["page_obj"][1], Note.objects.latest("pk"))
+
+        trending = self.client.get(url, {"sort": "trending", "department": "Sciences"})
+        self.assertEqual(len(trending.context["page_obj"]), 0)
+
+    def test_unknown_sort_is_ignored(self):
+        """
+        Test that an unknown ordering lists the latest notes.
+        """
+        response = self.client.get(reverse("notes:display_notes"), {"sort": "title"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["page_obj"][0], self.notes[-1])
+        self.assertIsNone(response.context["sort"])
+
+    def test_invalid_cursor_shows_first_page(self):
+        """
+        Test that a tampered cursor falls back to the first page.
+        """
+        response = self.client.get(
+            reverse("notes:display_notes"), {"cursor": "not-a-cursor"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["page_obj"]), 3)
+
 
 class NoteViewTests(TestCase):
     """
@@ -180,6 +348,268 @@ class NoteViewTests(TestCase):
         self.client.post(self.url, {"content": "This is a test comment."})
         self.assertEqual(self.note.comments.count(), 1)
 
+    def test_comment_notification_is_queued(self):
+        """
+        Test that a comment by another user queues a notification to the note's
+        author, emailed by the worker instead of during the request.
+        """
+        User.objects.create_user(username="testuser2", password="password456")
+        self.client.login(username="testuser2", password="password456")
+        self.client.post(self.url, {"content": "This is a test comment."})
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.count(), 0)
+        notification = CommentNotification.objects.get()
+        self.assertEqual(notification.receiver, self.user)
+        self.assertEqual(notification.comment.content, "This is a test comment.")
+
+    @override_settings(NOTES_COMMENTS_PER_PAGE=2)
+    def test_comments_are_paginated(self):
+        """
+        Test that the note page only shows the first comments, oldest first,
+        and links to the next ones.
+        """
+        for i in range(3):
+            Comment.objects.create(note=self.note, user=self.user, content=f"C{i}")
+        response = self.client.get(self.url)
+        self.assertEqual(
+            [comment.content for comment in response.context["comments"]],
+            ["C0", "C1"],
+        )
+        self.assertContains(response, "Load more comments")
+
+    def test_comment_authors_are_joined(self):
+        """
+        Test that the number of queries doesn't grow with the comment authors.
+        """
+        Comment.objects.create(note=self.note, user=self.user, content="Comment")
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        for i in range(5):
+            author = User.objects.create_user(username=f"author{i}")
+            Comment.objects.create(note=self.note, user=author, content="Comment")
+        with self.assertNumQueries(len(queries)):
+            self.client.get(self.url)
+
+    def test_related_notes(self):
+        """
+        Test that the page lists the precomputed related notes, most similar
+        first, leaving out deleted ones, in a single query.
+        """
+        related = [
+            Note.objects.create(
+                title=f"Related Note {i}",
+                department="Philosophy",
+                subject="Modern Philosophy",
+                content="Test content",
+                user=self.user,
+            )
+            for i in range(3)
+        ]
+        for rank, note in enumerate(related, 1):
+            RelatedNote.objects.create(
+                note=self.note, related=note, score=1 / rank, rank=rank
+            )
+        Note.objects.filter(pk=related[1].pk).update(deleted_at=timezone.now())
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["related_notes"], [related[0], related[2]])
+        self.assertContains(response, "[Modern Philosophy] Related Note 0")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(
+            sum('FROM "notes_relatednote"' in query["sql"] for query in queries), 1
+        )
+
+
+class AsyncViewTests(TestCase):
+    """
+    Test suite for serving the async views under ASGI.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+
+    async def test_views_render(self):
+        """
+        Test that the archive & note pages render for logged in users,
+        without loading the user lazily from sync code.
+        """
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("notes:display_notes"))
+        self.assertContains(response, "Test Note")
+        response = await self.async_client.get(
+            reverse("notes:note", args=[self.note.id])
+        )
+        self.assertContains(response, "Test content")
+        self.assertContains(response, "testuser")
+
+    async def test_like_note(self):
+        """
+        Test that liking a note answers with the new like count.
+        """
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            reverse("notes:like_note", args=[self.note.id]),
+            {"liked": "true"},
+            headers={"Accept": "application/json"},
+        )
+        self.assertEqual(response.json(), {"liked": True, "like_count": 1})
+
+    async def test_not_modified(self):
+        """
+        Test that the async ETag validators answer unchanged pages with 304.
+        """
+        url = reverse("notes:note", args=[self.note.id])
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(
+            url, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class NoteCommentsViewTests(TestCase):
+    """
+    Test suite for the note_comments view.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a note with 5 comments.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test content",
+            user=self.user,
+        )
+        for i in range(5):
+            Comment.objects.create(note=self.note, user=self.user, content=f"C{i}")
+        self.url = reverse("notes:note_comments", args=[self.note.id])
+
+    @override_settings(NOTES_COMMENTS_PER_PAGE=2)
+    def test_pages_through_comments(self):
+        """
+        Test that following the "Load more" links returns every comment once,
+        as fragments without the page layout.
+        """
+        response = self.client.get(reverse("notes:note", args=[self.note.id]))
+        contents = [comment.content for comment in response.context["comments"]]
+        comments = response.context["comments"]
+        while comments.has_next:
+            # Whether the note is visible, then the page
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url, {"cursor": comments.next_cursor})
+            self.assertTemplateUsed(response, "notes/comment_list.html")
+            self.assertTemplateNotUsed(response, "notes/base.html")
+            comments = response.context["comments"]
+            contents += [comment.content for comment in comments]
+        self.assertEqual(contents, [f"C{i}" for i in range(5)])
+        self.assertNotContains(response, "Load more comments")
+
+    def test_deleted_note_not_found(self):
+        """
+        Test that the comments of deleted & missing notes aren't served.
+        """
+        Note.objects.filter(pk=self.note.pk).update(deleted_at=timezone.now())
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        url = reverse("notes:note_comments", args=[self.note.id + 1])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class LikeNoteViewTests(TestCase):
+    """
+    Test suite for the like_note view.
+    """
+
+    def setUp(self):
+        """
+        Set up the test environment by creating a user & a note.
+        """
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@uoi.gr", password="password123"
+        )
+        self.note = Note.objects.create(
+            title="Test Note",
+            department="Philosophy",
+            subject="Modern Philosophy",
+            content="Test note content.",
+            user=self.user,
+        )
+        self.url = reverse("notes:like_note", args=[self.note.id])
+        self.client.login(username="testuser", password="password123")
+
+    def like(self, liked=None):
+        """
+        Like the note, as a JSON request, return the response data.
+        """
+        data = {} if liked is None else {"liked": liked}
+        response = self.client.post(
+            self.url, data, headers={"accept": "application/json"}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_login_required(self):
+        """
+        Test that anonymous users can't like notes.
+        """
+        self.client.logout()
+        response = self.client.post(self.url, {"liked": "true"})
+        self.assertRedirects(response, f"{reverse('users:login')}?next={self.url}")
+        self.assertEqual(self.note.likes.count(), 0)
+
+    def test_post_required(self):
+        """
+        Test that GET requests don't like the note.
+        """
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+    def test_like_is_idempotent(self):
+        """
+        Test that repeated like & unlike requests only count once.
+        """
+        self.assertEqual(self.like("true"), {"liked": True, "like_count": 1})
+        self.assertEqual(self.like("true"), {"liked": True, "like_count": 1})
+        self.assertEqual(self.note.likes.count(), 1)
+        self.assertEqual(self.like("false"), {"liked": False, "like_count": 0})
+        self.assertEqual(self.like("false"), {"liked": False, "like_count": 0})
+        self.assertEqual(self.note.likes.count(), 0)
+
+    def test_toggle_without_state(self):
+        """
+        Test that requests without the wanted state toggle the like.
+        """
+        self.assertTrue(self.like()["liked"])
+        self.assertFalse(self.like()["liked"])
+
+    def test_form_submit_redirects(self):
+        """
+        Test that the like form without JavaScript redirects to the note.
+        """
+        response = self.client.post(self.url, {"liked": "true"})
+        self.assertRedirects(response, reverse("notes:note", args=[self.note.id]))
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.like_count, 1)
+
 
 class NewNoteViewTests(TestCase):
     """
@@ -365,9 +795,12 @@ class DeleteNoteViewTests(TestCase):
         """
         response = self.client.post(self.url)
 
-        # Check the note no longer exists
+        # Check the note is hidden at once, until it's purged
         self.assertFalse(Note.objects.filter(id=self.note.id).exists())
+        self.assertTrue(Note.all_objects.filter(id=self.note.id).exists())
         self.assertRedirects(response, reverse("notes:display_notes"))
+        response = self.client.get(reverse("notes:note", args=[self.note.id]))
+        self.assertEqual(response.status_code, 404)
 
     def test_delete_note_non_owner(self):
         """
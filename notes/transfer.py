@@ -0,0 +1,296 @@
+"""
+Streaming export & import of the notes archive, see the export_notes &
+import_notes commands.
+
+An archive is a zip file holding newline-delimited JSON files of the users,
+notes, comments & likes, and the note files under files/. Rows are streamed
+through database iterators & zip entries, so memory use doesn't grow with
+the archive, apart from mapping the exported ids to the imported ones.
+Passwords aren't exported: imported users must reset theirs to log in.
+
+Imports are committed batch by batch, not in a single transaction, which
+would hold the department counters locked for as long as the import lasts.
+An interrupted import keeps the rows imported so far and can't be resumed:
+importing the archive again adds all its notes once more.
+"""
+
+import io
+import json
+import os
+import shutil
+from datetime import datetime
+from itertools import batched
+from zipfile import ZIP_DEFLATED, ZipFile
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .cache import invalidate_archive
+from .content import sanitize
+from .models import AttachmentText, Comment, Note
+from .ranking import update_trending_scores
+from .search import update_search_vectors
+from .signals import actual_counts, count_created_notes
+from .storage import note_storage
+
+FORMAT_VERSION = 1
+
+Like = Note.likes.through
+
+USER_FIELDS = ("id", "username", "email", "first_name", "last_name", "date_joined")
+NOTE_FIELDS = (
+    "id",
+    "user_id",
+    "title",
+    "department",
+    "subject",
+    "content",
+    "file",
+    "file_name",
+    "timestamp",
+    "activity_at",
+    "download_count",
+)
+COMMENT_FIELDS = ("id", "note_id", "user_id", "content", "timestamp")
+LIKE_FIELDS = ("note_id", "user_id")
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _encode(value):
+    # Unlike DjangoJSONEncoder, keep the microseconds of timestamps
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} isn't JSON serializable")
+
+
+def _write_rows(archive, name, rows):
+    count = 0
+    with archive.open(name, "w", force_zip64=True) as file:
+        for row in rows:
+            file.write(json.dumps(row, default=_encode).encode() + b"\n")
+            count += 1
+    return count
+
+
+def _rows(queryset, fields):
+    # Server-side cursors on PostgreSQL, chunked fetches elsewhere
+    return queryset.order_by("pk").values(*fields).iterator(chunk_size=2000)
+
+
+def export_archive(path, notes):
+    """
+    Write the notes queryset, along with their comments, likes, files & the
+    users involved, to a zip archive. Return the number of exported rows.
+    """
+    comments = Comment.objects.filter(note__in=notes)
+    likes = Like.objects.filter(note__in=notes)
+    users = User.objects.filter(
+        Q(pk__in=notes.values("user_id"))
+        | Q(pk__in=comments.values("user_id"))
+        | Q(pk__in=likes.values("user_id"))
+    )
+    counts = {"files": 0}
+    with transaction.atomic(), ZipFile(path, "w", ZIP_DEFLATED) as archive:
+        counts["users"] = _write_rows(
+            archive, "users.ndjson", _rows(users, USER_FIELDS)
+        )
+        counts["notes"] = _write_rows(
+            archive, "notes.ndjson", _rows(notes, NOTE_FIELDS)
+        )
+        counts["comments"] = _write_rows(
+            archive, "comments.ndjson", _rows(comments, COMMENT_FIELDS)
+        )
+        counts["likes"] = _write_rows(
+            archive, "likes.ndjson", _rows(likes, LIKE_FIELDS)
+        )
+
+        # Files shared by several notes are stored once
+        names = (
+            notes.exclude(file="")
+            .exclude(file=None)
+            .order_by("file")
+            .values_list("file", flat=True)
+            .distinct()
+        )
+        for name in names.iterator(chunk_size=2000):
+            if not note_storage.exists(name):
+                continue
+            with (
+                note_storage.open(name) as source,
+                archive.open(f"files/{name}", "w", force_zip64=True) as target,
+            ):
+                shutil.copyfileobj(source, target)
+            counts["files"] += 1
+
+        manifest = {
+            "version": FORMAT_VERSION,
+            "exported_at": timezone.now(),
+            "counts": counts,
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, default=_encode))
+    return counts
+
+
+def _read_rows(archive, name):
+    with archive.open(name) as file:
+        for line in io.TextIOWrapper(file, encoding="utf-8"):
+            yield json.loads(line)
+
+
+def _import_users(archive, batch_size):
+    # Existing users are matched by username
+    user_ids, created = {}, 0
+    password = make_password(None)
+    for rows in batched(_read_rows(archive, "users.ndjson"), batch_size):
+        existing = dict(
+            User.objects.filter(
+                username__in=[row["username"] for row in rows]
+            ).values_list("username", "pk")
+        )
+        users = User.objects.bulk_create(
+            User(
+                username=row["username"],
+                email=row["email"],
+                first_name=row["first_name"],
+                last_name=row["last_name"],
+                date_joined=parse_datetime(row["date_joined"]),
+                password=password,
+            )
+            for row in rows
+            if row["username"] not in existing
+        )
+        existing.update((user.username, user.pk) for user in users)
+        user_ids.update((row["id"], existing[row["username"]]) for row in rows)
+        created += len(users)
+    return user_ids, created
+
+
+def _store_file(archive, name, stored):
+    # Each exported file is stored once, however many notes share it
+    if name not in stored:
+        basename = os.path.basename(name)
+        try:
+            with archive.open(f"files/{name}") as file:
+                stored[name] = note_storage.save(
+                    f"uploads/{basename}", File(file, name=basename)
+                )
+        except KeyError:
+            # Missing when it was exported
+            stored[name] = ""
+    return stored[name]
+
+
+def _import_notes(archive, user_ids, batch_size):
+    note_ids, stored = {}, {}
+    for rows in batched(_read_rows(archive, "notes.ndjson"), batch_size):
+        notes = []
+        for row in rows:
+            note = Note(
+                user_id=user_ids[row["user_id"]],
+                title=row["title"],
+                department=row["department"],
+                subject=row["subject"],
+                content=row["content"],
+                rendered_content=sanitize(row["content"]),
+                download_count=row["download_count"],
+            )
+            if row["file"]:
+                note.file = _store_file(archive, row["file"], stored)
+                note.file_name = row["file_name"] if note.file else ""
+            notes.append(note)
+
+        with transaction.atomic():
+            notes = Note.objects.bulk_create(notes)
+            # timestamp is set to now on insert
+            for note, row in zip(notes, rows):
+                note.timestamp = parse_datetime(row["timestamp"])
+                note.activity_at = parse_datetime(row["activity_at"])
+            Note.objects.bulk_update(notes, ["timestamp", "activity_at"])
+            count_created_notes(notes)
+            AttachmentText.objects.bulk_create(
+                AttachmentText(note=note, file=note.file.name)
+                for note in notes
+                if note.file
+            )
+            update_search_vectors(
+                Note.objects.filter(pk__in=[note.pk for note in notes])
+            )
+        note_ids.update((row["id"], note.pk) for row, note in zip(rows, notes))
+    return note_ids, sum(1 for name in stored.values() if name)
+
+
+def _import_comments(archive, note_ids, user_ids, batch_size):
+    count = 0
+    for rows in batched(_read_rows(archive, "comments.ndjson"), batch_size):
+        with transaction.atomic():
+            comments = Comment.objects.bulk_create(
+                Comment(
+                    note_id=note_ids[row["note_id"]],
+                    user_id=user_ids[row["user_id"]],
+                    content=row["content"],
+                )
+                for row in rows
+            )
+            for comment, row in zip(comments, rows):
+                comment.timestamp = parse_datetime(row["timestamp"])
+            Comment.objects.bulk_update(comments, ["timestamp"])
+        count += len(comments)
+    return count
+
+
+def _import_likes(archive, note_ids, user_ids, batch_size):
+    for rows in batched(_read_rows(archive, "likes.ndjson"), batch_size):
+        Like.objects.bulk_create(
+            (
+                Like(note_id=note_ids[row["note_id"]], user_id=user_ids[row["user_id"]])
+                for row in rows
+            ),
+            ignore_conflicts=True,
+        )
+    # Duplicates were skipped, the notes are new so all their likes are imported
+    return sum(
+        Like.objects.filter(note_id__in=ids).count()
+        for ids in batched(note_ids.values(), batch_size)
+    )
+
+
+def import_archive(path, batch_size=1000):
+    """
+    Add the users, notes, comments, likes & files of a zip archive written by
+    export_archive() to the database. Return the number of imported rows.
+    Not atomic nor resumable, see the module docstring.
+    """
+    with ZipFile(path) as archive:
+        try:
+            manifest = json.loads(archive.read("manifest.json"))
+        except KeyError:
+            raise ArchiveError(f"{path} isn't a notes archive.")
+        if manifest["version"] != FORMAT_VERSION:
+            raise ArchiveError(f"Unsupported archive version {manifest['version']}.")
+
+        user_ids, users = _import_users(archive, batch_size)
+        note_ids, files = _import_notes(archive, user_ids, batch_size)
+        comments = _import_comments(archive, note_ids, user_ids, batch_size)
+        likes = _import_likes(archive, note_ids, user_ids, batch_size)
+
+    # Comments & likes were inserted without moving the counters & scores
+    counts = actual_counts()
+    for ids in batched(note_ids.values(), batch_size):
+        Note.objects.filter(pk__in=ids).update(
+            like_count=counts["actual_likes"], comment_count=counts["actual_comments"]
+        )
+        update_trending_scores(Note.objects.filter(pk__in=ids))
+    invalidate_archive()
+    return {
+        "users": users,
+        "notes": len(note_ids),
+        "comments": comments,
+        "likes": likes,
+        "files": files,
+    }
@@ -9,8 +9,14 @@ urlpatterns = [
     path("", views.display_notes, name="display_notes"),
     # Note page
     path("note/<int:note_id>/", views.note, name="note"),
+    # Next comments of a note, loaded by the note page
+    path("note/<int:note_id>/comments", views.note_comments, name="note_comments"),
+    # New comments & like counts of a note, as server-sent events
+    path("note/<int:note_id>/events", views.note_events, name="note_events"),
     # Like note page
     path("note/<int:note_id>/like_note", views.like_note, name="like_note"),
+    # Download note attachment
+    path("note/<int:note_id>/download", views.download_file, name="download_file"),
     # Create a new note page
     path("new_note/", views.new_note, name="new_note"),
     # Edit note page
@@ -1,6 +1,15 @@
+from urllib.parse import urljoin
 from django.conf import settings
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
+from django.urls import reverse
+from mailer.utils import enqueue_email
+
+
+def absolute_note_url(note_id):
+    """
+    Return the absolute URL of the note page, for links in emails.
+    """
+    return urljoin(settings.SITE_URL, reverse("notes:note", args=[note_id]))
 
 
 def send_comment_notification(sender, receiver, note_url, comment):
@@ -18,4 +27,28 @@ def send_comment_notification(sender, receiver, note_url, comment):
         },
     )
 
-    send_mail(subject, None, email_from, recipient_list, html_message=html_message)
+    enqueue_email(subject, html_message, recipient_list, from_email=email_from)
+
+
+def send_comment_digest(receiver, comments):
+    """
+    Queue a single email listing the given new comments, grouped by note.
+    """
+    notes = {}
+    for comment in comments:
+        notes.setdefault(comment.note, []).append(comment)
+    notes = [
+        (note, absolute_note_url(note.pk), note_comments)
+        for note, note_comments in notes.items()
+    ]
+
+    subject = f"{len(comments)} new comment(s) on your notes"
+    email_from = settings.EMAIL_HOST_USER
+    recipient_list = [receiver.email]
+
+    html_message = render_to_string(
+        "email_templates/comment_digest.html",
+        {"receiver": receiver, "notes": notes},
+    )
+
+    enqueue_email(subject, html_message, recipient_list, from_email=email_from)
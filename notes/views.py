@@ -1,68 +1,150 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from hashlib import md5
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect
-from django.core.paginator import Paginator
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from django.views.decorators.vary import vary_on_cookie
+from django.core.paginator import AsyncPaginator
 from django.contrib import messages
+from django.db import transaction
+from django.db.models import F
 from django.conf import settings
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.urls import reverse
-from .utils import send_comment_notification
+from django.utils.http import urlencode
+from .search import asearch_notes
+from .pagination import CursorPaginator
+from .cache import (
+    archive_etag,
+    async_condition,
+    cache_anonymous_page,
+    note_etag,
+    note_last_modified,
+    render_note_body,
+)
+from .deletion import schedule_note_deletion
+from .downloads import serve_file
+from .events import EVENT_STREAM_HEADERS, event_stream
+from .likes import set_like
 from .forms import NoteForm, CommentForm
-from .models import Note, DEPARTMENTS
+from .models import (
+    Note,
+    Comment,
+    CommentNotification,
+    DepartmentCount,
+    RelatedNote,
+    DEPARTMENTS,
+)
 
+# Archive orderings selectable with ?sort=, each served by an index
+SORTS = {"trending": ("-trending_score", "-id"), "top": ("-like_count", "-id")}
 
-def display_notes(request):
+
+async def _render(request, template_name, context):
+    # Templates read request.user, which can only be loaded lazily in sync code
+    request.user = await request.auser()
+    return render(request, template_name, context)
+
+
+async def _department_counts():
+    # Department dropdown entries, with the number of notes of each. Never
+    # counted over the notes, not even the search matches, see notes.signals
+    counts = DepartmentCount.objects.values_list("department", "count")
+    counts = {department: count async for department, count in counts}
+    return [(key, label, counts.get(key, 0)) for key, label in DEPARTMENTS]
+
+
+@async_condition(etag_func=archive_etag)
+@vary_on_cookie
+@cache_anonymous_page
+async def display_notes(request):
     # Retrieve selected department & search query,
     # from the query parameters
     department = request.GET.get("department")
     search_query = request.GET.get("search_query")
-    notes = Note.objects.all().order_by("-timestamp")
+    sort = request.GET.get("sort")
+    if sort not in SORTS:
+        sort = None
+    # The archive doesn't show content, which can be large
+    notes = (
+        Note.objects.select_related("user")
+        .defer("content", "rendered_content", "search_vector")
+        .order_by("-timestamp")
+    )
 
-    # Filter notes by search query in the title if provided
+    # Filter & rank notes by search query if provided,
+    # within the selected department
     if search_query:
-        notes = notes.filter(title__icontains=search_query)
-
-    # Filter notess by department if a department is selected
-    if department:
+        notes = await asearch_notes(notes, search_query, department)
+    elif department:
+        # Filter notess by department if a department is selected
         notes = notes.filter(department=department)
 
-    paginator = Paginator(notes, 10)  # Display 10 notes per page
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # Trending or most liked first, instead of the latest or best matches
+    if sort:
+        notes = notes.order_by(*SORTS[sort])
+
+    # Keep the filters on the previous/next page links
+    filters = {
+        key: value
+        for key, value in (
+            ("department", department),
+            ("search_query", search_query),
+            ("sort", sort),
+        )
+        if value
+    }
+    previous_query = next_query = None
+
+    if "page" in request.GET:
+        # Compatibility with old ?page= links, counts & offsets the whole set
+        paginator = AsyncPaginator(notes, 10)  # Display 10 notes per page
+        page_obj = await paginator.aget_page(request.GET.get("page"))
+        await page_obj.aget_object_list()
+        if await page_obj.ahas_previous():
+            previous_query = {
+                **filters,
+                "page": await page_obj.aprevious_page_number(),
+            }
+        if await page_obj.ahas_next():
+            next_query = {**filters, "page": await page_obj.anext_page_number()}
+    else:
+        paginator = CursorPaginator(notes, 10)  # Display 10 notes per page
+        page_obj = await paginator.aget_page(request.GET.get("cursor"))
+        if page_obj.has_previous:
+            previous_query = {**filters, "cursor": page_obj.previous_cursor}
+        if page_obj.has_next:
+            next_query = {**filters, "cursor": page_obj.next_cursor}
 
     context = {
         "page_obj": page_obj,
-        "DEPARTMENTS": DEPARTMENTS,
+        "previous_query": urlencode(previous_query) if previous_query else "",
+        "next_query": urlencode(next_query) if next_query else "",
+        "departments": await _department_counts(),
         "search_query": search_query,
+        "sort": sort,
     }
-    return render(request, "notes/notes.html", context)
-
+    return await _render(request, "notes/notes.html", context)
 
-def note(request, note_id):
-    note = get_object_or_404(Note, id=note_id)
-    comments = note.comments.all()
 
-    # Like functionality
-    liked = False
-    if note.likes.filter(id=request.user.id).exists():
-        liked = True
-    number_of_likes = note.number_of_likes()
+@async_condition(etag_func=note_etag, last_modified_func=note_last_modified)
+@vary_on_cookie
+async def note(request, note_id):
+    # The content is only loaded when its rendered body isn't cached
+    note = await aget_object_or_404(
+        Note.objects.select_related("user").defer(
+            "content", "rendered_content", "search_vector"
+        ),
+        id=note_id,
+    )
+    user = await request.auser()
 
     if request.method == "POST":
         form = CommentForm(data=request.POST)
         if form.is_valid():
-            new_comment = form.save(commit=False)
-            new_comment.user = request.user
-            new_comment.note = note
-            new_comment.save()
-            note_url = reverse("notes:note", args=[note.id])
-            if not settings.DEBUG and new_comment.user != note.user:
-                send_comment_notification(
-                    sender=new_comment.user,
-                    receiver=note.user,
-                    note_url=note_url,
-                    comment=new_comment,
-                )
+            await sync_to_async(_add_comment)(form, user, note)
             return redirect("notes:note", note_id=note_id)
     else:
         form = CommentForm()
@@ -70,23 +152,122 @@ def note(request, note_id):
     context = {
         "form": form,
         "note": note,
-        "comments": comments,
-        "number_of_likes": number_of_likes,
-        "note_is_liked": liked,
+        "note_body": await render_note_body(note),
+        "comments": await _comment_page(note.pk),
+        "related_notes": await _related_notes(note.pk),
+        "number_of_likes": note.number_of_likes(),
+        "note_is_liked": await note.likes.filter(id=user.id).aexists(),
     }
-    return render(request, "notes/note.html", context)
+    return await _render(request, "notes/note.html", context)
 
 
-def like_note(request, note_id):
-    note = get_object_or_404(Note, id=note_id)
-    if note.likes.filter(id=request.user.id).exists():
-        note.likes.remove(request.user)
+async def _related_notes(note_id):
+    # Precomputed by the build_related_notes command, see notes.related
+    related = (
+        RelatedNote.objects.filter(note_id=note_id, related__deleted_at=None)
+        .select_related("related")
+        .only("related__title", "related__subject")
+        .order_by("rank")
+    )
+    return [row.related async for row in related]
+
+
+def _add_comment(form, user, note):
+    # Transactions can't be used from async code (yet)
+    comment = form.save(commit=False)
+    comment.user = user
+    comment.note = note
+    with transaction.atomic():
+        comment.save()
+        if not settings.DEBUG and user != note.user:
+            # Emailed by the send_comment_digests worker, outside the request
+            CommentNotification.objects.create(receiver=note.user, comment=comment)
+
+
+def _comment_paginator(note_id):
+    # Oldest first, with their authors, see comment_note_timestamp_id_idx
+    comments = (
+        Comment.objects.filter(note_id=note_id)
+        .select_related("user")
+        .order_by("timestamp")
+    )
+    return CursorPaginator(comments, settings.NOTES_COMMENTS_PER_PAGE)
+
+
+async def _comment_page(note_id, cursor=None):
+    return await _comment_paginator(note_id).aget_page(cursor)
+
+
+async def note_comments(request, note_id):
+    """
+    Return the next page of the note's comments, as an HTML fragment
+    loaded by the note page.
+    """
+    # Comments of deleted notes are hidden along with them
+    if not await Note.objects.filter(pk=note_id).aexists():
+        raise Http404
+    comments = await _comment_page(note_id, request.GET.get("cursor"))
+    context = {"note_id": note_id, "comments": comments}
+    return await _render(request, "notes/comment_list.html", context)
+
+
+async def note_events(request, note_id):
+    """
+    Stream the new comments & like counts of the note, as server-sent events.
+    Under main.asgi, notes.events.events_application serves them instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be held for as long as the stream lasts,
+        # 204 tells the browser not to reconnect
+        return HttpResponse(status=204)
+    if not await Note.objects.filter(pk=note_id).aexists():
+        raise Http404
+    return StreamingHttpResponse(event_stream(note_id), headers=EVENT_STREAM_HEADERS)
+
+
+@login_required
+@require_POST
+async def like_note(request, note_id):
+    note = await aget_object_or_404(Note.objects.only("pk"), id=note_id)
+    user = await request.auser()
+    # The form sends the wanted state, so repeated requests are idempotent,
+    # requests without it toggle the like
+    liked = request.POST.get("liked")
+    if liked is None:
+        liked = not await note.likes.filter(id=user.id).aexists()
     else:
-        note.likes.add(request.user)
+        liked = liked == "true"
+    # A single transaction, which can only run in sync code
+    like_count = await sync_to_async(set_like)(note.pk, user.pk, liked)
 
+    if request.accepts("application/json") and not request.accepts("text/html"):
+        return JsonResponse({"liked": liked, "like_count": like_count})
     return HttpResponseRedirect(reverse("notes:note", args=[note_id]))
 
 
+@login_required
+def download_file(request, note_id):
+    note = get_object_or_404(
+        Note.objects.only("file", "file_name", "updated_at"), id=note_id
+    )
+    if not note.file:
+        raise Http404
+
+    etag = md5(
+        f"{note.file.name}:{note.updated_at.isoformat()}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    response = serve_file(
+        request, note.file, etag, note.updated_at, filename=note.file_name
+    )
+
+    # Count each download once, not every resumed range of it
+    range_header = request.headers.get("Range", "")
+    if response.status_code in (200, 206) and range_header in ("", "bytes=0-"):
+        Note.objects.filter(pk=note.pk).update(download_count=F("download_count") + 1)
+    return response
+
+
 @login_required
 def new_note(request):
     if request.method == "POST":
@@ -129,6 +310,7 @@ def delete_note(request, note_id):
     note = get_object_or_404(Note, id=note_id)
     if note.user != request.user:
         raise Http404
-    note.delete()
+    # Hidden at once, purged by the purge_deleted command
+    schedule_note_deletion(Note.objects.filter(pk=note.pk))
     messages.success(request, "Note deleted successfully.")
     return redirect("notes:display_notes")
@@ -3,6 +3,8 @@ from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+from django.utils import timezone
+from .models import NotificationSettings
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -87,11 +89,24 @@ class UpdateUserForm(forms.ModelForm):
         widget=forms.PasswordInput(attrs={"class": "form-control bg-dark text-light"}),
         required=False,
     )
+    comment_frequency = forms.ChoiceField(
+        label="Comment Notifications",
+        choices=NotificationSettings.FREQUENCIES,
+        widget=forms.Select(attrs={"class": "form-control bg-dark text-light"}),
+        required=False,
+    )
 
     class Meta:
         model = User
         fields = ("username", "email", "password1", "password2")
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["comment_frequency"].initial = (
+                NotificationSettings.comment_frequency_for(self.instance)
+            )
+
     def clean(self):
         cleaned_data = super().clean()
         password1 = cleaned_data.get("password1")
@@ -106,6 +121,16 @@ class UpdateUserForm(forms.ModelForm):
             except ValidationError as e:
                 self.add_error("password1", e)
 
+    def credentials_changed(self):
+        """
+        Return whether the username, email or password changed, which the user
+        is notified of.
+        """
+        return bool(
+            {"username", "email"} & set(self.changed_data)
+            or self.cleaned_data.get("password1")
+        )
+
     def save(self, commit=True):
         user = super().save(commit=False)
         user.email = self.cleaned_data.get("email")
@@ -114,4 +139,19 @@ class UpdateUserForm(forms.ModelForm):
             user.set_password(password)
         if commit:
             user.save()
+            self.save_notification_settings(user)
         return user
+
+    def save_notification_settings(self, user):
+        frequency = self.cleaned_data.get("comment_frequency")
+        if not frequency:
+            return
+        # Start the first digest window now
+        NotificationSettings.objects.update_or_create(
+            user=user,
+            defaults={"comment_frequency": frequency},
+            create_defaults={
+                "comment_frequency": frequency,
+                "last_digest_at": timezone.now(),
+            },
+        )
@@ -1,3 +1,49 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class NotificationSettings(models.Model):
+    IMMEDIATE = "immediate"
+    HOURLY = "hourly"
+    DAILY = "daily"
+    FREQUENCIES = (
+        (IMMEDIATE, "Immediately"),
+        (HOURLY, "Hourly digest"),
+        (DAILY, "Daily digest"),
+    )
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="notification_settings"
+    )
+    comment_frequency = models.CharField(
+        max_length=10, choices=FREQUENCIES, default=IMMEDIATE
+    )
+    last_digest_at = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def comment_frequency_for(cls, user):
+        """
+        Return how often the user wants to be emailed about new comments.
+        """
+        frequency = cls.objects.filter(user=user).values_list(
+            "comment_frequency", flat=True
+        )
+        return frequency.first() or cls.IMMEDIATE
+
+    def __str__(self):
+        return f"{self.user}: {self.comment_frequency}"
+
+
+class AccountDeletion(models.Model):
+    """
+    An account deleted by its user, deactivated at once & purged in batches
+    by the purge_deleted command.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="deletion"
+    )
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.user)
@@ -8,6 +8,7 @@ handling validation & required fields:
 from django.test import TestCase
 from django.contrib.auth.models import User
 from ..forms import CustomUserCreationForm, CustomAuthenticationForm, UpdateUserForm
+from ..models import NotificationSettings
 
 
 class CustomUserCreationFormTests(TestCase):
@@ -175,3 +176,26 @@ class UpdateUserFormTests(TestCase):
         }
         form = UpdateUserForm(instance=self.user, data=data)
         self.assertFalse(form.is_valid(), form.errors)
+
+    def test_comment_frequency_saved(self):
+        """
+        Test that the chosen comment notification frequency is saved,
+        and shown as the initial choice afterwards.
+        """
+        data = {
+            "username": "testuser",
+            "email": "testuser@uoi.gr",
+            "comment_frequency": NotificationSettings.DAILY,
+        }
+        form = UpdateUserForm(instance=self.user, data=data)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        self.assertEqual(
+            NotificationSettings.comment_frequency_for(self.user),
+            NotificationSettings.DAILY,
+        )
+        form = UpdateUserForm(instance=self.user)
+        self.assertEqual(
+            form.fields["comment_frequency"].initial, NotificationSettings.DAILY
+        )
@@ -1,11 +1,15 @@
 """
 This module contains test cases for the following views:
-* register, account
+* register, account, delete_account
 """
 
+from io import StringIO
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
+from mailer.models import OutgoingEmail
+from ..models import AccountDeletion
 
 
 class RegisterViewTests(TestCase):
@@ -80,6 +84,50 @@ class AccountViewTests(TestCase):
         self.assertEqual(self.user.email, "updated_user@uoi.gr")
         self.assertRedirects(response, self.url)
 
+    def test_update_notification_is_queued(self):
+        """
+        Test that updating the account queues a notification to the old address.
+        """
+        data = {"username": "updated_user", "email": "updated_user@uoi.gr"}
+        self.client.post(self.url, data)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipients, ["testuser@uoi.gr"])
+
+    def test_no_notification_without_credential_changes(self):
+        """
+        Test that changing only the notification settings doesn't queue
+        a notification.
+        """
+        data = {
+            "username": "testuser",
+            "email": "testuser@uoi.gr",
+            "comment_frequency": "daily",
+        }
+        self.client.post(self.url, data)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_username_change_notification_is_queued(self):
+        """
+        Test that changing only the username, which users log in with,
+        queues a notification.
+        """
+        data = {"username": "updated_user", "email": "testuser@uoi.gr"}
+        self.client.post(self.url, data)
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    def test_password_change_notification_is_queued(self):
+        """
+        Test that changing only the password queues a notification.
+        """
+        data = {
+            "username": "testuser",
+            "email": "testuser@uoi.gr",
+            "password1": "New_SecRet_p@ssword",
+            "password2": "New_SecRet_p@ssword",
+        }
+        self.client.post(self.url, data)
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
     def test_invalid_form_data(self):
         """
         Test that invalid form submissions do not update user credentials.
@@ -115,16 +163,24 @@ class DeleteAccountViewTests(TestCase):
 
     def test_successful_account_deletion(self):
         """
-        Test that a user account is deleted successfully.
+        Test that a deleted account is deactivated & logged out at once,
+        and queued to be purged.
         """
         response = self.client.post(self.url)
-        self.assertEqual(User.objects.count(), 0)
         self.assertRedirects(response, reverse("users:register"))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(AccountDeletion.objects.filter(user=self.user).exists())
+        self.assertNotIn("_auth_user_id", self.client.session)
+        self.assertFalse(
+            self.client.login(username="testuser", password="SecRet_p@ssword")
+        )
 
     def test_account_not_found_after_deletion(self):
         """
-        Test that the account cannot be accessed after deletion.
+        Test that the account cannot be accessed once purged.
         """
         self.client.post(self.url)  # Delete the account
+        call_command("purge_deleted", stdout=StringIO())
         with self.assertRaises(User.DoesNotExist):
             User.objects.get(id=self.user.id)  # Attempt to access the deleted user
@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.core.mail import send_mail
+from mailer.utils import enqueue_email
 from django.template.loader import render_to_string
 
 
@@ -16,4 +16,4 @@ def send_update_account_notification(user):
         },
     )
 
-    send_mail(subject, None, email_from, recipient_list, html_message=html_message)
+    enqueue_email(subject, html_message, recipient_list, from_email=email_from)
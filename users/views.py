@@ -1,10 +1,12 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import update_session_auth_hash
+from django.contrib.auth import logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
+from .models import AccountDeletion
 from .forms import CustomUserCreationForm, CustomAuthenticationForm, UpdateUserForm
 from django.contrib.auth.views import LoginView
 from .utils import send_update_account_notification
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.conf import settings
 from django.contrib import messages
 
@@ -30,9 +32,14 @@ def account(request):
         form = UpdateUserForm(instance=request.user, data=request.POST)
         user = User.objects.get(id=request.user.id)
         if form.is_valid():
-            form.save()
-            send_update_account_notification(user) if not settings.DEBUG else None
-            update_session_auth_hash(request, request.user)  # Keep user logged in
+            # Queue the notification along with the update
+            with transaction.atomic():
+                form.save()
+                if form.credentials_changed() and not settings.DEBUG:
+                    send_update_account_notification(user)
+            if form.cleaned_data.get("password1"):
+                # Keep user logged in, the session is bound to the password
+                update_session_auth_hash(request, request.user)
             messages.success(
                 request, "Your account credentials have been successfully updated."
             )
@@ -46,8 +53,11 @@ def account(request):
 
 @login_required
 def delete_account(request):
-    user = User.objects.get(id=request.user.id)
-    user.delete()
+    # Deactivated at once, its data is purged by the purge_deleted command
+    with transaction.atomic():
+        AccountDeletion.objects.get_or_create(user=request.user)
+        User.objects.filter(pk=request.user.pk).update(is_active=False)
+    logout(request)
     messages.error(
         request, "Your account has been deleted along with all associated data."
     )